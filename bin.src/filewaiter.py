@@ -22,16 +22,16 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-import os
-import os.path
 import sys
-import time
 import optparse
 
+from lsst.ctrl.orca.FileWatcher import FileWaitServer, FileWatcher
+
 # filewaiter.py - wait for creation of files
 if __name__ == "__main__":
 
-    usage = """usage: %prog [-f|-l] filenames.txt"""
+    usage = """usage: %prog [-f|-l] [-i interval] [-t timeout] filenames.txt
+       %prog --stream [-i interval]"""
 
     parser = optparse.OptionParser(usage)
     # TODO: handle "--dryrun"
@@ -39,12 +39,22 @@ if __name__ == "__main__":
                       dest="bFirst", help="wait for first file in list")
     parser.add_option("-l", "--list", action="store_true", default=False,
                       dest="bList", help="wait for all the files in the list")
+    parser.add_option("-i", "--interval", action="store", type="float", default=1.0,
+                      dest="interval", help="seconds between scans of the directories of the files")
+    parser.add_option("-t", "--timeout", action="store", type="float", default=None,
+                      dest="timeout", help="give up, with exit status 1, after this many seconds")
+    parser.add_option("-s", "--stream", action="store_true", default=False,
+                      dest="bStream", help="serve wait requests read from stdin, answering on stdout "
+                                           "as the files appear, until the end of stdin")
 
     parser.opts = {}
     parser.args = []
 
     # parse and check command line arguments
     (parser.opts, parser.args) = parser.parse_args()
+    if parser.opts.bStream:
+        FileWaitServer(sys.stdin, sys.stdout, parser.opts.interval).serve()
+        sys.exit(0)
     if len(parser.args) < 1:
         print(usage)
         raise RuntimeError("Missing args: pipelinePolicyFile runId")
@@ -54,21 +64,11 @@ if __name__ == "__main__":
     bFirst = parser.opts.bFirst
     bList = parser.opts.bList
 
-    f = open(filename, 'r')
-
-    lines = f.readlines()
-
-    fileList = []
-    for line in lines:
-        list.append(line.split('\n')[0])
+    with open(filename, 'r') as f:
+        fileList = [line for line in f.read().splitlines() if line]
 
     if bFirst:
-        item = fileList[0]
-        while not os.path.exists(item):
-            time.sleep(1)
-        sys.exit(0)
+        fileList = fileList[:1]
 
-    for item in fileList:
-        while not os.path.exists(item):
-            time.sleep(1)
-    sys.exit(0)
+    watcher = FileWatcher(fileList, parser.opts.interval)
+    sys.exit(0 if watcher.wait(parser.opts.timeout) else 1)
@@ -25,17 +25,20 @@
 import os
 import os.path
 import optparse
+import sys
 import lsst.ctrl.orca as orca
-import lsst.log as log
-import lsst.utils
-from lsst.ctrl.orca.ProductionRunManager import ProductionRunManager
+from lsst.ctrl.orca.StartupProfile import StartupProfile, phase
 
-usage = """usage: %prog [-gndvqsc] [-r dir] [-e script] [-V int][-L lev] pipelineConfigFile runId"""
+# the rest of orca is imported once the command line is parsed, so that it can be timed
+
+usage = """usage: %prog [-gndvqsc] [-r dir] [-e script] [-V int][-L lev] [--rerun] pipelineConfigFile runId
+       %prog [-dvqs] [-L lev] --resume runId pipelineConfigFile
+       %prog --compile-config snapshotFile pipelineConfigFile"""
 
 parser = optparse.OptionParser(usage)
-# TODO: handle "--dryrun"
 parser.add_option("-n", "--dryrun", action="store_true", dest="dryrun",
-                  default=False, help="print messages, but don't execute anything")
+                  default=False, help="stage the workflows in a temporary directory and print what running "
+                  "them would take, but submit nothing")
 
 parser.add_option("-g", "--skipglidein", action="store_true", dest="skipglidein",
                   default=False, help="if this run uses condor glidein, skip doing it")
@@ -59,6 +62,23 @@ parser.add_option("-s", "--silent", action="store_const", const=-3,
 parser.add_option("-P", "--pipeverb", type="int", action="store", dest="pipeverb", default=0,
                   metavar="int", help="pipeline verbosity level (0=normal, 1=debug, -1=quiet, -3=silent)")
 
+# long only: -r is the repository directory
+parser.add_option("--rerun", action="store_true", dest="rerun", default=False,
+                  help="resubmit only the failed and unfinished nodes of an existing run, "
+                  "using the rescue DAG DAGMan left in its staging directory")
+
+parser.add_option("-R", "--resume", type="string", action="store", dest="resume", default=None,
+                  metavar="runId", help="reattach to the still running workflows of runId, using "
+                  "the journal in its staging directory; nothing is configured or submitted")
+
+parser.add_option("--compile-config", type="string", action="store", dest="compileConfig", default=None,
+                  metavar="snapshotFile", help="compile pipelineConfigFile to a snapshot, which "
+                  "can be given as the pipelineConfigFile of later runs to start without loading the "
+                  "config again; nothing is run")
+
+parser.add_option("--profile-startup", action="store_true", dest="profileStartup", default=False,
+                  help="print the time taken to import orca, load the config, configure and launch")
+
 parser.add_option("-L", "--logconfig", type="string", action="store",
                   dest="logconfig", default=None,
                   help="lsst.log configuration file")
@@ -68,24 +88,51 @@ parser.args = []
 
 # parse and check command line arguments
 (parser.opts, parser.args) = parser.parse_args()
-if len(parser.args) < 2:
+if parser.opts.profileStartup:
+    orca.startupProfile = StartupProfile()
+
+if parser.opts.compileConfig is not None:
+    if len(parser.args) < 1:
+        print(usage)
+        raise RuntimeError("Missing args: pipelineConfigFile")
+    from lsst.ctrl.orca.ConfigSnapshot import ConfigSnapshot
+    from lsst.ctrl.orca.config.ProductionConfig import ProductionConfig
+    ConfigSnapshot.compile(ProductionConfig, parser.args[0], parser.opts.compileConfig)
+    sys.exit(0)
+elif parser.opts.resume is not None:
+    if len(parser.args) < 1:
+        print(usage)
+        raise RuntimeError("Missing args: pipelineConfigFile")
+    runId = parser.opts.resume
+elif len(parser.args) < 2:
     print(usage)
     raise RuntimeError("Missing args: pipelineConfigFile runId")
+else:
+    runId = parser.args[1]
 
 pipelineConfigFile = parser.args[0]
-runId = parser.args[1]
 
 orca.skipglidein = parser.opts.skipglidein
+orca.rerun = parser.opts.rerun
 orca.dryrun = parser.opts.dryrun
 orca.envscript = parser.opts.envscript
 
+with phase("import lsst.log"):
+    import lsst.log as log
+with phase("import ProductionRunManager"):
+    from lsst.ctrl.orca.ProductionRunManager import ProductionRunManager
+
 # This is handled via lsst.ctrl.orca (i.e. lsst/ctrl/orca/__init__.py):
 #
 # orca.logger = Log(Log.getDefaultLog(), "orca")
 
 configPath = None
 if parser.opts.logconfig is None:
-    package = lsst.utils.getPackageDir("ctrl_orca")
+    # the environment names the package directory when it's set up; lsst.utils is slow to import
+    package = os.environ.get("CTRL_ORCA_DIR")
+    if package is None:
+        import lsst.utils
+        package = lsst.utils.getPackageDir("ctrl_orca")
     configPath = os.path.join(package, "etc", "log4j.properties")
 else:
     configPath = parser.opts.logconfig
@@ -104,7 +151,22 @@ log.debug("runId = "+runId)
 # create the ProductionRunManager, configure it, and launch it
 productionRunManager = ProductionRunManager(runId, pipelineConfigFile)
 
-
-productionRunManager.runProduction(skipConfigCheck=parser.opts.skipconfigcheck,
-                                   workflowVerbosity=parser.opts.pipeverb)
+if parser.opts.resume is not None:
+    if not productionRunManager.resumeProduction():
+        print("No running workflows found to resume for %s" % runId)
+elif parser.opts.dryrun:
+    # the workflows are staged in a temporary directory, and nothing is submitted
+    for name, plan in productionRunManager.planProduction(workflowVerbosity=parser.opts.pipeverb):
+        print("workflow %s" % name)
+        if plan is None:
+            print("    can't be planned")
+            continue
+        width = max(len(item) for item, description in plan)
+        for item, description in plan:
+            print("    %-*s %s" % (width, item, description))
+else:
+    productionRunManager.runProduction(skipConfigCheck=parser.opts.skipconfigcheck,
+                                       workflowVerbosity=parser.opts.pipeverb)
+if orca.startupProfile is not None:
+    orca.startupProfile.report()
 productionRunManager.joinShutdownThread()
@@ -0,0 +1,114 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import argparse
+import os
+import sys
+import time
+
+from lsst.ctrl.orca.DagPlan import DagPlan
+from lsst.ctrl.orca.LogAggregator import LogAggregator, LogIndex
+
+# usage: orcalogs.py STAGINGDIR pack [--watch SECONDS] [DAG ...]
+#        orcalogs.py STAGINGDIR show [--full] ID
+#        orcalogs.py STAGINGDIR failures [--limit N]
+#
+# packs the worker logs of a run into per visit archives, and looks up the
+# log and exit status of a data id, or the ids that failed, in their index
+
+
+def pack(args):
+    dagFiles = args.dags if args.dags else None
+    # a workflow of several tasks splices the DAG of each into its own
+    dags = dagFiles if dagFiles else LogAggregator(args.stagingDir).findDagFiles()
+    splices = [splice for dag in dags for splice in DagPlan(dag).splices]
+    aggregator = LogAggregator(args.stagingDir, args.tail, splices=splices)
+    while True:
+        count = aggregator.aggregate(dagFiles)
+        if count:
+            print("packed the logs of %d jobs" % count)
+        if args.watch is None:
+            return 0
+        # DAGMan holds its lock file while the DAG runs
+        dags = dagFiles if dagFiles else aggregator.findDagFiles()
+        if not any(os.path.exists(dag + ".lock") for dag in dags):
+            # pick up the jobs which ended after the last pass
+            aggregator.aggregate(dagFiles)
+            return 0
+        time.sleep(args.watch)
+
+
+def openIndex(args):
+    path = LogAggregator(args.stagingDir).getIndexPath()
+    if not os.path.exists(path):
+        print("%s: no logs have been packed" % args.stagingDir, file=sys.stderr)
+        sys.exit(1)
+    return LogIndex(path)
+
+
+def show(args):
+    index = openIndex(args)
+    entry = index.lookup(args.id)
+    if entry is None:
+        print("%s: no log" % args.id, file=sys.stderr)
+        return 1
+    print("node %s, exit status %s, %s@%d" % (entry["node"], entry["status"], entry["archive"],
+                                              entry["offset"]))
+    print(index.read(entry) if args.full else entry["tail"])
+    return 0
+
+
+def failures(args):
+    index = openIndex(args)
+    for entry in index.failures(args.limit):
+        print("%s\t%s\t%s" % (entry["dataId"], entry["node"], entry["status"]))
+    return 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(prog=sys.argv[0])
+    parser.add_argument("stagingDir", help="local staging directory of the run")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    packParser = commands.add_parser("pack", help="pack the logs of the worker jobs that have ended")
+    packParser.add_argument("-w", "--watch", action="store", type=float, dest="watch", default=None,
+                            help="keep packing, every WATCH seconds, until the DAGs finish")
+    packParser.add_argument("-t", "--tail", action="store", type=int, dest="tail", default=10,
+                            help="lines at the end of each log to keep in the index")
+    packParser.add_argument("dags", nargs="*", help="DAG files (default: those in the staging directory)")
+    packParser.set_defaults(func=pack)
+
+    showParser = commands.add_parser("show", help="show the log of a data id")
+    showParser.add_argument("-f", "--full", action="store_true", dest="full", default=False,
+                            help="print the whole log, not just its tail")
+    showParser.add_argument("id", help="the data id, e.g. \"visit=1 raft=2,2 sensor=1,1\"")
+    showParser.set_defaults(func=show)
+
+    failuresParser = commands.add_parser("failures", help="list the data ids whose jobs failed")
+    failuresParser.add_argument("-n", "--limit", action="store", type=int, dest="limit", default=None,
+                                help="the most ids to list")
+    failuresParser.set_defaults(func=failures)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
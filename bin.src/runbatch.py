@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+#
+# LSST Data Management System
+# Copyright 2008-2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import argparse
+import shlex
+import sys
+
+from lsst.ctrl.orca.CompletionLedger import CompletionLedger
+from lsst.ctrl.orca.WorkerBatchRunner import WorkerBatchRunner, splitBatch
+
+# usage: runbatch.py [-j N] [-r results] [-l logdir] -c "command ... {dataId}" -- $(var1)
+#
+# runs a command for each data id of the batch a DAG node was given, so a
+# job sets up its environment once for all of them; used as the last step
+# of a worker script, e.g.  exec runbatch.py -c "processCcd.py ... --id {dataId}" -- "$@"
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(prog=sys.argv[0])
+
+    parser.add_argument("-c", "--command", action="store", type=str, dest="command", required=True,
+                        help="command to run for each id; {dataId} is replaced by the key=value fields "
+                             "of the id, {dataIdName} by the id in the form used in file names")
+    parser.add_argument("-j", "--processes", action="store", type=int, dest="processes", default=None,
+                        help="ids to run at once (default: $OMP_NUM_THREADS, or the number of cores)")
+    parser.add_argument("-r", "--results", action="store", type=str, dest="results",
+                        default="batch.results", help="file the outcome of each id is appended to")
+    parser.add_argument("-l", "--logdir", action="store", type=str, dest="logdir", default=None,
+                        help="directory for the output of each id")
+    parser.add_argument("-L", "--ledger", action="store", type=str, dest="ledger", default=None,
+                        help="completion ledger directory of the run: ids it has as complete are skipped, "
+                             "and the outcome of each id run is recorded there")
+    parser.add_argument("ids", nargs=argparse.REMAINDER,
+                        help="the ids, as the DAG VARS give them, after a --")
+
+    args = parser.parse_args()
+    idArgs = args.ids[1:] if args.ids[:1] == ["--"] else args.ids
+    dataIds = splitBatch(idArgs)
+    if not dataIds:
+        parser.error("no ids given")
+
+    ledger = CompletionLedger(args.ledger) if args.ledger is not None else None
+    runner = WorkerBatchRunner(shlex.split(args.command), args.results, args.processes, args.logdir, ledger)
+    outcomes = runner.run(dataIds)
+    summary = runner.summarize(outcomes)
+    for line in summary:
+        print(line, file=sys.stderr)
+    sys.exit(1 if summary else 0)
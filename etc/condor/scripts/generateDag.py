@@ -23,9 +23,17 @@
 #
 
 import argparse
+import itertools
+import os
 import sys
 import shlex
 
+from lsst.ctrl.orca.CompletionLedger import CompletionLedger
+from lsst.ctrl.orca.DataIdIndex import DataIdIndex
+from lsst.ctrl.orca.DataIdParser import DataIdParser
+from lsst.ctrl.orca.DataIdTable import DataIdTable
+from lsst.ctrl.orca.InputList import readInputLines
+
 
 def _line_to_args(self, line):
     for arg in shlex.split(line, comments=True, posix=True):
@@ -65,20 +73,128 @@ def makeArgumentParser(description, inRootsRequired=True, addRegistryOption=True
         help="runid of this job")
 
     parser.add_argument(
-        "-i", "--idsPerJob", dest="idsPerJob",
+        "-i", "--idsPerJob", dest="idsPerJob", type=int, default=1,
         help="number of ids to run per job")
 
+    parser.add_argument(
+        "-o", "--output", dest="output",
+        help="DAG file to write (default: <pipeline>.diamond.dag)")
+
+    parser.add_argument(
+        "-g", "--groupKey", dest="groupKey",
+        help="key of the data ids whose value names the log directory of a job (default: the first key)")
+
+    parser.add_argument(
+        "-L", "--locality", dest="locality", default="",
+        help="comma separated keys of the data ids to order the jobs by, most significant first; "
+             "the ids of a job share the values of these keys")
+
+    parser.add_argument(
+        "--groupCategory", dest="groupCategories", action="append", default=[], metavar="GROUP=CATEGORY",
+        help="put the worker jobs of a group in a node category other than 'worker'")
+
+    parser.add_argument(
+        "--categoryMaxJobs", dest="categoryMaxJobs", action="append", default=[], metavar="CATEGORY=N",
+        help="run at most N jobs of a node category at once")
+
+    parser.add_argument(
+        "--categoryPriority", dest="categoryPriorities", action="append", default=[],
+        metavar="CATEGORY=PRIORITY", help="node priority of the worker jobs of a category")
+
+    parser.add_argument(
+        "--groupPriority", dest="groupPriorities", action="append", default=[], metavar="GROUP=PRIORITY",
+        help="node priority of the worker jobs of a group, overriding that of their category")
+
+    parser.add_argument(
+        "--categoryPrefix", dest="categoryPrefix", default="",
+        help="prefix the node categories with this, so that DAGs spliced into one don't share the throttles "
+             "of categories of the same name; categories starting with '+' are shared regardless")
+
+    parser.add_argument(
+        "--ledger", dest="ledger",
+        help="completion ledger directory of the run; the ids it has as complete are left out")
+
+    parser.add_argument(
+        "-I", "--incremental", dest="incremental", action="store_true", default=False,
+        help="only schedule the ids that aren't in the index of ids already scheduled "
+             "in this directory, and add them to it")
+
     return parser
 
 
-def writeDagFile(pipeline, templateFile, infile, workerdir, prescriptFile, runid, idsPerJob):
+def parsePairs(parser, option, pairs, valueType=str):
+    """
+    Turn the NAME=VALUE arguments of an option into a dictionary.
+    """
+    values = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        try:
+            if not name or not sep:
+                raise ValueError()
+            values[name] = valueType(value)
+        except ValueError:
+            parser.error("%s: '%s' isn't a valid NAME=VALUE pair" % (option, pair))
+    return values
+
+
+def readDataIds(infile, exclude=None, groupKey=None, localityKeys=()):
+    """
+    Read and validate the data ids in an input list, one per line, dropping
+    repeated ids and those in exclude.  Every invalid line is reported, and
+    the script exits, before anything is written.
+    """
+    dataIds, errors, errorCount = DataIdTable.fromFile(readInputLines(infile), exclude)
+    if errorCount:
+        for lineNumber, line, problem in errors:
+            print("%s:%d: %s: %s" % (infile, lineNumber, problem, line), file=sys.stderr)
+        if errorCount > len(errors):
+            print("%s: ... and %d more invalid lines" % (infile, errorCount - len(errors)), file=sys.stderr)
+        print("%s: %d invalid data ids; no DAG written" % (infile, errorCount), file=sys.stderr)
+        sys.exit(1)
+    if groupKey is not None and len(dataIds) and groupKey not in dataIds.keys:
+        print("%s: the data ids have no group key '%s'; no DAG written" % (infile, groupKey), file=sys.stderr)
+        sys.exit(1)
+    for key in localityKeys:
+        if len(dataIds) and key not in dataIds.keys:
+            print("%s: the data ids have no locality key '%s'; no DAG written" % (infile, key),
+                  file=sys.stderr)
+            sys.exit(1)
+    if dataIds.duplicates:
+        print("%d repeated data ids dropped" % dataIds.duplicates)
+    return dataIds
+
+
+def makeLogDirs(dataIds, groupKey=None, logDir="logs"):
+    """
+    Create the per group (e.g. per visit) log directories the worker jobs
+    write to.
+    """
+    if len(dataIds) == 0:
+        return
+    if groupKey is None:
+        groupKey = dataIds.keys[0]
+    for visit in dataIds.column(groupKey).distinct():
+        os.makedirs(os.path.join(logDir, visit), exist_ok=True)
+
+
+def writeDagFile(pipeline, templateFile, dataIds, workerdir, prescriptFile, runid, idsPerJob, outname,
+                 firstWorkerId=1, groupKey=None, localityKeys=(), groupCategories=None, categoryMaxJobs=None,
+                 categoryPriorities=None, groupPriorities=None, categoryPrefix=""):
     """
     Write Condor Dag Submission files.
     """
 
-    print("Writing DAG file ")
+    def categoryName(category):
+        return category if category.startswith("+") else categoryPrefix + category
+
+    dataIdParser = DataIdParser(groupKey)
+    groupCategories = groupCategories or {}
+    categoryMaxJobs = categoryMaxJobs or {}
+    categoryPriorities = categoryPriorities or {}
+    groupPriorities = groupPriorities or {}
 
-    outname = pipeline + ".diamond.dag"
+    print("Writing DAG file ")
 
     print(outname)
 
@@ -92,12 +208,19 @@ def writeDagFile(pipeline, templateFile, infile, workerdir, prescriptFile, runid
     if prescriptFile is not None:
         outObj.write("SCRIPT PRE A "+prescriptFile+"\n")
 
+    # jobs handle batches of up to idsPerJob ids sharing the values of the
+    # locality keys, and the ids are ordered by those values, so that jobs
+    # reading the same inputs run next to each other
+    order = dataIds.order(localityKeys) if localityKeys else None
+    numJobs = sum(1 for batch in dataIds.batches(idsPerJob, localityKeys, order))
+    # the ids of a batch are passed to the job as a single command line
+    separator = " " if dataIds.keys == (None,) else " --id "
+
     print("First Input File loop ")
 
     # Loop over input entries
-    fileObj = open(infile, "r")
-    count = 0
-    for aline in fileObj:
+    count = firstWorkerId - 1
+    for job in range(numJobs):
         count += 1
         outObj.write("JOB A" + str(count) + " "+workerdir+"/" + templateFile + "\n")
 
@@ -106,51 +229,56 @@ def writeDagFile(pipeline, templateFile, infile, workerdir, prescriptFile, runid
     print("Second Input File loop ")
 
     # Loop over input entries
-    fileObj = open(infile, "r")
-    count = 0
-    for aline in fileObj:
-        count += 1
-        myData = aline.rstrip()
-
-        # Searching for a space detects
-        # extended input like :  visit=887136081 raft=2,2 sensor=0,1
-        # No space is something simple like a skytile id
-        if " " in myData:
-            # Change space to :
-            myList = myData.split(' ')
-            new1Data = '%s:%s:%s' % tuple(myList)
-            # Change = to -
-            myList2 = new1Data.split('=')
-            new2Data = '%s-%s-%s-%s' % tuple(myList2)
-            # Change , to _
-            myList3 = new2Data.split(',')
-            new3Data = '%s_%s_%s' % tuple(myList3)
-
-            newData = new3Data
-            visit = myList[0].split('=')[1]
-        else:
-            newData = myData
-            visit = myData
-
-        #  VARS A1 var1="visit=887136081 raft=2,2 sensor=0,1"
-        #  VARS A1 var2="visit-887136081:raft-2_2:sensor-0_1"
-        outObj.write("VARS A" + str(count) + " var1=\"" + myData + "\" \n")
-        outObj.write("VARS A" + str(count) + " var2=\"" + newData + "\" \n")
-        outObj.write("VARS A" + str(count) + " visit=\"" + visit + "\" \n")
-        outObj.write("VARS A" + str(count) + " runid=\"" + runid + "\" \n")
-        outObj.write("VARS A" + str(count) + " workerid=\"" + str(count) + "\" \n")
+    count = firstWorkerId - 1
+    batchIter = dataIds.batches(idsPerJob, localityKeys, order)
+    while True:
+        batches = list(itertools.islice(batchIter, max(1, 65536//idsPerJob)))
+        if not batches:
+            break
+        # extended input like visit=887136081 raft=2,2 sensor=0,1, or
+        # something simple like a skytile id
+        var1s, var2s, visits = dataIdParser.formatMany([dataIds[i] for batch in batches for i in batch])
+        start = 0
+        for batch in batches:
+            count += 1
+            end = start + len(batch)
+            myData = separator.join(var1s[start:end])
+            newData = var2s[start]
+            if len(batch) > 1:
+                newData += "+%d" % (len(batch) - 1)
+            visit = visits[start]
+            start = end
+            #  VARS A1 var1="visit=887136081 raft=2,2 sensor=0,1"
+            #  VARS A1 var2="visit-887136081:raft-2_2:sensor-0_1"
+            outObj.write("VARS A" + str(count) + " var1=\"" + myData + "\" \n")
+            outObj.write("VARS A" + str(count) + " var2=\"" + newData + "\" \n")
+            outObj.write("VARS A" + str(count) + " visit=\"" + visit + "\" \n")
+            outObj.write("VARS A" + str(count) + " runid=\"" + runid + "\" \n")
+            outObj.write("VARS A" + str(count) + " workerid=\"" + str(count) + "\" \n")
+
+            # CATEGORY A1 worker
+            # PRIORITY A1 10
+            category = groupCategories.get(visit, "worker")
+            if categoryMaxJobs:
+                outObj.write("CATEGORY A" + str(count) + " " + categoryName(category) + "\n")
+            priority = groupPriorities.get(visit, categoryPriorities.get(category))
+            if priority:
+                outObj.write("PRIORITY A" + str(count) + " " + str(priority) + "\n")
 
     print("Third Input File loop ")
 
-    fileObj = open(infile, "r")
-    count = 0
-    for aline in fileObj:
+    count = firstWorkerId - 1
+    for job in range(numJobs):
         count += 1
         # PARENT A CHILD A1
         # PARENT A1 CHILD B
         outObj.write("PARENT A CHILD A" + str(count) + " \n")
         outObj.write("PARENT A" + str(count) + " CHILD B \n")
 
+    # MAXJOBS worker 100
+    for category in sorted(categoryMaxJobs):
+        outObj.write("MAXJOBS " + categoryName(category) + " " + str(categoryMaxJobs[category]) + "\n")
+
     outObj.close()
 
 
@@ -161,6 +289,12 @@ def main():
     print('Created parser')
     ns = parser.parse_args()
     print('Parsed Arguments')
+    if ns.idsPerJob < 1:
+        parser.error("--idsPerJob must be at least 1")
+    groupCategories = parsePairs(parser, "--groupCategory", ns.groupCategories)
+    categoryMaxJobs = parsePairs(parser, "--categoryMaxJobs", ns.categoryMaxJobs, int)
+    categoryPriorities = parsePairs(parser, "--categoryPriority", ns.categoryPriorities, int)
+    groupPriorities = parsePairs(parser, "--groupPriority", ns.groupPriorities, int)
     print(ns)
 
     # SA
@@ -176,7 +310,39 @@ def main():
     #   processCcdLsstSim
     pipeline = "S2012Pipe"
 
-    writeDagFile(pipeline, ns.template, ns.source, ns.workerdir, ns.prescript, ns.runid, ns.idsPerJob)
+    outname = ns.output
+    if outname is None:
+        outname = pipeline + ".diamond.dag"
+
+    index = None
+    firstWorkerId = 1
+    if ns.incremental:
+        # the index of the ids scheduled by earlier DAGs in this directory
+        indexFile = pipeline + ".ids.index"
+        index = DataIdIndex.load(indexFile)
+    localityKeys = [key for key in ns.locality.split(",") if key]
+    exclude = index
+    if ns.ledger is not None:
+        # ids the workers of the run have completed
+        exclude = CompletionLedger(ns.ledger).completed()
+        print("%d ids already completed" % len(exclude))
+        if index is not None:
+            exclude.update(index)
+    dataIds = readDataIds(ns.source, exclude, ns.groupKey, localityKeys)
+    if ns.incremental:
+        print("%d new ids, %d already scheduled" % (len(dataIds), len(index)))
+        if len(dataIds) == 0:
+            sys.exit(0)
+        firstWorkerId = len(index) + 1
+
+    writeDagFile(pipeline, ns.template, dataIds, ns.workerdir, ns.prescript, ns.runid, ns.idsPerJob,
+                 outname, firstWorkerId, ns.groupKey, localityKeys, groupCategories, categoryMaxJobs,
+                 categoryPriorities, groupPriorities, ns.categoryPrefix)
+    makeLogDirs(dataIds, ns.groupKey)
+
+    if ns.incremental:
+        index.update(dataIds.hashes())
+        index.save(indexFile)
 
     sys.exit(0)
 
@@ -40,7 +40,9 @@ echo $2 >> logs/debuglog
 echo hello3 >> logs/debuglog
 echo $3 >> logs/debuglog
 
-visit_raft_sensor=$1" "$2" "$3 
+# a job given a batch of ids gets them all, as visit=... raft=... sensor=... --id visit=... ...
+visit_raft_sensor="$*"
+first_visit_raft_sensor=$1" "$2" "$3
 
 echo full >> logs/debuglog
 echo $visit_raft_sensor >> logs/debuglog
@@ -189,14 +191,16 @@ date
 # --output /scratch/00342/ux453102/datarel-runs/w2012prod_im0138/output
 # --id visit=888382340 raft=2,1 sensor=0,2 > logs/W2012Pipe-${visit}.log 2>&1
 
-modstring=`echo ${visit_raft_sensor} | sed -e 's/ /:/g' -e 's/=/-/g' -e 's/,/_/g'`
+# a batch of ids is run in parallel on the cores of the slot; HTCondor sets
+# OMP_NUM_THREADS to the request_cpus of the job
+modstring=`echo ${first_visit_raft_sensor} | sed -e 's/ /:/g' -e 's/=/-/g' -e 's/,/_/g'`
 
 echo visit_raft_sensor
 echo ${visit_raft_sensor}
 echo modstring
 echo $modstring
 
-$PIPE_TASKS_DIR/bin/processCcdLsstSim.py lsstSim ${rundir}/output --output ${rundir}/output --id ${visit_raft_sensor}  > logs/W2012Pipe-${modstring}.log 2>&1
+$PIPE_TASKS_DIR/bin/processCcdLsstSim.py lsstSim ${rundir}/output --output ${rundir}/output -j ${OMP_NUM_THREADS:-1} --id ${visit_raft_sensor}  > logs/W2012Pipe-${modstring}.log 2>&1
 
 echo "===================== After W2012Pipe "
 date
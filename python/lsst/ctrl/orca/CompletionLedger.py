@@ -0,0 +1,134 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import socket
+import struct
+import time
+
+from lsst.ctrl.orca.DataIdIndex import DataIdIndex, hashDataId
+
+# a record: the data id hash, its exit code and the seconds it took
+_RECORD = struct.Struct("<QiI")
+
+
+class CompletionLedger:
+    """An append-only record of the data ids jobs have finished
+
+    Parameters
+    ----------
+    path : `str`
+        the ledger directory, normally in the run directory, so that every
+        job of the run shares it
+    syncEvery : `int`, optional
+        write and fsync the records once this many are waiting
+    syncInterval : `float`, optional
+        write and fsync the waiting records once the oldest is this many
+        seconds old
+
+    Notes
+    -----
+    Each writer appends fixed-width 16-byte records (the 64-bit hash of the
+    data id, see `hashDataId`, its exit code and how many seconds it took) to
+    a file of its own in the directory, so that jobs on different hosts never
+    write to the same file, which shared filesystems don't make safe.
+    Records are fsync'ed in batches; a record lost with its job only means
+    its id runs again.  A partial record at the end of a file, left by a
+    writer that died, is ignored.
+    """
+
+    def __init__(self, path, syncEvery=64, syncInterval=5.0):
+        self.path = path
+        self.syncEvery = syncEvery
+        self.syncInterval = syncInterval
+        self._fileObj = None
+        self._waiting = []
+        self._oldest = None
+
+    def record(self, dataId, returncode, elapsed):
+        """Record that a data id has finished
+
+        Parameters
+        ----------
+        dataId : `str`
+            the data id
+        returncode : `int`
+            its exit code; 0 means it's complete
+        elapsed : `float`
+            seconds it took
+        """
+        now = time.time()
+        if not self._waiting:
+            self._oldest = now
+        # the clock may have been stepped back while the id ran
+        elapsed = max(0, min(int(elapsed), 0xffffffff))
+        self._waiting.append(_RECORD.pack(hashDataId(dataId), returncode, elapsed))
+        if len(self._waiting) >= self.syncEvery or now - self._oldest >= self.syncInterval:
+            self.flush()
+
+    def flush(self):
+        """Write the waiting records, and fsync them
+        """
+        if not self._waiting:
+            return
+        if self._fileObj is None:
+            os.makedirs(self.path, exist_ok=True)
+            name = "%s-%d-%d.ledger" % (socket.gethostname(), os.getpid(), int(time.time()*1000))
+            self._fileObj = open(os.path.join(self.path, name), "ab")
+        self._fileObj.write(b"".join(self._waiting))
+        self._fileObj.flush()
+        os.fsync(self._fileObj.fileno())
+        self._waiting = []
+
+    def close(self):
+        """Write the waiting records, and close the ledger file
+        """
+        self.flush()
+        if self._fileObj is not None:
+            self._fileObj.close()
+            self._fileObj = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def completed(self):
+        """Read the data ids which have completed, according to every writer
+
+        Returns
+        -------
+        index : `DataIdIndex`
+            the hashes of the data ids which finished with exit code 0
+        """
+        hashes = []
+        if os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                if not entry.name.endswith(".ledger"):
+                    continue
+                with open(entry.path, "rb") as fileObj:
+                    data = fileObj.read()
+                data = data[:len(data) - len(data) % _RECORD.size]
+                hashes.extend(value for value, returncode, elapsed in _RECORD.iter_unpack(data)
+                              if returncode == 0)
+        return DataIdIndex(hashes)
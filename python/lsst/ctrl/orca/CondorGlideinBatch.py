@@ -0,0 +1,110 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+
+import lsst.log as log
+
+from lsst.ctrl.orca.CondorJobs import CondorJobs
+
+
+class CondorGlideinBatch:
+    """Requests glideins by submitting a glidein submit file to HTCondor
+
+    Parameters
+    ----------
+    glideinFile : `str`
+        the rendered glidein submit file; each submission is one request
+
+    Notes
+    -----
+    This is the batch system a `GlideinManager` scales; the requests it made
+    are the jobs it submitted which are still in the queue.  Each request is
+    tagged with the glidein file, so a batch created for a resumed run takes
+    over the requests made before the restart, rather than leaving them in
+    the queue.
+    """
+
+    # the job ad attribute a request is tagged with the glidein file in
+    tagAttribute = "OrcaGlideinFile"
+
+    def __init__(self, glideinFile):
+        self.glideinFile = glideinFile
+        self._jobs = CondorJobs()
+
+        # the requests of this glidein file, whichever directory the run is resumed from
+        self._tag = {self.tagAttribute: os.path.abspath(glideinFile)}
+
+        # job ids of the requests, oldest first
+        self._requests = self._jobs.findClusters(self.tagAttribute, self._tag[self.tagAttribute])
+
+    def _refresh(self):
+        """Forget the requests which have left the queue
+
+        Returns
+        -------
+        statuses : `dict`
+            the JobStatus of each request in the queue, by job id
+        """
+        statuses = self._jobs.getClusterStatuses(self._requests)
+        self._requests = [cid for cid in self._requests if cid in statuses]
+        return statuses
+
+    def count(self):
+        """
+        Returns
+        -------
+        count : `int`
+            the number of glidein requests in the queue, pending or active
+        """
+        self._refresh()
+        return len(self._requests)
+
+    def submit(self, count):
+        """Request more glideins
+
+        Parameters
+        ----------
+        count : `int`
+            the number of requests to submit
+        """
+        for i in range(count):
+            cid = self._jobs.submitJob(self.glideinFile, self._tag)
+            if cid is None:
+                log.warn("CondorGlideinBatch: couldn't submit glidein request %s" % self.glideinFile)
+                return
+            self._requests.append(cid)
+
+    def retire(self, count):
+        """Cancel glidein requests, those still waiting in the queue first, newest first
+
+        Parameters
+        ----------
+        count : `int`
+            the number of requests to cancel
+        """
+        statuses = self._refresh()
+        # pending (idle or held) requests cost nothing to cancel
+        order = sorted(reversed(self._requests), key=lambda cid: statuses.get(cid) == 2)
+        for cid in order[:count]:
+            self._jobs.killCondorId(cid)
+            self._requests.remove(cid)
@@ -23,10 +23,15 @@
 #
 
 import os
+import shlex
 import subprocess
 import re
 import time
 import lsst.log as log
+from lsst.ctrl.orca.exceptions import CondorQueryError
+
+# the last line DAGMan writes to its debugging log
+_DAGMAN_EXIT = re.compile(r"EXITING WITH STATUS (\d+)")
 
 
 class CondorJobs:
@@ -35,17 +40,26 @@ class CondorJobs:
     condor_submit and condor_q
     """
 
+    # the job ad attributes DAGMan publishes the node counts of a DAG in, by state
+    dagNodeAttributes = [("total", "DAG_NodesTotal"), ("done", "DAG_NodesDone"),
+                         ("failed", "DAG_NodesFailed"), ("queued", "DAG_NodesQueued"),
+                         ("ready", "DAG_NodesReady"), ("pre", "DAG_NodesPrerun"),
+                         ("post", "DAG_NodesPostrun"), ("unready", "DAG_NodesUnready")]
+
     def __init__(self):
         log.debug("CondorJobs:__init__")
         return
 
-    def submitJob(self, condorFile):
+    def submitJob(self, condorFile, attributes=None):
         """Submit a condor file, and return the job number associated with it.
 
         Parameters
         ----------
         condorFile: `str`
             condor submit file.
+        attributes: `dict`, optional
+            string job ad attributes to add to the job, by name, so that it
+            can be found again with `findClusters`
 
         Notes
         -----
@@ -58,12 +72,15 @@ class CondorJobs:
         clusterexp = re.compile(r"1 job\(s\) submitted to cluster (\d+).")
 
         submitRequest = "condor_submit %s" % condorFile
+        if attributes:
+            for name, value in sorted(attributes.items()):
+                submitRequest += " -append %s" % shlex.quote('+%s = "%s"' % (name, value))
 
         pop = os.popen(submitRequest, "r")
 
         line = pop.readline()
         line = pop.readline()
-        line = line.decode()
+        pop.close()
         num = clusterexp.findall(line)
         if len(num) == 0:
             return None
@@ -185,13 +202,18 @@ class CondorJobs:
             pop.close()
             time.sleep(1)
 
-    def condorSubmitDag(self, filename):
+    def condorSubmitDag(self, filename, options=None, cwd=None):
         """Submit a condor dag and return its cluster number
 
         Parameters
         ----------
         filename : `str`
             name of condor DAG file
+        options : `list` of `str`, optional
+            additional command line options for condor_submit_dag
+        cwd : `str`, optional
+            directory to submit the DAG from, which its relative paths are
+            relative to; the current directory if not given
         """
         log.debug("CondorJobs: condorSubmitDag %s", filename)
         # Just a note about why this was done this way...
@@ -204,9 +226,12 @@ class CondorJobs:
         # future, we just try and match every line of output with "1 jobs(s) submitted"
         # and if we find, it, we grab the cluster id out of that line.
         clusterexp = re.compile(r"1 job\(s\) submitted to cluster (\d+).")
-        cmd = "condor_submit_dag %s" % filename
-        log.debug(cmd)
-        process = subprocess.Popen(cmd.split(), shell=False, stdout=subprocess.PIPE)
+        cmd = ["condor_submit_dag"]
+        if options is not None:
+            cmd.extend(options)
+        cmd.append(filename)
+        log.debug(" ".join(cmd))
+        process = subprocess.Popen(cmd, shell=False, stdout=subprocess.PIPE, cwd=cwd)
         output = []
         line = process.stdout.readline()
         line = line.decode()
@@ -247,6 +272,158 @@ class CondorJobs:
         # read the rest (if any) and terminate
         stdoutdata, stderrdata = process.communicate()
 
+    def getDagNodeCounts(self, cid):
+        """Retrieve the node counts DAGMan reports for a running DAG
+
+        Parameters
+        ----------
+        cid : `str`
+            condor job id of the DAGMan job
+
+        Returns
+        -------
+        counts : `dict`
+            number of DAG nodes in each state ("total", "done", "failed", "queued",
+            "ready", "pre", "post" and "unready"), or None if the DAGMan job is no
+            longer in the queue.
+
+        Raises
+        ------
+        `CondorQueryError`
+            if condor_q fails, or its reply can't be read; the DAGMan job may
+            still be in the queue
+
+        Notes
+        -----
+        DAGMan only updates these attributes periodically, so the counts
+        may lag behind the actual state of the nodes.  States that have
+        not been published yet are reported as 0.
+        """
+        cmd = ["condor_q", str(cid), "-af"] + [attribute for state, attribute in self.dagNodeAttributes]
+        process = subprocess.Popen(cmd, shell=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdoutdata, stderrdata = process.communicate()
+        if process.returncode != 0:
+            raise CondorQueryError("condor_q failed with status %d: %s" %
+                                   (process.returncode, stderrdata.decode(errors="replace").strip()))
+        values = stdoutdata.decode().split()
+        if not values:
+            return None
+        if len(values) != len(self.dagNodeAttributes):
+            raise CondorQueryError("condor_q replied %r for the node counts of %s" %
+                                   (stdoutdata.decode(errors="replace"), cid))
+        counts = {}
+        for (state, attribute), value in zip(self.dagNodeAttributes, values):
+            counts[state] = int(value) if value.isdigit() else 0
+        return counts
+
+    def getDagExitStatus(self, cid, dagFile=None):
+        """Find out how a DAGMan job which has left the queue ended
+
+        Parameters
+        ----------
+        cid : `str`
+            condor job id of the DAGMan job
+        dagFile : `str`, optional
+            the DAG file the job ran; its <dag file>.dagman.out is read first
+
+        Returns
+        -------
+        status : `int`
+            the exit status of DAGMan, 0 if all the nodes of the DAG
+            succeeded, or None if it can't be found out
+
+        Notes
+        -----
+        DAGMan's debugging log ends with the status it exits with; a DAG may
+        be resubmitted from a rescue DAG, so the last one is taken.  Without
+        the log, the ExitCode of the job in the history is used.
+        """
+        if dagFile is not None and os.path.exists(dagFile + ".dagman.out"):
+            status = None
+            with open(dagFile + ".dagman.out", "r", errors="replace") as fileObj:
+                for line in fileObj:
+                    match = _DAGMAN_EXIT.search(line)
+                    if match:
+                        status = int(match.group(1))
+            if status is not None:
+                return status
+        cmd = ["condor_history", "-limit", "1", str(cid), "-af", "ExitCode"]
+        try:
+            process = subprocess.Popen(cmd, shell=False, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError:
+            return None
+        stdoutdata, stderrdata = process.communicate()
+        value = stdoutdata.decode().strip()
+        if process.returncode != 0 or not value.isdigit():
+            return None
+        return int(value)
+
+    def getDagJobCounts(self, cid):
+        """Count the jobs a running DAG has in the queue, by state
+
+        Parameters
+        ----------
+        cid : `str`
+            condor job id of the DAGMan job
+
+        Returns
+        -------
+        counts : `dict`
+            number of "idle", "running" and "held" jobs of the DAG
+        """
+        cmd = ["condor_q", "-constraint", "DAGManJobId == %s" % str(cid), "-af", "JobStatus"]
+        process = subprocess.Popen(cmd, shell=False, stdout=subprocess.PIPE)
+        stdoutdata, stderrdata = process.communicate()
+        statuses = stdoutdata.decode().split()
+        return {"idle": statuses.count("1"), "running": statuses.count("2"), "held": statuses.count("5")}
+
+    def getClusterStatuses(self, cids):
+        """Retrieve the state of HTCondor jobs
+
+        Parameters
+        ----------
+        cids : `list` of `str`
+            condor job (cluster) ids
+
+        Returns
+        -------
+        statuses : `dict`
+            the JobStatus (1 idle, 2 running, 5 held, ...) of each of the jobs
+            still in the queue, by job id
+        """
+        if not cids:
+            return {}
+        cmd = ["condor_q"] + [str(cid) for cid in cids] + ["-af", "ClusterId", "JobStatus"]
+        process = subprocess.Popen(cmd, shell=False, stdout=subprocess.PIPE)
+        stdoutdata, stderrdata = process.communicate()
+        statuses = {}
+        for line in stdoutdata.decode().splitlines():
+            values = line.split()
+            if len(values) == 2 and values[1].isdigit():
+                statuses[values[0]] = int(values[1])
+        return statuses
+
+    def findClusters(self, name, value):
+        """Find the HTCondor jobs in the queue with a job ad attribute set to a string
+
+        Parameters
+        ----------
+        name : `str`
+            the name of the attribute, as given to `submitJob`
+        value : `str`
+            the value of the attribute
+
+        Returns
+        -------
+        cids : `list` of `str`
+            the condor job (cluster) ids of the jobs, oldest first
+        """
+        cmd = ["condor_q", "-constraint", '%s == "%s"' % (name, value), "-af", "ClusterId"]
+        process = subprocess.Popen(cmd, shell=False, stdout=subprocess.PIPE)
+        stdoutdata, stderrdata = process.communicate()
+        cids = set(cid for cid in stdoutdata.decode().split() if cid.isdigit())
+        return sorted(cids, key=int)
+
     def isJobAlive(self, cid):
         """Check to see if the job with id "cid" is still alive
 
@@ -20,18 +20,20 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-import stat
-import sys
+import subprocess
 import os
 import os.path
 import getpass
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 import lsst.log as log
 
+import lsst.ctrl.orca as orca
 from lsst.ctrl.orca.EnvString import EnvString
+from lsst.ctrl.orca.exceptions import ConfigurationError
 from lsst.ctrl.orca.WorkflowConfigurator import WorkflowConfigurator
 from lsst.ctrl.orca.CondorWorkflowLauncher import CondorWorkflowLauncher
-from lsst.ctrl.orca.TemplateWriter import TemplateWriter
 
 ##
 #
@@ -98,6 +100,9 @@ class CondorWorkflowConfigurator(WorkflowConfigurator):
         # default root for the production
         self.defaultRoot = wfConfig.platform.dir.defaultRoot
 
+        # cache the staged files are shared through
+        self.stagingCache = None
+
     def configure(self, provSetup, wfVerbosity):
         """Setup as much as possible in preparation to execute the workflow
            and return a WorkflowLauncher object that will launch the
@@ -125,151 +130,594 @@ class CondorWorkflowConfigurator(WorkflowConfigurator):
         localConfig = wfConfig.configuration["condor"]
 
         # local scratch directory
-        self.localScratch = localConfig.condorData.localScratch
+        self.localScratch = self.getLocalScratch(localConfig.condorData.localScratch)
 
         # platformConfig = wfConfig.platform
         taskConfigs = wfConfig.task
 
         # local staging directory
         self.localStagingDir = os.path.join(self.localScratch, self.runid)
-        os.makedirs(self.localStagingDir)
 
-        # write the glidein file
-        startDir = os.getcwd()
-        os.chdir(self.localStagingDir)
+        if orca.rerun:
+            return self._configureRerun(wfConfig)
+
+        taskNames = self.orderTasks(taskConfigs)
+        spliced = len(taskNames) > 1
+        if spliced:
+            self.checkSpliceNames(taskNames)
+
+        # an incremental run which was already staged is topped up with a DAG of just the new ids
+        topUp = False
+        if os.path.exists(self.localStagingDir):
+            for taskName in taskConfigs:
+                topUp = taskConfigs[taskName].generator["dag"].incremental
+            if not topUp:
+                raise ConfigurationError("%s already exists: use a new runid, or rerun the failed nodes of "
+                                         "this run with --rerun" % self.localStagingDir)
+            if spliced:
+                raise ConfigurationError("%s already exists: incremental runs are only supported for "
+                                         "workflows of one task" % self.localStagingDir)
+            log.info("topping up %s with the new ids in its input" % self.runid)
+        else:
+            os.makedirs(self.localStagingDir)
+        self.stagingCache = self.createStagingCache(localConfig.condorData)
 
-        if localConfig.glidein.template.inputFile is not None:
+        # write the glidein file
+        if topUp:
+            log.debug("CondorWorkflowConfigurator: glidein file already written")
+        elif localConfig.glidein.template.inputFile is not None:
             self.writeGlideinFile(localConfig.glidein)
         else:
             log.debug("CondorWorkflowConfigurator: not writing glidein file")
-        os.chdir(startDir)
 
-        # TODO - fix this loop for multiple condor submits; still working
-        # out what this might mean.
-        for taskName in taskConfigs:
-            task = taskConfigs[taskName]
+        if spliced:
+            # each task is staged in a directory of its own, all at once, and their DAGs are spliced
+            # into the DAG of the workflow
+            def stageTask(taskName):
+                return self.stageTask(taskConfigs[taskName], os.path.join(self.localStagingDir, taskName),
+                                      topUp, self.getCategoryPrefix(taskName))
+            with ThreadPoolExecutor(max_workers=len(taskNames)) as executor:
+                taskDagFiles = list(executor.map(stageTask, taskNames))
+            dagFile = self.writeSpliceDag(taskConfigs, taskNames, taskDagFiles)
+            submitOptions = self.getSpliceSubmitOptions([taskConfigs[taskName] for taskName in taskNames])
+        else:
+            task = taskConfigs[taskNames[0]]
+            dagFile = self.stageTask(task, self.localStagingDir, topUp)
+            submitOptions = self.getSubmitOptions(task)
+
+        self.cleanStagingCache(localConfig.condorData)
+
+        # create the Launcher
+
+        workflowLauncher = CondorWorkflowLauncher(self.prodConfig, self.wfConfig, self.runid,
+                                                  self.localStagingDir,
+                                                  dagFile,
+                                                  wfConfig.monitor,
+                                                  submitOptions)
+        return workflowLauncher
+
+    def createResumeLauncher(self, launch):
+        """Rebuild the launcher of a workflow that was launched by another orca process
 
-            # script directory
-            self.scriptDir = task.scriptDir
+        Parameters
+        ----------
+        launch : `dict`
+            the launch record in the run journal
+
+        Returns
+        -------
+        launcher : `CondorWorkflowLauncher`
+            the launcher of the DAG that was submitted, or None if the
+            journal predates DAG files being recorded in it
+        """
+        log.debug("CondorWorkflowConfigurator:createResumeLauncher")
+        if launch.get("dagFile") is None:
+            return None
+        localConfig = self.wfConfig.configuration["condor"]
+        self.localScratch = self.getLocalScratch(localConfig.condorData.localScratch)
+        self.localStagingDir = os.path.join(self.localScratch, self.runid)
+        return CondorWorkflowLauncher(self.prodConfig, self.wfConfig, self.runid, self.localStagingDir,
+                                      launch["dagFile"], self.wfConfig.monitor)
 
-            # save initial directory we were called from so we can get back
-            # to it
-            startDir = os.getcwd()
+    def orderTasks(self, taskConfigs):
+        """Order the tasks of the workflow so each comes after those it has to run after
 
-            # switch to staging directory
-            os.chdir(self.localStagingDir)
+        Parameters
+        ----------
+        taskConfigs : Config
+            the task configs of the workflow, by name
+
+        Returns
+        -------
+        taskNames : `list` of `str`
+            the names of the tasks; those no task has to run after keep the
+            order of the config
+
+        Raises
+        ------
+        ConfigurationError
+            if a task has to run after a task the workflow doesn't have, or
+            the tasks have to run after each other in a cycle
+        """
+        taskNames = list(taskConfigs)
+        for taskName in taskNames:
+            for before in taskConfigs[taskName].after:
+                if before not in taskConfigs:
+                    raise ConfigurationError("task %s runs after %s, which isn't a task of workflow %s" %
+                                             (taskName, before, self.wfName))
+        ordered = []
+        while len(ordered) < len(taskNames):
+            ready = [taskName for taskName in taskNames if taskName not in ordered and
+                     all(before in ordered for before in taskConfigs[taskName].after)]
+            if not ready:
+                cycle = [taskName for taskName in taskNames if taskName not in ordered]
+                raise ConfigurationError("the tasks %s of workflow %s run after each other in a cycle" %
+                                         (", ".join(cycle), self.wfName))
+            ordered.extend(ready)
+        return ordered
+
+    # the names DAGMan accepts for a splice, which is also the task's staging directory
+    spliceNameExp = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+    def checkSpliceNames(self, taskNames):
+        """Check that the tasks of the workflow can name the splices of their DAGs
 
-            # switch to tasks directory in staging directory
-            taskOutputDir = os.path.join(self.localStagingDir, task.scriptDir)
+        Parameters
+        ----------
+        taskNames : `list` of `str`
+            the names of the tasks
+
+        Raises
+        ------
+        ConfigurationError
+            if a name has characters other than letters, digits, "_", "." and
+            "-", or starts with "." or "-"; DAGMan joins the names of splices
+            and their nodes with "+", and a name is also a directory
+        """
+        for taskName in taskNames:
+            if not self.spliceNameExp.match(taskName):
+                raise ConfigurationError("task %r of workflow %s can't name a splice: use letters, digits, "
+                                         "'_', '.' and '-'" % (taskName, self.wfName))
+
+    def getCategoryPrefix(self, taskName):
+        """Accessor to the prefix of the node categories of a task's DAG, in a workflow of several tasks
+
+        Parameters
+        ----------
+        taskName : `str`
+            the name of the task
+
+        Returns
+        -------
+        prefix : `str`
+            "<task name>_"
+
+        Notes
+        -----
+        Categories of the same name in the DAGs spliced into one would
+        otherwise share a MAXJOBS throttle; a category starting with "+" is
+        meant to be shared, and isn't prefixed.
+        """
+        return "%s_" % taskName
+
+    def stageTask(self, task, stagingDir, topUp=False, categoryPrefix=None):
+        """Write the scripts of a task and generate its DAG
+
+        Parameters
+        ----------
+        task : Config
+            task config object
+        stagingDir : str
+            the directory to stage the task in: the staging directory of the
+            workflow, or for a workflow of several tasks, the task's own
+            directory in it
+        topUp : bool, optional
+            whether the task was staged already, and only a DAG of the new ids
+            in its input is to be generated
+        categoryPrefix : str, optional
+            prefix of the names of the task's node categories
+
+        Returns
+        -------
+        dagFile : str
+            name of the DAG file, in the staging directory of the task
+
+        Raises
+        ------
+        ConfigurationError
+            if the DAG generator fails, or there are no ids to schedule
+
+        Notes
+        -----
+        The tasks of a workflow may be staged at once, from several threads.
+        """
+        # tasks directory in staging directory
+        taskOutputDir = os.path.join(stagingDir, task.scriptDir)
+        if not topUp:
             os.makedirs(taskOutputDir)
-            os.chdir(taskOutputDir)
-
-            # generate pre job
-            preJobScript = EnvString.resolve(task.preJob.script.outputFile)
-            preJobScriptInputFile = EnvString.resolve(task.preJob.script.inputFile)
-            keywords = task.preJob.script.keywords
-            self.writeJobScript(preJobScript, preJobScriptInputFile, keywords)
-
-            preJobCondorOutputFile = EnvString.resolve(task.preJob.condor.outputFile)
-            preJobCondorInputFile = EnvString.resolve(task.preJob.condor.inputFile)
-            keywords = task.preJob.condor.keywords
-            self.writeJobScript(preJobCondorOutputFile, preJobCondorInputFile, keywords, preJobScript)
-
-            # generate post job
-            postJobScript = EnvString.resolve(task.postJob.script.outputFile)
-            postJobScriptInputFile = EnvString.resolve(task.postJob.script.inputFile)
-            keywords = task.postJob.script.keywords
-            self.writeJobScript(postJobScript, postJobScriptInputFile, keywords)
-
-            postJobCondorOutputFile = EnvString.resolve(task.postJob.condor.outputFile)
-            postJobCondorInputFile = EnvString.resolve(task.postJob.condor.inputFile)
-            keywords = task.postJob.condor.keywords
-            self.writeJobScript(postJobCondorOutputFile, postJobCondorInputFile, keywords, postJobScript)
-
-            # generate worker job
-            workerJobScript = EnvString.resolve(task.workerJob.script.outputFile)
-            workerJobScriptInputFile = EnvString.resolve(task.workerJob.script.inputFile)
-            keywords = task.workerJob.script.keywords
-            self.writeJobScript(workerJobScript, workerJobScriptInputFile, keywords)
-
-            workerJobCondorOutputFile = EnvString.resolve(task.workerJob.condor.outputFile)
-            workerJobCondorInputFile = EnvString.resolve(task.workerJob.condor.inputFile)
-            keywords = task.workerJob.condor.keywords
-            self.writeJobScript(workerJobCondorOutputFile,
-                                workerJobCondorInputFile, keywords, workerJobScript)
-
-            # switch to staging directory
-            os.chdir(self.localStagingDir)
-
-            # generate pre script
-            log.debug("CondorWorkflowConfigurator:configure: generate pre script")
-
-            if task.preScript.script.outputFile is not None:
-                preScriptOutputFile = EnvString.resolve(task.preScript.script.outputFile)
-                preScriptInputFile = EnvString.resolve(task.preScript.script.inputFile)
-                keywords = task.preScript.script.keywords
-                self.writePreScript(preScriptOutputFile, preScriptInputFile, keywords)
-                os.chmod(task.preScript.outputFile, stat.S_IRWXU | stat.S_IRGRP |
-                         stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
-
-            # generate dag
-            log.debug("CondorWorkflowConfigurator:configure: generate dag")
-
-            task.generator.name = "dag"
-            generatorConfig = task.generator.active
-            dagGenerator = EnvString.resolve(generatorConfig.script)
-            dagGeneratorInput = EnvString.resolve(generatorConfig.inputFile)
-            dagCreatorCmd = [dagGenerator, "-s", dagGeneratorInput, "-w", task.scriptDir, "-t",
-                             task.workerJob.condor.outputFile, "-r",
-                             self.runid, "--idsPerJob", str(generatorConfig.idsPerJob)]
-            if task.preScript.script.outputFile is not None:
-                dagCreatorCmd.append("-p")
-                dagCreatorCmd.append(task.preScript.script.outputFile)
-            pid = os.fork()
-            if not pid:
-                # turn off all output from this command
-                sys.stdin.close()
-                sys.stdout.close()
-                sys.stderr.close()
-                os.close(0)
-                os.close(1)
-                os.close(2)
-                os.execvp(dagCreatorCmd[0], dagCreatorCmd)
-            os.wait()[0]
-
-            # create dag logs directories
-            fileObj = open(dagGeneratorInput, 'r')
-            visitSet = set()
-            count = 0
-            # this info from gd:
-            # Searching for a space detects
-            # extended input like :  visit=887136081 raft=2,2 sensor=0,1
-            # No space is something simple like a skytile id
-            for aline in fileObj:
-                count += 1
-                visit = str(count//100)
-                visitSet.add(visit)
-            log.debug("CondorWorkflowConfigurator:configure: about to make logs")
-            logDirName = os.path.join(self.localStagingDir, "logs")
-            log.debug("CondorWorkflowConfigurator:configure: logDirName = %s", logDirName)
-            logDirName = os.path.join(self.localStagingDir, "logs")
-            os.makedirs(logDirName)
-            for visit in visitSet:
-                dirName = os.path.join(logDirName, visit)
-                log.debug("making dir %s ", dirName)
-                os.makedirs(dirName)
-
-            # change back to initial directory
-            os.chdir(startDir)
+            self.writeTaskScripts(task, stagingDir)
+
+        # generate dag, in the staging directory
+        log.debug("CondorWorkflowConfigurator:configure: generate dag")
+
+        generatorConfig = task.generator["dag"]
+        dagFile = self.nextDagFile(generatorConfig.dagName, stagingDir)
+        dagGenerator = EnvString.resolve(generatorConfig.script)
+        dagGeneratorInput = EnvString.resolve(generatorConfig.inputFile)
+        dagCreatorCmd = [dagGenerator, "-s", dagGeneratorInput, "-w", task.scriptDir, "-t",
+                         task.workerJob.condor.outputFile, "-r",
+                         self.runid, "--idsPerJob", str(generatorConfig.idsPerJob), "-o", dagFile]
+        if task.preScript.script.outputFile is not None:
+            dagCreatorCmd.append("-p")
+            dagCreatorCmd.append(task.preScript.script.outputFile)
+        if generatorConfig.groupKey is not None:
+            dagCreatorCmd.extend(["--groupKey", generatorConfig.groupKey])
+        if generatorConfig.localityKeys:
+            dagCreatorCmd.extend(["--locality", ",".join(generatorConfig.localityKeys)])
+        for group, category in task.throttle.groupCategories.items():
+            dagCreatorCmd.extend(["--groupCategory", "%s=%s" % (group, category)])
+        for category, maxJobs in task.throttle.categoryMaxJobs.items():
+            dagCreatorCmd.extend(["--categoryMaxJobs", "%s=%d" % (category, maxJobs)])
+        for category, priority in task.throttle.categoryPriorities.items():
+            dagCreatorCmd.extend(["--categoryPriority", "%s=%d" % (category, priority)])
+        for group, priority in task.throttle.groupPriorities.items():
+            dagCreatorCmd.extend(["--groupPriority", "%s=%d" % (group, priority)])
+        if categoryPrefix is not None:
+            dagCreatorCmd.extend(["--categoryPrefix", categoryPrefix])
+        if generatorConfig.ledger is not None:
+            dagCreatorCmd.extend(["--ledger", EnvString.resolve(generatorConfig.ledger)])
+        if generatorConfig.incremental:
+            dagCreatorCmd.append("--incremental")
+        # the generator reports invalid data ids on stderr
+        result = subprocess.run(dagCreatorCmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, universal_newlines=True, cwd=stagingDir)
+        if result.returncode != 0:
+            raise ConfigurationError("%s failed to write a DAG from %s:\n%s" %
+                                     (dagGenerator, dagGeneratorInput, result.stderr.rstrip()))
+        if not os.path.exists(os.path.join(stagingDir, dagFile)):
+            raise ConfigurationError("no new ids to schedule in %s" % dagGeneratorInput)
+
+        # the generator creates the per visit dag logs directories under this
+        logDirName = os.path.join(stagingDir, "logs")
+        log.debug("CondorWorkflowConfigurator:configure: logDirName = %s", logDirName)
+        os.makedirs(logDirName, exist_ok=True)
+        return dagFile
+
+    def getSpliceDagFile(self):
+        """Accessor to the name of the DAG which splices the DAGs of the tasks of the workflow
+
+        Returns
+        -------
+        dagFile : str
+            "<workflow name>.dag", in the staging directory
+        """
+        return "%s.dag" % self.wfName
 
-        # create the Launcher
+    def writeSpliceDag(self, taskConfigs, taskNames, taskDagFiles):
+        """Write the DAG which runs the DAGs of the tasks of the workflow
+
+        Parameters
+        ----------
+        taskConfigs : Config
+            the task configs of the workflow, by name
+        taskNames : `list` of `str`
+            the names of the tasks, in the order of `orderTasks`
+        taskDagFiles : `list` of `str`
+            the DAG file of each task, in the task's staging directory
+
+        Returns
+        -------
+        dagFile : str
+            name of the DAG file, in the staging directory
+
+        Notes
+        -----
+        Each task's DAG is a splice named after the task, whose nodes run in
+        the task's staging directory; a task that has to run after others is
+        a child of theirs, so none of its nodes start until all of theirs are
+        done.
+        """
+        dagFile = self.getSpliceDagFile()
+        with open(os.path.join(self.localStagingDir, dagFile), "w") as fileObj:
+            for taskName, taskDagFile in zip(taskNames, taskDagFiles):
+                fileObj.write("SPLICE %s %s DIR %s\n" % (taskName, taskDagFile, taskName))
+            for taskName in taskNames:
+                after = taskConfigs[taskName].after
+                if after:
+                    fileObj.write("PARENT %s CHILD %s\n" % (" ".join(after), taskName))
+        return dagFile
+
+    def getSubmitOptions(self, task):
+        """Get the condor_submit_dag options which throttle the DAG of a task
+
+        Parameters
+        ----------
+        task : Config
+            task config object
+
+        Returns
+        -------
+        options : `list` of `str`
+            the -maxjobs and -maxidle options, for the limits that are set
+        """
+        options = []
+        if task.throttle.maxJobs is not None:
+            options.extend(["-maxjobs", str(task.throttle.maxJobs)])
+        if task.throttle.maxIdle is not None:
+            options.extend(["-maxidle", str(task.throttle.maxIdle)])
+        return options
+
+    def getSpliceSubmitOptions(self, tasks):
+        """Get the condor_submit_dag options which throttle the DAG that splices the DAGs of tasks
+
+        Parameters
+        ----------
+        tasks : `list` of Config
+            task config objects
+
+        Returns
+        -------
+        options : `list` of `str`
+            the -maxjobs and -maxidle options; a limit is the sum of the
+            limits of the tasks, and is only set if all the tasks set theirs
+        """
+        options = []
+        maxJobs = [task.throttle.maxJobs for task in tasks]
+        if None not in maxJobs:
+            options.extend(["-maxjobs", str(sum(maxJobs))])
+        maxIdle = [task.throttle.maxIdle for task in tasks]
+        if None not in maxIdle:
+            options.extend(["-maxidle", str(sum(maxIdle))])
+        return options
+
+    def getResourceRequests(self, task, hwConfig):
+        """Get the HTCondor resource requests of the worker jobs of a task
+
+        Parameters
+        ----------
+        task : Config
+            task config object
+        hwConfig : Config
+            hardware config object of the platform
+
+        Returns
+        -------
+        requests : `list` of `str`
+            request_cpus and request_memory submit file commands
+
+        Raises
+        ------
+        ConfigurationError
+            if the jobs need more cores than the nodes of the platform have
 
+        Notes
+        -----
+        Each job asks for task.coresPerJob cores.  Unless task.memoryPerJob
+        sets it, a job asks for its cores' share of the RAM of a node (given
+        in GB): hw.minRamPerNode over hw.maxCoresPerNode for each core, so
+        that jobs filling every core of any node still fit in its memory.
+        """
+        cores = task.coresPerJob
+        if cores < 1:
+            raise ConfigurationError("coresPerJob must be at least 1")
+        if hwConfig.maxCoresPerNode is not None and cores > hwConfig.maxCoresPerNode:
+            raise ConfigurationError("coresPerJob is %d, but the nodes have at most %d cores" %
+                                     (cores, hwConfig.maxCoresPerNode))
+        if hwConfig.minCoresPerNode is not None and cores > hwConfig.minCoresPerNode:
+            log.warn("coresPerJob is %d: jobs won't run on the nodes with %d cores" %
+                     (cores, hwConfig.minCoresPerNode))
+        if cores > task.generator["dag"].idsPerJob:
+            log.warn("coresPerJob is %d, but jobs only run %d ids: some of their cores will be idle" %
+                     (cores, task.generator["dag"].idsPerJob))
+        requests = ["request_cpus = %d" % cores]
+        memory = task.memoryPerJob
+        if memory is None and hwConfig.minRamPerNode is not None and hwConfig.maxCoresPerNode:
+            # request_memory is in MB
+            memory = int(hwConfig.minRamPerNode*1024*cores/hwConfig.maxCoresPerNode)
+        if memory is not None:
+            requests.append("request_memory = %d" % memory)
+        return requests
+
+    def writeTaskScripts(self, task, stagingDir):
+        """Write the job scripts and HTCondor submit files of a task, and its pre script
+
+        Parameters
+        ----------
+        task : Config
+            task config object
+        stagingDir : str
+            the directory the task is staged in
+
+        Notes
+        -----
+        The job scripts and submit files are written to the task's script directory in the staging
+        directory; the pre script is written to the staging directory.
+        """
+        taskOutputDir = os.path.join(stagingDir, task.scriptDir)
+
+        # generate pre job
+        preJobScript = EnvString.resolve(task.preJob.script.outputFile)
+        preJobScriptInputFile = EnvString.resolve(task.preJob.script.inputFile)
+        keywords = task.preJob.script.keywords
+        self.writeJobScript(os.path.join(taskOutputDir, preJobScript), preJobScriptInputFile, keywords)
+
+        preJobCondorOutputFile = EnvString.resolve(task.preJob.condor.outputFile)
+        preJobCondorInputFile = EnvString.resolve(task.preJob.condor.inputFile)
+        keywords = task.preJob.condor.keywords
+        self.writeJobScript(os.path.join(taskOutputDir, preJobCondorOutputFile), preJobCondorInputFile,
+                            keywords, preJobScript, task.scriptDir)
+
+        # generate post job
+        postJobScript = EnvString.resolve(task.postJob.script.outputFile)
+        postJobScriptInputFile = EnvString.resolve(task.postJob.script.inputFile)
+        keywords = task.postJob.script.keywords
+        self.writeJobScript(os.path.join(taskOutputDir, postJobScript), postJobScriptInputFile, keywords)
+
+        postJobCondorOutputFile = EnvString.resolve(task.postJob.condor.outputFile)
+        postJobCondorInputFile = EnvString.resolve(task.postJob.condor.inputFile)
+        keywords = task.postJob.condor.keywords
+        self.writeJobScript(os.path.join(taskOutputDir, postJobCondorOutputFile), postJobCondorInputFile,
+                            keywords, postJobScript, task.scriptDir)
+
+        # generate worker job
+        workerJobScript = EnvString.resolve(task.workerJob.script.outputFile)
+        workerJobScriptInputFile = EnvString.resolve(task.workerJob.script.inputFile)
+        keywords = dict(task.workerJob.script.keywords)
+        keywords["ORCA_CORES_PER_JOB"] = task.coresPerJob
+        self.writeJobScript(os.path.join(taskOutputDir, workerJobScript), workerJobScriptInputFile, keywords)
+
+        workerJobCondorOutputFile = EnvString.resolve(task.workerJob.condor.outputFile)
+        workerJobCondorInputFile = EnvString.resolve(task.workerJob.condor.inputFile)
+        keywords = dict(task.workerJob.condor.keywords)
+        resourceRequests = self.getResourceRequests(task, self.wfConfig.platform.hw)
+        keywords["ORCA_RESOURCE_REQUESTS"] = "\n".join(resourceRequests)
+        self.writeJobScript(os.path.join(taskOutputDir, workerJobCondorOutputFile),
+                            workerJobCondorInputFile, keywords, workerJobScript, task.scriptDir)
+
+        # generate pre script, in the staging directory
+        log.debug("CondorWorkflowConfigurator:configure: generate pre script")
+
+        if task.preScript.script.outputFile is not None:
+            preScriptOutputFile = EnvString.resolve(task.preScript.script.outputFile)
+            preScriptInputFile = EnvString.resolve(task.preScript.script.inputFile)
+            keywords = task.preScript.script.keywords
+            self.writePreScript(os.path.join(stagingDir, preScriptOutputFile), preScriptInputFile, keywords)
+
+    def _configureRerun(self, wfConfig):
+        """Prepare to resubmit the failed and unfinished nodes of a run that was already staged
+
+        Parameters
+        ----------
+        wfConfig : Config
+            workflow config object
+
+        Returns
+        -------
+        launcher : `CondorWorkflowLauncher`
+            launcher which resubmits the workflow's DAG
+
+        Raises
+        ------
+        `ConfigurationError`
+            if the run was never staged, or DAGMan left no rescue DAG for it
+
+        Notes
+        -----
+        No templates are rendered and no DAG is generated.  When the original
+        DAG is resubmitted, DAGMan picks up the most recent rescue DAG next to
+        it, and only runs the nodes that aren't marked as done there.  For a
+        workflow of several tasks, that's the DAG which splices theirs.
+        """
+        log.debug("CondorWorkflowConfigurator:_configureRerun")
+
+        if not os.path.isdir(self.localStagingDir):
+            raise ConfigurationError("can't rerun %s: staging directory %s doesn't exist" %
+                                     (self.runid, self.localStagingDir))
+
+        taskNames = self.orderTasks(wfConfig.task)
+        if len(taskNames) > 1:
+            dagName = self.getSpliceDagFile()
+            candidates = [dagName]
+            submitOptions = self.getSpliceSubmitOptions([wfConfig.task[taskName] for taskName in taskNames])
+        else:
+            task = wfConfig.task[taskNames[0]]
+            dagName = task.generator["dag"].dagName
+            candidates = self.findDagFiles(dagName)
+            submitOptions = self.getSubmitOptions(task)
+
+        # the most recent DAG that DAGMan left a rescue DAG for
+        dagFile = None
+        rescueDags = []
+        for candidate in reversed(candidates):
+            rescueDags = self.findRescueDags(candidate)
+            if rescueDags:
+                dagFile = candidate
+                break
+        if dagFile is None:
+            raise ConfigurationError("can't rerun %s: DAGMan left no rescue DAG for %s in %s" %
+                                     (self.runid, dagName, self.localStagingDir))
+        log.info("rerunning %s from rescue DAG %s" % (self.runid, rescueDags[-1]))
+
+        # the submit file from the first submission is still there; it's
+        # rewritten with the current throttling options
         workflowLauncher = CondorWorkflowLauncher(self.prodConfig, self.wfConfig, self.runid,
-                                                  self.localStagingDir,
-                                                  generatorConfig.dagName + ".diamond.dag",
-                                                  wfConfig.monitor)
+                                                  self.localStagingDir, dagFile, wfConfig.monitor,
+                                                  ["-update_submit"] + submitOptions)
         return workflowLauncher
 
+    def findDagFiles(self, dagName, stagingDir=None):
+        """Find the DAGs generated for a task in the staging directory
+
+        Parameters
+        ----------
+        dagName : `str`
+            the DAG name from the task's generator config
+        stagingDir : `str`, optional
+            the directory the task is staged in; the staging directory of the
+            workflow if not given
+
+        Returns
+        -------
+        dagFiles : `list` of `str`
+            names of the DAG files, in the order they were generated: the
+            first DAG of the run, followed by any DAGs that topped it up.
+        """
+        if stagingDir is None:
+            stagingDir = self.localStagingDir
+        dagFiles = []
+        if os.path.exists(os.path.join(stagingDir, dagName + ".diamond.dag")):
+            dagFiles.append(dagName + ".diamond.dag")
+        deltaExp = re.compile(re.escape(dagName) + r"\.delta(\d+)\.dag$")
+        deltas = []
+        for name in os.listdir(stagingDir):
+            match = deltaExp.match(name)
+            if match:
+                deltas.append((int(match.group(1)), name))
+        return dagFiles + [name for num, name in sorted(deltas)]
+
+    def nextDagFile(self, dagName, stagingDir=None):
+        """Choose the name of the next DAG file to generate for a task
+
+        Parameters
+        ----------
+        dagName : `str`
+            the DAG name from the task's generator config
+        stagingDir : `str`, optional
+            the directory the task is staged in; the staging directory of the
+            workflow if not given
+
+        Returns
+        -------
+        dagFile : `str`
+            "<dagName>.diamond.dag" for the first DAG of a run, and
+            "<dagName>.delta<n>.dag" for the DAGs that top it up.
+        """
+        dagFiles = self.findDagFiles(dagName, stagingDir)
+        if not dagFiles:
+            return dagName + ".diamond.dag"
+        return "%s.delta%d.dag" % (dagName, len(dagFiles))
+
+    def findRescueDags(self, dagFile):
+        """Find the rescue DAGs DAGMan wrote for a DAG in the staging directory
+
+        Parameters
+        ----------
+        dagFile : `str`
+            name of the original DAG file
+
+        Returns
+        -------
+        rescueDags : `list` of `str`
+            names of the rescue DAG files, oldest first
+        """
+        rescueExp = re.compile(re.escape(dagFile) + r"\.rescue(\d+)$")
+        rescueDags = []
+        for name in os.listdir(self.localStagingDir):
+            match = rescueExp.match(name)
+            if match:
+                rescueDags.append((int(match.group(1)), name))
+        return [name for num, name in sorted(rescueDags)]
+
     def writePreScript(self, outputFileName, template, keywords):
         """Write the HTCondor prescript script
 
@@ -288,10 +736,9 @@ class CondorWorkflowConfigurator(WorkflowConfigurator):
             pairs[value] = val
         pairs["ORCA_RUNID"] = self.runid
         pairs["ORCA_DEFAULTROOT"] = self.defaultRoot
-        writer = TemplateWriter()
-        writer.rewrite(template, outputFileName, pairs)
+        self.writeTemplate(template, outputFileName, pairs, executable=True)
 
-    def writeJobScript(self, outputFileName, template, keywords, scriptName=None):
+    def writeJobScript(self, outputFileName, template, keywords, scriptName=None, scriptDir=None):
         """Write the HTCondor script that is used to execute the job
 
         Parameters
@@ -304,17 +751,18 @@ class CondorWorkflowConfigurator(WorkflowConfigurator):
             keyword/value dictionary
         scriptName : str, optional
             name of script to substitute in place of default
+        scriptDir : str, optional
+            the task's script directory, which the script is in
         """
         pairs = {}
         for value in keywords:
             val = keywords[value]
             pairs[value] = val
         if scriptName is not None:
-            pairs["ORCA_SCRIPT"] = self.scriptDir+"/"+scriptName
+            pairs["ORCA_SCRIPT"] = scriptDir+"/"+scriptName
         pairs["ORCA_RUNID"] = self.runid
         pairs["ORCA_DEFAULTROOT"] = self.defaultRoot
-        writer = TemplateWriter()
-        writer.rewrite(template, outputFileName, pairs)
+        self.writeTemplate(template, outputFileName, pairs)
 
     def writeGlideinFile(self, glideinConfig):
         """Write the HTCondor glide-in file
@@ -336,8 +784,7 @@ class CondorWorkflowConfigurator(WorkflowConfigurator):
         if "ORCA_START_OWNER" not in pairs:
             pairs["ORCA_START_OWNER"] = getpass.getuser()
 
-        writer = TemplateWriter()
-        writer.rewrite(inputFile, template.outputFile, pairs)
+        self.writeTemplate(inputFile, os.path.join(self.localStagingDir, template.outputFile), pairs)
 
     def getWorkflowName(self):
         """get the workflow name
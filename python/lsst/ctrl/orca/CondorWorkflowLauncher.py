@@ -22,9 +22,14 @@
 
 import os
 import lsst.log as log
+import lsst.ctrl.orca as orca
 from lsst.ctrl.orca.WorkflowLauncher import WorkflowLauncher
 from lsst.ctrl.orca.CondorJobs import CondorJobs
+from lsst.ctrl.orca.CondorGlideinBatch import CondorGlideinBatch
 from lsst.ctrl.orca.CondorWorkflowMonitor import CondorWorkflowMonitor
+from lsst.ctrl.orca.DagPlan import DagPlan
+from lsst.ctrl.orca.GlideinManager import GlideinManager
+from lsst.ctrl.orca.LogAggregator import LogAggregator
 
 
 class CondorWorkflowLauncher(WorkflowLauncher):
@@ -44,9 +49,12 @@ class CondorWorkflowLauncher(WorkflowLauncher):
         DAGman file
     monitorConfig : Config
         monitor Config
+    submitOptions : `list` of `str`, optional
+        additional command line options for condor_submit_dag
     """
 
-    def __init__(self, prodConfig, wfConfig, runid, localStagingDir, dagFile, monitorConfig):
+    def __init__(self, prodConfig, wfConfig, runid, localStagingDir, dagFile, monitorConfig,
+                 submitOptions=None):
         log.debug("CondorWorkflowLauncher:__init__")
 
         self.prodConfig = prodConfig
@@ -55,12 +63,72 @@ class CondorWorkflowLauncher(WorkflowLauncher):
         self.localStagingDir = localStagingDir
         self.dagFile = dagFile
         self.monitorConfig = monitorConfig
+        self.submitOptions = submitOptions
 
     def cleanUp(self):
         """Perform cleanup after workflow has ended.
         """
         log.debug("CondorWorkflowLauncher:cleanUp")
 
+    def plan(self):
+        """Describe what launching this workflow would run, without launching it
+
+        Returns
+        -------
+        plan : `list` of (`str`, `str`)
+            each item of the plan, and its description
+        """
+        log.debug("CondorWorkflowLauncher:plan")
+
+        dagPlan = DagPlan(os.path.join(self.localStagingDir, self.dagFile))
+        if not dagPlan.splices:
+            task = None
+            for taskName in self.wfConfig.task:
+                task = self.wfConfig.task[taskName]
+            plan = [("staging directory", self.localStagingDir)]
+            return plan + self._planDag(dagPlan, task, self.localStagingDir)
+
+        # a workflow of several tasks: the DAG of each task is spliced in, from its own directory
+        plan = [("staging directory", self.localStagingDir),
+                ("DAG", "%s, %d tasks" % (self.dagFile, len(dagPlan.splices)))]
+        for taskName, spliceFile in dagPlan.splices:
+            for item, description in self._planDag(DagPlan(spliceFile), self.wfConfig.task[taskName],
+                                                   os.path.dirname(spliceFile)):
+                plan.append(("%s: %s" % (taskName, item), description))
+        return plan
+
+    def _planDag(self, dagPlan, task, stagingDir):
+        hw = self.wfConfig.platform.hw
+        slots = None
+        hardware = "unknown: platform.hw isn't set"
+        if hw.nodeCount is not None and hw.maxCoresPerNode is not None:
+            slotsPerNode = hw.maxCoresPerNode // task.coresPerJob
+            slots = hw.nodeCount * slotsPerNode
+            hardware = "%d nodes x %d jobs of %d cores" % (hw.nodeCount, slotsPerNode, task.coresPerJob)
+        estimate = dagPlan.estimate(slots, task.throttle.maxJobs, task.expectedJobTime,
+                                    self.monitorConfig.statusCheckInterval)
+
+        logDir = os.path.join(stagingDir, "logs")
+        logDirs = sum(1 for entry in os.scandir(logDir) if entry.is_dir()) if os.path.isdir(logDir) else 0
+
+        plan = [("DAG", "%s, %d bytes" % (os.path.basename(dagPlan.dagFile), dagPlan.size)),
+                ("DAG nodes", "%d (%d workers)" % (dagPlan.nodes, dagPlan.workerNodes)),
+                ("data ids", "%d" % dagPlan.dataIds),
+                ("log directories", "%d" % logDirs),
+                ("hardware", hardware),
+                ("concurrent jobs", "%d" % estimate["concurrency"])]
+        if estimate["waves"] is not None:
+            plan.append(("waves", "%d" % estimate["waves"]))
+        if estimate["wallTime"] is None:
+            plan.append(("minimum wall time", "unknown: set the task's expectedJobTime"))
+        else:
+            wallTime = estimate["wallTime"]
+            plan.append(("minimum wall time", "%.0f s (%.1f h)" % (wallTime, wallTime / 3600)))
+        if estimate["scheddLoad"] is not None:
+            plan.append(("schedd load", "%d queued jobs x %d polls = %d job ads read" %
+                         (estimate["queued"], estimate["polls"], estimate["scheddLoad"])))
+        return plan
+
     def launch(self, statusListener):
         """Launch this workflow
 
@@ -71,22 +139,90 @@ class CondorWorkflowLauncher(WorkflowLauncher):
         """
         log.debug("CondorWorkflowLauncher:launch")
 
-        # start the monitor
-
-        # Launch process
-        startDir = os.getcwd()
-        os.chdir(self.localStagingDir)
-
+        # Launch process, from the staging directory
         cj = CondorJobs()
-        condorDagId = cj.condorSubmitDag(self.dagFile)
+        condorDagId = cj.condorSubmitDag(self.dagFile, self.submitOptions, cwd=self.localStagingDir)
         log.debug("Condor dag submitted as job %s", condorDagId)
-        os.chdir(startDir)
 
+        return self._startMonitor(statusListener, condorDagId)
+
+    def getResumeState(self):
+        """The items to record in the run journal when this workflow is launched
+
+        Returns
+        -------
+        state : `dict`
+            the DAG file that was submitted
+        """
+        return {"dagFile": self.dagFile}
+
+    def resume(self, statusListener, jobId):
+        """Reattach a monitor to this workflow's DAG after it was submitted by another orca process
+
+        Parameters
+        ----------
+        statusListener : StatusListener
+            status listener object
+        jobId : `str`
+            job id of the DAGMan job
+
+        Returns
+        -------
+        monitor : `CondorWorkflowMonitor`
+            the started monitor, which scales glideins and packs logs as it
+            would have for the process which submitted the DAG
+        """
+        log.debug("CondorWorkflowLauncher:resume")
+        return self._startMonitor(statusListener, jobId)
+
+    def _startMonitor(self, statusListener, condorDagId):
         # workflow monitor for HTCondor jobs
-        self.workflowMonitor = CondorWorkflowMonitor(condorDagId, self.monitorConfig)
+        self.workflowMonitor = CondorWorkflowMonitor(condorDagId, self.monitorConfig,
+                                                     self.wfConfig.shortName,
+                                                     self.createGlideinManager(condorDagId),
+                                                     self.createLogAggregator(),
+                                                     os.path.join(self.localStagingDir, self.dagFile))
 
         if statusListener is not None:
             self.workflowMonitor.addStatusListener(statusListener)
         self.workflowMonitor.startMonitorThread()
 
         return self.workflowMonitor
+
+    def createGlideinManager(self, condorDagId):
+        """Create the manager which requests glideins for the jobs of a DAG, if autoscaling is configured
+
+        Parameters
+        ----------
+        condorDagId : `str`
+            job id of the DAGMan job
+
+        Returns
+        -------
+        manager : `GlideinManager`
+            the glidein manager, or None
+        """
+        glideinConfig = self.wfConfig.configuration["condor"].glidein
+        if not glideinConfig.autoscale or orca.skipglidein:
+            return None
+        glideinFile = os.path.join(self.localStagingDir, glideinConfig.template.outputFile)
+        cj = CondorJobs()
+        return GlideinManager(CondorGlideinBatch(glideinFile), lambda: cj.getDagJobCounts(condorDagId),
+                              glideinConfig)
+
+    def createLogAggregator(self):
+        """Create the log aggregator which packs the worker logs of the DAG while it runs
+
+        Returns
+        -------
+        aggregator : `LogAggregator`
+            the log aggregator, or None if the logs are to be left as they are
+        """
+        if self.monitorConfig.logPackInterval <= 0:
+            return None
+        dagFile = os.path.join(self.localStagingDir, self.dagFile)
+        splices = None
+        if len(self.wfConfig.task) > 1:
+            # the logs of each task are in its own directory
+            splices = DagPlan(dagFile).splices
+        return LogAggregator(self.localStagingDir, dagFiles=[dagFile], splices=splices)
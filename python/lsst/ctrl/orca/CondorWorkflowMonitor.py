@@ -27,6 +27,7 @@ import lsst.log as log
 from lsst.ctrl.orca.WorkflowMonitor import WorkflowMonitor
 from lsst.ctrl.orca.multithreading import SharedData
 from lsst.ctrl.orca.CondorJobs import CondorJobs
+from lsst.ctrl.orca.exceptions import CondorQueryError
 
 
 # HTCondor workflow monitor
@@ -39,8 +40,22 @@ class CondorWorkflowMonitor(WorkflowMonitor):
         job id of submitted HTCondor dag
     monitorConfig : Config
         configuration file for monitor information
+    name : `str`, optional
+        name of the workflow, as reported to status listeners; defaults to the dag id
+    glideinManager : `GlideinManager`, optional
+        scales the glidein requests to the jobs of the dag while it runs, and
+        retires them when it's done
+    logAggregator : `LogAggregator`, optional
+        packs the logs of the finished worker jobs every
+        monitorConfig.logPackInterval seconds while the dag runs, and once
+        more when it's done
+    dagFile : `str`, optional
+        the DAG file, whose DAGMan log tells whether the dag succeeded once it
+        has left the queue; without it, the job's exit code in the history is
+        used
     """
-    def __init__(self, condorDagId, monitorConfig):
+    def __init__(self, condorDagId, monitorConfig, name=None, glideinManager=None, logAggregator=None,
+                 dagFile=None):
 
         # _locked: a container for data to be shared across threads that
         # have access to this object.
@@ -55,6 +70,17 @@ class CondorWorkflowMonitor(WorkflowMonitor):
 
         self.monitorConfig = monitorConfig
 
+        # name reported to status listeners
+        self.name = name
+        if self.name is None:
+            self.name = str(condorDagId)
+
+        self.glideinManager = glideinManager
+
+        self.logAggregator = logAggregator
+
+        self.dagFile = dagFile
+
         self._wfMonitorThread = None
 
         with self._locked:
@@ -86,21 +112,123 @@ class CondorWorkflowMonitor(WorkflowMonitor):
             self.monitorConfig = monitorConfig
 
         def run(self):
-            """Continously monitor life of workflow, shutting down when complete
+            """Continously monitor life of workflow, reporting progress to the status
+               listeners, and shutting down when complete
             """
             cj = CondorJobs()
             log.debug("CondorWorkflowMonitor Thread started")
             statusCheckInterval = int(self.monitorConfig.statusCheckInterval)
             sleepInterval = statusCheckInterval
+            lastCounts = None
+            lastPack = time.time()
             # we don't decide when we finish, someone else does.
             while True:
                 time.sleep(sleepInterval)
 
                 # if the dag is no longer running, return
-                if not cj.isJobAlive(self.condorDagId):
+                try:
+                    counts = cj.getDagNodeCounts(self.condorDagId)
+                except CondorQueryError as e:
+                    # the schedd may be busy; the dag is still there as far as we know
+                    log.warn("CondorWorkflowMonitor: couldn't query dag %s: %s" % (self.condorDagId, e))
+                    continue
+                if counts is None:
                     print("work complete.")
+                    self._stepGlideins(shutdown=True)
+                    self._packLogs()
                     with self._parent._locked:
                         self._parent._locked.running = False
+                        self._parent._locked.done = True
+                    msg = self._getFailure(cj, lastCounts)
+                    if msg is not None:
+                        self._parent.notifyStatusListeners("workflowFailed", self._parent.name,
+                                                           "nodeFailure", msg, None, None)
+                    else:
+                        self._parent.notifyStatusListeners("workflowShutdown", self._parent.name)
+                    return
+
+                if counts != lastCounts:
+                    lastCounts = counts
+                    self._parent.notifyStatusListeners("workflowProgress", self._parent.name, counts)
+                self._stepGlideins()
+                if time.time() - lastPack >= self.monitorConfig.logPackInterval:
+                    self._packLogs()
+                    lastPack = time.time()
+
+        def _getFailure(self, cj, lastCounts):
+            """Find out whether the dag, which has left the queue, failed
+
+            Parameters
+            ----------
+            cj : `CondorJobs`
+                the HTCondor commands
+            lastCounts : `dict`
+                the node counts of the last poll, or None if there was none
+
+            Returns
+            -------
+            msg : `str`
+                what failed, or None if the dag succeeded
+
+            Notes
+            -----
+            The exit status of DAGMan decides; the counts of the last poll,
+            which may be stale or missing, only if it can't be found out.
+            """
+            status = cj.getDagExitStatus(self.condorDagId, self._parent.dagFile)
+            nodes = None
+            if lastCounts is not None and lastCounts["failed"] > 0:
+                nodes = "%d of %d DAG nodes failed" % (lastCounts["failed"], lastCounts["total"])
+            if status is None:
+                log.warn("CondorWorkflowMonitor: can't find out how dag %s ended" % self.condorDagId)
+                return nodes
+            if status == 0:
+                return None
+            msg = "DAGMan exited with status %d" % status
+            if nodes is not None:
+                msg += "; %s" % nodes
+            return msg
+
+        def _stepGlideins(self, shutdown=False):
+            """Let the glidein manager, if there is one, match the glideins to the jobs
+
+            Parameters
+            ----------
+            shutdown : `bool`, optional
+                retire all the glideins, as the dag is done
+            """
+            manager = self._parent.glideinManager
+            if manager is None:
+                return
+            try:
+                if shutdown:
+                    manager.shutdown()
+                else:
+                    manager.step()
+            except Exception as e:
+                log.warn("CondorWorkflowMonitor: glidein scaling failed: %s" % e)
+
+        def _packLogs(self):
+            """Let the log aggregator, if there is one, pack the logs of the finished jobs
+            """
+            aggregator = self._parent.logAggregator
+            if aggregator is None:
+                return
+            try:
+                count = aggregator.aggregate()
+                log.debug("CondorWorkflowMonitor: packed the logs of %d jobs" % count)
+            except Exception as e:
+                log.warn("CondorWorkflowMonitor: packing logs failed: %s" % e)
+
+    def getJobId(self):
+        """Accessor to the id of the DAGMan job being monitored
+
+        Returns
+        -------
+        condorDagId : `str`
+            job id of the submitted HTCondor dag
+        """
+        return self.condorDagId
 
     def startMonitorThread(self):
         """Begin one monitor thread
@@ -108,6 +236,7 @@ class CondorWorkflowMonitor(WorkflowMonitor):
         with self._locked:
             self._wfMonitorThread.start()
             self._locked.running = True
+        self.notifyStatusListeners("workflowStarted", self.name)
 
     def stopWorkflow(self, urgency):
         """Stop the workflow
@@ -118,3 +247,5 @@ class CondorWorkflowMonitor(WorkflowMonitor):
         print("shutdown request received: stopping workflow")
         cj = CondorJobs()
         cj.killCondorId(self.condorDagId)
+        if self.glideinManager is not None:
+            self.glideinManager.shutdown()
@@ -0,0 +1,128 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import os
+import threading
+
+import lsst.log as log
+from lsst.ctrl.orca.ConfigSnapshot import ConfigSnapshot
+from lsst.ctrl.orca.NamedClassFactory import NamedClassFactory
+
+
+class ConfigCache:
+    """Loads config files once, and shares the frozen configs among all who ask
+
+    Notes
+    -----
+    Loading a config file runs it as Python and builds the whole tree of
+    configs, so the production config was loaded two or three times a run.
+    A config is cached under its class, the real path of the file, the
+    modification time of the file and the overrides applied to it, so a
+    changed file is loaded again.  The configs are frozen, since they're
+    shared: a change made by one consumer would be seen by all of them.
+
+    A `ConfigSnapshot` is read instead of loaded, unless the config file it
+    was compiled from has changed since, in which case that is loaded.
+    """
+
+    _configs = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls, configClass, path, overrides=None):
+        """Accessor to the config loaded from a file
+
+        Parameters
+        ----------
+        configClass : `type` or `str`
+            the class of the config, a subclass of `lsst.pex.config.Config`,
+            or its fully qualified name; by name, the class isn't imported
+            unless a config file has to be loaded
+        path : `str`
+            the config file
+        overrides : `dict`, optional
+            values to set after loading, by dotted field name, such as
+            {"production.logThreshold": 1}
+
+        Returns
+        -------
+        config : `lsst.pex.config.Config`
+            the frozen config, or the `ConfigView` of a snapshot
+        """
+        path = os.path.realpath(path)
+        if ConfigSnapshot.isSnapshot(path):
+            snapshot = cls._readSnapshot(configClass, path)
+            source = snapshot.header["source"]
+            if overrides:
+                log.warn("ConfigCache: can't override the snapshot %s; loading %s instead" % (path, source))
+            elif snapshot.isStale():
+                log.warn("ConfigCache: %s has changed since %s was compiled from it; loading it instead" %
+                         (source, path))
+            else:
+                return snapshot.config
+            path = source
+
+        overrides = frozenset(overrides.items()) if overrides else frozenset()
+        key = (configClass, path, os.stat(path).st_mtime_ns, overrides)
+        with cls._lock:
+            config = cls._configs.get(key)
+        if config is not None:
+            return config
+
+        log.debug("ConfigCache: loading %s" % path)
+        if isinstance(configClass, str):
+            configClass = NamedClassFactory().createClass(configClass)
+        config = configClass()
+        config.load(path)
+        for name, value in sorted(overrides):
+            fields = name.split(".")
+            parent = config
+            for field in fields[:-1]:
+                parent = getattr(parent, field)
+            setattr(parent, fields[-1], value)
+        config.freeze()
+
+        return cls._store(key, config)
+
+    @classmethod
+    def _readSnapshot(cls, configClass, path):
+        key = (configClass, path, os.stat(path).st_mtime_ns, None)
+        with cls._lock:
+            snapshot = cls._configs.get(key)
+        if snapshot is None:
+            snapshot = cls._store(key, ConfigSnapshot.read(path, configClass))
+        return snapshot
+
+    @classmethod
+    def _store(cls, key, config):
+        with cls._lock:
+            # drop the configs loaded from earlier versions of the file
+            for stale in [k for k in cls._configs if k[:2] == key[:2] and k[2] != key[2]]:
+                del cls._configs[stale]
+            return cls._configs.setdefault(key, config)
+
+    @classmethod
+    def clear(cls):
+        """Forget all the configs loaded
+        """
+        with cls._lock:
+            cls._configs.clear()
@@ -0,0 +1,301 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import collections.abc
+import hashlib
+import json
+import os
+import types
+
+from lsst.ctrl.orca.exceptions import ConfigurationError
+
+# the first key of every snapshot, and its format version
+MAGIC = "orcaConfigSnapshot"
+VERSION = 1
+
+
+def _dump(value):
+    """Turn a config, or the value of one of its fields, into JSON values
+    """
+    # only needed to compile; reading a snapshot doesn't need pex_config at all
+    import lsst.pex.config as pexConfig
+
+    if isinstance(value, pexConfig.Config):
+        return {"__config__": {name: _dump(item) for name, item in value.items()}}
+    if isinstance(value, collections.abc.Mapping) and hasattr(value, "types"):
+        # the instances of a ConfigChoiceField
+        try:
+            selected = value.name
+        except pexConfig.FieldValidationError:
+            # a multiple choice field has names, not a name
+            selected = None
+        return {"__choice__": {name: _dump(value[name]) for name in value}, "__name__": selected}
+    if isinstance(value, collections.abc.Mapping):
+        return {str(key): _dump(item) for key, item in value.items()}
+    if isinstance(value, collections.abc.Sequence) and not isinstance(value, str):
+        return [_dump(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise ConfigurationError("can't put a %s in a config snapshot" % type(value).__name__)
+
+
+def _view(value):
+    """Turn JSON values back into a read-only view of a config
+    """
+    if isinstance(value, dict):
+        if "__config__" in value:
+            return ConfigView({name: _view(item) for name, item in value["__config__"].items()})
+        if "__choice__" in value:
+            return ConfigChoiceView({name: _view(item) for name, item in value["__choice__"].items()},
+                                    value["__name__"])
+        return types.MappingProxyType({key: _view(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_view(item) for item in value)
+    return value
+
+
+def _checksum(tree):
+    return hashlib.sha256(json.dumps(tree, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _fileChecksum(path):
+    with open(path, "rb") as fileObj:
+        return hashlib.sha256(fileObj.read()).hexdigest()
+
+
+class ConfigView:
+    """A read-only view of a config read from a snapshot
+
+    Parameters
+    ----------
+    fields : `dict`
+        the values of the fields of the config, by name
+
+    Notes
+    -----
+    Fields are read as attributes, as they are from a config: a config
+    field is another ConfigView, a choice field a `ConfigChoiceView`, a
+    dict field a read-only mapping and a list field a tuple.
+    """
+
+    def __init__(self, fields):
+        object.__setattr__(self, "_fields", fields)
+
+    def __getattr__(self, name):
+        try:
+            return self._fields[name]
+        except KeyError:
+            raise AttributeError("config has no field %s" % name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("can't set %s: configs read from a snapshot are read-only" % name)
+
+    def __eq__(self, other):
+        return isinstance(other, ConfigView) and self._fields == other._fields
+
+    def toDict(self):
+        """
+        Returns
+        -------
+        dict_ : `dict`
+            the fields of the config, as `lsst.pex.config.Config.toDict`
+            gives them
+        """
+        def plain(value):
+            if isinstance(value, (ConfigView, ConfigChoiceView)):
+                return value.toDict()
+            if isinstance(value, types.MappingProxyType):
+                return dict(value)
+            if isinstance(value, tuple):
+                return list(value)
+            return value
+        return {name: plain(value) for name, value in self._fields.items()}
+
+
+class ConfigChoiceView(collections.abc.Mapping):
+    """A read-only view of the configs of a choice field read from a snapshot
+
+    Parameters
+    ----------
+    configs : `dict`
+        the `ConfigView` of each choice, by name
+    name : `str`
+        the name of the selected choice
+    """
+
+    def __init__(self, configs, name):
+        self._configs = configs
+        self.name = name
+
+    def __getitem__(self, name):
+        return self._configs[name]
+
+    def __iter__(self):
+        return iter(self._configs)
+
+    def __len__(self):
+        return len(self._configs)
+
+    def __eq__(self, other):
+        if not isinstance(other, ConfigChoiceView):
+            return False
+        return (self.name, self._configs) == (other.name, other._configs)
+
+    @property
+    def active(self):
+        return None if self.name is None else self._configs[self.name]
+
+    def toDict(self):
+        return {"name": self.name, "values": {name: config.toDict() for name, config in self.items()}}
+
+
+class ConfigSnapshot:
+    """A config compiled to a flat JSON file, to be read back without running
+    the config file again
+
+    Parameters
+    ----------
+    header : `dict`
+        the class of the config, and the source file, modification time and
+        checksum of the config file it was compiled from
+    config : `ConfigView`
+        the config
+
+    Notes
+    -----
+    The values in a snapshot were type checked as the config file was
+    loaded, and the snapshot is checksummed, so reading it checks nothing
+    more.  Orca doesn't require every field of a config to be set, so the
+    config isn't validated as a whole, as it isn't when it's loaded.
+
+    A snapshot records the checksum of the config file it was compiled from;
+    it's stale once the config file changes, and should be compiled again.
+    Files the config file loads in turn aren't checked.
+    """
+
+    def __init__(self, header, config):
+        self.header = header
+        self.config = config
+
+    @staticmethod
+    def compile(configClass, sourcePath, snapshotPath):
+        """Load a config file, and write it as a snapshot
+
+        Parameters
+        ----------
+        configClass : `type`
+            the class of the config
+        sourcePath : `str`
+            the config file
+        snapshotPath : `str`
+            the snapshot file to write
+        """
+        sourcePath = os.path.realpath(sourcePath)
+        config = configClass()
+        config.load(sourcePath)
+        tree = _dump(config)
+        snapshot = {MAGIC: VERSION,
+                    "configClass": "%s.%s" % (configClass.__module__, configClass.__name__),
+                    "source": sourcePath,
+                    "sourceMtime": os.stat(sourcePath).st_mtime_ns,
+                    "sourceChecksum": _fileChecksum(sourcePath),
+                    "checksum": _checksum(tree),
+                    "config": tree}
+        tmpPath = snapshotPath + ".tmp"
+        with open(tmpPath, "w") as fileObj:
+            json.dump(snapshot, fileObj, separators=(",", ":"))
+        os.replace(tmpPath, snapshotPath)
+
+    @staticmethod
+    def isSnapshot(path):
+        """
+        Parameters
+        ----------
+        path : `str`
+            a config file, or snapshot
+
+        Returns
+        -------
+        snapshot : `bool`
+            True if the file is a snapshot
+        """
+        prefix = ('{"%s"' % MAGIC).encode()
+        with open(path, "rb") as fileObj:
+            return fileObj.read(len(prefix)) == prefix
+
+    @classmethod
+    def read(cls, path, configClass=None):
+        """Read a snapshot
+
+        Parameters
+        ----------
+        path : `str`
+            the snapshot file
+        configClass : `type` or `str`, optional
+            the class the config must have been compiled as, or its fully
+            qualified name
+
+        Returns
+        -------
+        snapshot : `ConfigSnapshot`
+            the snapshot
+
+        Raises
+        ------
+        ConfigurationError
+            if the snapshot is corrupt, of an unknown version, or of another
+            class of config
+        """
+        with open(path, "r") as fileObj:
+            try:
+                snapshot = json.load(fileObj)
+            except ValueError as e:
+                raise ConfigurationError("%s: corrupt config snapshot: %s" % (path, e))
+        if snapshot.get(MAGIC) != VERSION:
+            raise ConfigurationError("%s: unknown config snapshot version %s" % (path, snapshot.get(MAGIC)))
+        tree = snapshot.pop("config")
+        if _checksum(tree) != snapshot["checksum"]:
+            raise ConfigurationError("%s: corrupt config snapshot: checksum mismatch" % path)
+        if configClass is not None:
+            className = configClass
+            if not isinstance(className, str):
+                className = "%s.%s" % (configClass.__module__, configClass.__name__)
+            if snapshot["configClass"] != className:
+                raise ConfigurationError("%s: snapshot of a %s, not a %s" %
+                                         (path, snapshot["configClass"], className))
+        return cls(snapshot, _view(tree))
+
+    def isStale(self):
+        """
+        Returns
+        -------
+        stale : `bool`
+            True if the config file the snapshot was compiled from has changed
+            since; False if it hasn't, or is gone
+        """
+        source = self.header["source"]
+        try:
+            if os.stat(source).st_mtime_ns == self.header["sourceMtime"]:
+                return False
+            return _fileChecksum(source) != self.header["sourceChecksum"]
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,251 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import asyncio
+import http
+import socket
+import threading
+import lsst.log as log
+
+from lsst.ctrl.orca.ServiceHandler import ServiceHandler
+
+
+class ControlServer:
+    """HTTP/1.1 control endpoint for a production, serving every connection from one asyncio event loop
+
+    Parameters
+    ----------
+    parent : `ProductionRunManager`
+        the production this endpoint controls
+    runid : `str`
+        run id of the production
+    host : `str`, optional
+        address to listen on
+    port : `int`, optional
+        port to listen on; 0 picks a free port
+
+    Notes
+    -----
+    The listening socket is bound when this object is created, so the port is
+    known before run() is called.  The server shuts itself down as soon as a
+    workflow status event shows that the production is no longer running; it
+    doesn't poll the workflows.
+    """
+
+    # seconds an idle keep-alive connection is held open
+    keepAliveTimeout = 60
+
+    # largest request payload accepted, in bytes
+    maxContentLength = 1 << 20
+
+    def __init__(self, parent, runid, host="0.0.0.0", port=0):
+        self._parent = parent
+        self._handler = ServiceHandler(parent, runid)
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(socket.SOMAXCONN)
+
+        # the port this server is listening on
+        self.port = self._sock.getsockname()[1]
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._stopping = None
+        self._stopRequested = False
+        # the broadcaster of each open event stream's subscription
+        self._streams = {}
+        self._writers = set()
+        self._actions = set()
+
+    def run(self):
+        """Serve requests until the production completes or stop() is called
+        """
+        asyncio.run(self._serve())
+
+    def stop(self):
+        """Shut the server down; this may be called from any thread
+        """
+        with self._lock:
+            self._stopRequested = True
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._stop)
+
+    def _stop(self):
+        if not self._stopping.is_set():
+            self._stopping.set()
+            for subscription, broadcaster in self._streams.items():
+                # unsubscribing waits out an event being published from another
+                # thread, so the stream is closed only after it has been queued
+                broadcaster.unsubscribe(subscription)
+                subscription.close()
+
+    async def _serve(self):
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._stopping = asyncio.Event()
+            if self._stopRequested:
+                self._stop()
+
+        server = await asyncio.start_server(self._handleConnection, sock=self._sock)
+        watcher = asyncio.ensure_future(self._watchProduction())
+        await self._stopping.wait()
+
+        server.close()
+        watcher.cancel()
+        # event streams end once their pending events are written; idle
+        # keep-alive connections are simply closed.
+        for writer in list(self._writers):
+            writer.close()
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if pending:
+            await asyncio.wait(pending)
+        # the loop closes once this returns, so a late stop() has nothing to do
+        with self._lock:
+            self._loop = None
+        log.debug("ControlServer: shut down")
+
+    async def _watchProduction(self):
+        """Stop the server when the production has finished
+        """
+        broadcaster = self._parent.getStatusBroadcaster()
+        subscription = broadcaster.subscribe(self._loop)
+        try:
+            while self._parent.isRunning():
+                record = await subscription.get()
+                while record is not None and record["event"] not in ("workflowShutdown", "workflowFailed"):
+                    record = await subscription.get()
+            self._stop()
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    async def _handleConnection(self, reader, writer):
+        """Serve the requests made on one connection, until either side closes it
+        """
+        self._writers.add(writer)
+        try:
+            keepAlive = True
+            while keepAlive and not self._stopping.is_set():
+                try:
+                    request = await asyncio.wait_for(self._readRequest(reader), self.keepAliveTimeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.0":
+                    keepAlive = connection == "keep-alive"
+                else:
+                    keepAlive = connection != "close"
+
+                if body is None:
+                    response = self._handler.errorResponse(413, "Payload Too Large",
+                                                           "Request payload is too large")
+                    keepAlive = False
+                else:
+                    response = self._handler.handleRequest(method, path, body)
+                    if response.work is not None:
+                        # reading log indexes and archives would stall every other connection
+                        response = await self._loop.run_in_executor(None, response.work)
+
+                if response.stream is not None:
+                    self._writers.discard(writer)
+                    await self._writeStream(writer, response)
+                    break
+                self._writeResponse(writer, response, keepAlive)
+                await writer.drain()
+                if response.action is not None:
+                    # run blocking work, such as stopping the production, off the event loop
+                    action = asyncio.ensure_future(self._loop.run_in_executor(None, response.action))
+                    self._actions.add(action)
+                    action.add_done_callback(self._actions.discard)
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _readRequest(self, reader):
+        """Read one request from a connection
+
+        Returns
+        -------
+        request : `tuple`
+            (method, path, version, headers, body), or None if the client closed
+            the connection.  body is None if it was larger than maxContentLength.
+        """
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, path, version = line.decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > self.maxContentLength:
+            return method, path, version, headers, None
+        body = await reader.readexactly(length) if length > 0 else b""
+        return method, path, version, headers, body
+
+    def _writeResponse(self, writer, response, keepAlive):
+        head = "HTTP/1.1 %d %s\r\n" % (response.status, http.HTTPStatus(response.status).phrase)
+        if response.status != 204:
+            head += "Content-Type: %s\r\n" % response.contentType
+            head += "Content-Length: %d\r\n" % len(response.body)
+        head += "Connection: %s\r\n\r\n" % ("keep-alive" if keepAlive else "close")
+        writer.write(head.encode("latin-1") + response.body)
+
+    async def _writeStream(self, writer, response):
+        """Write the events published to a broadcaster, as server-sent events, until the server stops
+        """
+        broadcaster = response.stream
+        subscription = broadcaster.subscribe(self._loop)
+        self._streams[subscription] = broadcaster
+        if self._stopping.is_set():
+            # the server is already shutting down, so no more events will come
+            subscription.close()
+        try:
+            head = "HTTP/1.1 200 OK\r\nContent-Type: %s\r\n" % response.contentType
+            head += "Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            writer.write(head.encode("latin-1"))
+            await writer.drain()
+            while True:
+                try:
+                    record = await asyncio.wait_for(subscription.get(), self._handler.keepaliveInterval)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                else:
+                    if record is None:
+                        break
+                    writer.write(self._handler.formatEvent(record))
+                await writer.drain()
+        finally:
+            self._streams.pop(subscription, None)
+            broadcaster.unsubscribe(subscription)
@@ -0,0 +1,119 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import math
+import os
+import re
+
+from lsst.ctrl.orca.WorkerBatchRunner import splitBatch
+
+_VARS = re.compile(r'^VARS\s+(\S+)\s+(\w+)="(.*)"\s*$')
+_SPLICE = re.compile(r'^SPLICE\s+(\S+)\s+(\S+)(?:\s+DIR\s+(\S+))?\s*$')
+
+
+class DagPlan:
+    """What a DAG would run, and an estimate of what running it would cost
+
+    Parameters
+    ----------
+    dagFile : `str`
+        the DAG file
+
+    Notes
+    -----
+    The worker nodes are those the generator gave data ids, in the VARS
+    var1; the others (the pre and post jobs) run once each, before and after
+    them.  The DAGs the DAG splices in, one per task of a workflow of several
+    tasks, are listed in ``splices``, but not counted.
+    """
+
+    def __init__(self, dagFile):
+        self.dagFile = dagFile
+        self.size = os.path.getsize(dagFile)
+        self.nodes = 0
+        self.workerNodes = 0
+        self.dataIds = 0
+        self.splices = []
+        groups = set()
+        with open(dagFile, "r") as fileObj:
+            for line in fileObj:
+                if line.startswith("JOB "):
+                    self.nodes += 1
+                elif line.startswith("SPLICE "):
+                    match = _SPLICE.match(line)
+                    if match is None:
+                        continue
+                    name, spliceFile, spliceDir = match.groups()
+                    if spliceDir is not None:
+                        spliceFile = os.path.join(spliceDir, spliceFile)
+                    self.splices.append((name, os.path.join(os.path.dirname(dagFile), spliceFile)))
+                elif line.startswith("VARS "):
+                    match = _VARS.match(line)
+                    if match is None:
+                        continue
+                    node, name, value = match.groups()
+                    if name == "var1":
+                        self.workerNodes += 1
+                        self.dataIds += len(splitBatch(value.split()))
+                    elif name == "visit":
+                        groups.add(value)
+        self.groups = len(groups)
+
+    def estimate(self, slots, maxJobs=None, jobTime=None, pollInterval=None):
+        """Estimate the cost of running the DAG
+
+        Parameters
+        ----------
+        slots : `int`
+            the number of worker jobs the hardware can run at once, or None
+            if it isn't known
+        maxJobs : `int`, optional
+            the most jobs DAGMan will queue at once
+        jobTime : `float`, optional
+            the seconds a worker job is expected to run
+        pollInterval : `float`, optional
+            the seconds between the monitor's queries of the queue
+
+        Returns
+        -------
+        estimate : `dict`
+            "concurrency", the worker jobs that can run at once; "waves", the
+            rounds of that many jobs it takes to run them all; "queued", the
+            most jobs in the queue; "wallTime", the least seconds the DAG
+            can take, "polls", the queries the monitor makes of the queue in
+            that time and "scheddLoad", the job ads those queries read.  Those
+            which can't be estimated from what's given are None.
+        """
+        queued = self.workerNodes if maxJobs is None else min(self.workerNodes, maxJobs)
+        concurrency = queued if slots is None else min(queued, slots)
+        estimate = {"concurrency": concurrency, "waves": None, "queued": queued, "wallTime": None,
+                    "polls": None, "scheddLoad": None}
+        if concurrency > 0:
+            estimate["waves"] = math.ceil(self.workerNodes / concurrency)
+        if jobTime is not None and estimate["waves"] is not None:
+            # the other nodes run one after the other, around the workers
+            otherNodes = self.nodes - self.workerNodes
+            estimate["wallTime"] = (estimate["waves"] + otherNodes) * jobTime
+            if pollInterval:
+                estimate["polls"] = math.ceil(estimate["wallTime"] / pollInterval)
+                estimate["scheddLoad"] = queued * estimate["polls"]
+        return estimate
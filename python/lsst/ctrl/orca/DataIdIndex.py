@@ -0,0 +1,126 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+from array import array
+import bisect
+import hashlib
+import heapq
+import os
+import sys
+
+
+def hashDataId(dataId):
+    """Compute the 64-bit hash used to identify a data id in a DataIdIndex
+
+    Parameters
+    ----------
+    dataId : `str`
+        a data id, as it appears in an input list, e.g. "visit=887136081 raft=2,2 sensor=0,1"
+
+    Returns
+    -------
+    value : `int`
+        the hash; runs of whitespace in the data id don't change it
+    """
+    canonical = " ".join(dataId.split()).encode()
+    return int.from_bytes(hashlib.blake2b(canonical, digest_size=8).digest(), "little")
+
+
+class DataIdIndex:
+    """A sorted set of data id hashes, kept in a flat binary file
+
+    Parameters
+    ----------
+    hashes : iterable of `int`, optional
+        hashes to put in the index
+
+    Notes
+    -----
+    Each data id costs 8 bytes, both in memory and on disk, and membership
+    tests are binary searches, so the index of everything a run has ever
+    scheduled stays cheap to load and query as the run grows.  The file is a
+    little-endian array of unsigned 64-bit integers.
+    """
+
+    def __init__(self, hashes=None):
+        self._hashes = array("Q", sorted(set(hashes)) if hashes is not None else [])
+
+    @classmethod
+    def load(cls, path):
+        """Read an index file
+
+        Parameters
+        ----------
+        path : `str`
+            the index file; if it doesn't exist, the index is empty
+
+        Returns
+        -------
+        index : `DataIdIndex`
+            the index
+        """
+        index = cls()
+        if os.path.exists(path):
+            with open(path, "rb") as fileObj:
+                index._hashes.frombytes(fileObj.read())
+            if sys.byteorder != "little":
+                index._hashes.byteswap()
+        return index
+
+    def save(self, path):
+        """Write the index to a file, replacing it atomically
+
+        Parameters
+        ----------
+        path : `str`
+            the index file
+        """
+        hashes = self._hashes
+        if sys.byteorder != "little":
+            hashes = array("Q", hashes)
+            hashes.byteswap()
+        tmpPath = path + ".tmp"
+        with open(tmpPath, "wb") as fileObj:
+            hashes.tofile(fileObj)
+        os.replace(tmpPath, path)
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __iter__(self):
+        return iter(self._hashes)
+
+    def __contains__(self, value):
+        i = bisect.bisect_left(self._hashes, value)
+        return i < len(self._hashes) and self._hashes[i] == value
+
+    def update(self, hashes):
+        """Add hashes to the index
+
+        Parameters
+        ----------
+        hashes : iterable of `int`
+            the hashes to add; ones already in the index are ignored
+        """
+        new = sorted(value for value in set(hashes) if value not in self)
+        if new:
+            self._hashes = array("Q", heapq.merge(self._hashes, new))
@@ -0,0 +1,391 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+from array import array
+import sys
+
+from lsst.ctrl.orca.DataIdIndex import hashDataId
+from lsst.ctrl.orca.DataIdParser import parseDataId
+from lsst.ctrl.orca.exceptions import DataIdError
+
+
+class DataIdColumn:
+    """The values of one key of the data ids in a DataIdTable
+
+    Notes
+    -----
+    Values are kept as 64-bit integers while every value of the column is one;
+    after that the column is dictionary encoded, holding each distinct value
+    once and a 32-bit code per data id.
+    """
+
+    def __init__(self):
+        self._ints = array("q")
+        self._codes = None
+        self._values = None
+        self._lookup = None
+
+    def isInteger(self):
+        """
+        Returns
+        -------
+        val : `bool`
+            True if every value in the column is an integer
+        """
+        return self._codes is None
+
+    def append(self, value):
+        """Add a value to the end of the column
+
+        Parameters
+        ----------
+        value : `str`
+            the value
+        """
+        if self._codes is None:
+            try:
+                number = int(value)
+                if str(number) == value:
+                    self._ints.append(number)
+                    return
+            except (ValueError, OverflowError):
+                pass
+            self._encode()
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self._values)
+            self._values.append(sys.intern(value))
+            self._lookup[value] = code
+        self._codes.append(code)
+
+    def _encode(self):
+        """Switch the column from integers to dictionary encoded strings
+        """
+        self._values = []
+        self._lookup = {}
+        self._codes = array("I")
+        ints = self._ints
+        self._ints = None
+        for number in ints:
+            self.append(str(number))
+
+    def __len__(self):
+        return len(self._ints) if self._codes is None else len(self._codes)
+
+    def __getitem__(self, i):
+        if self._codes is None:
+            return str(self._ints[i])
+        return self._values[self._codes[i]]
+
+    def sortKey(self):
+        """
+        Returns
+        -------
+        key : callable
+            a function of a row number giving a value that orders the rows
+            by the value of the column: numerically for an integer column,
+            as strings otherwise
+        """
+        if self._codes is None:
+            return self._ints.__getitem__
+        ranks = array("I", bytes(4*len(self._values)))
+        for rank, code in enumerate(sorted(range(len(self._values)), key=self._values.__getitem__)):
+            ranks[code] = rank
+        codes = self._codes
+        return lambda i: ranks[codes[i]]
+
+    def distinct(self):
+        """
+        Returns
+        -------
+        values : `set` of `str`
+            the distinct values in the column
+        """
+        if self._codes is None:
+            return set(str(number) for number in set(self._ints))
+        return set(self._values)
+
+
+class DataIdHashSet:
+    """A set of 64-bit data id hashes, kept in a flat open addressed table
+
+    Notes
+    -----
+    Each hash costs 8 bytes at full load, and the table is kept at most two
+    thirds full.  The hashes are uniformly distributed already, so the low
+    bits of a hash pick its slot; slot value 0 means empty, so a hash of 0 is
+    stored as 1.
+    """
+
+    def __init__(self):
+        self._slots = array("Q", bytes(8*1024))
+        self._mask = len(self._slots) - 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _find(self, value):
+        slots = self._slots
+        mask = self._mask
+        i = value & mask
+        while True:
+            slot = slots[i]
+            if slot == value or slot == 0:
+                return i
+            i = (i + 1) & mask
+
+    def __contains__(self, value):
+        value = value or 1
+        return self._slots[self._find(value)] == value
+
+    def add(self, value):
+        """Add a hash to the set
+
+        Parameters
+        ----------
+        value : `int`
+            the hash
+
+        Returns
+        -------
+        added : `bool`
+            False if the hash was in the set already
+        """
+        value = value or 1
+        i = self._find(value)
+        if self._slots[i] == value:
+            return False
+        self._slots[i] = value
+        self._count += 1
+        if 3*self._count > 2*len(self._slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array("Q", bytes(16*len(old)))
+        self._mask = len(self._slots) - 1
+        slots = self._slots
+        for value in old:
+            if value:
+                slots[self._find(value)] = value
+
+    def __iter__(self):
+        return (value for value in self._slots if value)
+
+
+class DataIdTable:
+    """A validated, duplicate free list of the data ids of an input list
+
+    Parameters
+    ----------
+    exclude : container of `int`, optional
+        hashes (see `hashDataId`) of data ids to leave out of the table, such
+        as a `DataIdIndex` of the ids that have been scheduled already
+
+    Notes
+    -----
+    All the data ids of a table have the same keys, in the same order.  The
+    keys are held once for the whole table and the values in one
+    `DataIdColumn` per key, so a data id costs a few tens of bytes however
+    many keys it has, and ten million of them fit comfortably in memory.  The
+    ids are given back in their canonical form, with single spaces between
+    the key=value pairs.
+    """
+
+    def __init__(self, exclude=None):
+        self.keys = None
+        self._columns = []
+        self._hashes = DataIdHashSet()
+        self._exclude = exclude
+        # number of data ids given more than once
+        self.duplicates = 0
+        # number of data ids left out because they were in exclude
+        self.excluded = 0
+
+    def append(self, text):
+        """Add a data id to the end of the table
+
+        Parameters
+        ----------
+        text : `str`
+            the data id
+
+        Returns
+        -------
+        added : `bool`
+            False if the data id was in the table already, or is excluded
+
+        Raises
+        ------
+        DataIdError
+            if the data id isn't valid, or its keys differ from those of the
+            data ids in the table
+        """
+        keys, values = parseDataId(text)
+        if self.keys is None:
+            self.keys = tuple(sys.intern(key) if key else key for key in keys)
+            self._columns = [DataIdColumn() for key in keys]
+        elif keys != self.keys:
+            raise DataIdError("keys %s differ from the keys %s of the first data id" %
+                              (self._formatKeys(keys), self._formatKeys(self.keys)))
+        value = hashDataId(text)
+        if self._exclude is not None and value in self._exclude:
+            self.excluded += 1
+            return False
+        if not self._hashes.add(value):
+            self.duplicates += 1
+            return False
+        for column, value in zip(self._columns, values):
+            column.append(value)
+        return True
+
+    @staticmethod
+    def _formatKeys(keys):
+        return "(plain value)" if keys == (None,) else ",".join(keys)
+
+    @classmethod
+    def fromFile(cls, fileObj, exclude=None, maxErrors=100):
+        """Read an input list of data ids, one per line
+
+        Parameters
+        ----------
+        fileObj : file object, or iterable of `str`
+            the lines of the input list; blank lines and lines starting with
+            '#' are skipped
+        exclude : container of `int`, optional
+            hashes of data ids to leave out of the table
+        maxErrors : `int`, optional
+            the maximum number of invalid lines to keep in the errors
+
+        Returns
+        -------
+        table : `DataIdTable`
+            the valid data ids
+        errors : `list` of (`int`, `str`, `str`)
+            the line number, text and problem of the first maxErrors invalid
+            lines
+        errorCount : `int`
+            the number of invalid lines
+        """
+        table = cls(exclude)
+        errors = []
+        errorCount = 0
+        for lineNumber, line in enumerate(fileObj, 1):
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            try:
+                table.append(stripped)
+            except DataIdError as e:
+                errorCount += 1
+                if len(errors) < maxErrors:
+                    errors.append((lineNumber, stripped, str(e)))
+        return table, errors, errorCount
+
+    def __len__(self):
+        return len(self._columns[0]) if self._columns else 0
+
+    def __getitem__(self, i):
+        if self.keys == (None,):
+            return self._columns[0][i]
+        return " ".join("%s=%s" % (key, column[i]) for key, column in zip(self.keys, self._columns))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def column(self, key):
+        """
+        Parameters
+        ----------
+        key : `str`
+            a key of the data ids; None for plain values
+
+        Returns
+        -------
+        column : `DataIdColumn`
+            the values of the key
+        """
+        return self._columns[self.keys.index(key)]
+
+    def order(self, keys=()):
+        """
+        Parameters
+        ----------
+        keys : sequence of `str`, optional
+            keys of the data ids, most significant first
+
+        Returns
+        -------
+        order : `array` of `int`
+            the row numbers of the table, sorted by the values of the keys;
+            rows with the same values stay in the order they were added
+        """
+        rows = list(range(len(self)))
+        for key in reversed(keys):
+            rows.sort(key=self.column(key).sortKey())
+        return array("Q", rows)
+
+    def batches(self, size, keys=(), order=None):
+        """Split the data ids into batches which share the values of some keys
+
+        Parameters
+        ----------
+        size : `int`
+            the largest number of data ids in a batch
+        keys : sequence of `str`, optional
+            keys whose values all the data ids of a batch share
+        order : sequence of `int`, optional
+            the order of the rows, normally `order(keys)` so that the rows with
+            the same values of the keys are together; the order they were added
+            if None
+
+        Yields
+        ------
+        batch : `list` of `int`
+            the row numbers of the data ids of the next batch
+        """
+        if order is None:
+            order = range(len(self))
+        sortKeys = [self.column(key).sortKey() for key in keys]
+        batch = []
+        last = None
+        for i in order:
+            values = tuple(sortKey(i) for sortKey in sortKeys)
+            if batch and (len(batch) == size or values != last):
+                yield batch
+                batch = []
+            batch.append(i)
+            last = values
+        if batch:
+            yield batch
+
+    def hashes(self):
+        """
+        Returns
+        -------
+        hashes : iterable of `int`
+            the hashes of the data ids in the table, in no particular order
+        """
+        return iter(self._hashes)
@@ -0,0 +1,227 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import itertools
+import shlex
+import subprocess
+import threading
+
+import lsst.log as log
+
+
+class FileWait:
+    """A wait for files, outstanding on a `FileWaitConnection`
+
+    Parameters
+    ----------
+    tag : `str`
+        the tag of the request
+    """
+
+    def __init__(self, tag):
+        self.tag = tag
+        # the files which have appeared
+        self.appeared = []
+        self.error = None
+        self._done = threading.Event()
+
+    def _finish(self, error=None):
+        self.error = error
+        self._done.set()
+
+    def isDone(self):
+        """
+        Returns
+        -------
+        done : `bool`
+            True once the wait has ended
+        """
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Wait for the files
+
+        Parameters
+        ----------
+        timeout : `float`, optional
+            the most seconds to wait; no limit if None
+
+        Returns
+        -------
+        done : `bool`
+            True if the files appeared, False if the wait timed out
+
+        Raises
+        ------
+        RuntimeError
+            if the remote waiter couldn't serve the request
+        """
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise RuntimeError("waiting for files failed: %s" % self.error)
+        return True
+
+
+class FileWaitConnection:
+    """A persistent connection to a file waiter serving requests on a remote node
+
+    Parameters
+    ----------
+    remoteNode : `str`
+        the remote node
+    remoteFileWaiter : `str`
+        the command of the remote file waiter script
+    shell : `list` of `str`, optional
+        the command which runs a command on a remote node, given the node
+        and the command; gsissh sharing a control connection by default
+
+    Notes
+    -----
+    The remote file waiter is started once, as "filewaiter.py --stream", and
+    serves every wait made through the connection, so many waits can be
+    outstanding at once over one session; see `FileWaitServer`.  Use `get`
+    to share the connection to a node.
+    """
+
+    defaultShell = ["gsissh", "-o", "ControlMaster=auto", "-o", "ControlPath=~/.ssh/orca-%r@%h:%p",
+                    "-o", "ControlPersist=10m"]
+
+    _connections = {}
+    _connectionsLock = threading.Lock()
+
+    @classmethod
+    def get(cls, remoteNode, remoteFileWaiter, shell=None):
+        """Accessor to the shared connection to a remote node
+
+        Parameters
+        ----------
+        remoteNode : `str`
+            the remote node
+        remoteFileWaiter : `str`
+            the command of the remote file waiter script
+        shell : `list` of `str`, optional
+            the command which runs a command on a remote node
+
+        Returns
+        -------
+        connection : `FileWaitConnection`
+            the open connection to the node, started if there wasn't one
+        """
+        key = (remoteNode, remoteFileWaiter)
+        with cls._connectionsLock:
+            connection = cls._connections.get(key)
+            if connection is None or connection.isClosed():
+                connection = cls(remoteNode, remoteFileWaiter, shell)
+                cls._connections[key] = connection
+            return connection
+
+    def __init__(self, remoteNode, remoteFileWaiter, shell=None):
+        log.debug("FileWaitConnection:__init__")
+        self.remoteNode = remoteNode
+        self.remoteFileWaiter = remoteFileWaiter
+        self.shell = list(self.defaultShell if shell is None else shell)
+
+        self._lock = threading.Lock()
+        self._waits = {}
+        self._tags = itertools.count(1)
+        self._closed = False
+
+        cmd = self.shell + [remoteNode] + shlex.split(remoteFileWaiter) + ["--stream"]
+        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         universal_newlines=True, bufsize=1)
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        """Hand the answers of the remote waiter to the waits they're for
+        """
+        for line in self._process.stdout:
+            fields = line.rstrip("\n").split(" ", 2)
+            with self._lock:
+                wait = self._waits.get(fields[0])
+                if wait is None or len(fields) < 2:
+                    continue
+                if fields[1] == "appeared" and len(fields) == 3:
+                    wait.appeared.append(fields[2])
+                elif fields[1] == "done":
+                    del self._waits[wait.tag]
+                    wait._finish()
+                elif fields[1] == "error":
+                    del self._waits[wait.tag]
+                    wait._finish(fields[2] if len(fields) == 3 else "unknown error")
+        self._process.wait()
+        with self._lock:
+            self._closed = True
+            for wait in self._waits.values():
+                wait._finish("connection to %s closed (exit status %s)" %
+                             (self.remoteNode, self._process.returncode))
+            self._waits.clear()
+
+    def isClosed(self):
+        """
+        Returns
+        -------
+        closed : `bool`
+            True if the remote waiter has ended
+        """
+        with self._lock:
+            return self._closed
+
+    def submit(self, kind, argument):
+        """Start a wait
+
+        Parameters
+        ----------
+        kind : `str`
+            "file" to wait for the file named by the argument, "all" or
+            "first" to wait for all, or the first, of the files in the remote
+            list file named by the argument
+        argument : `str`
+            the file, or list file
+
+        Returns
+        -------
+        wait : `FileWait`
+            the outstanding wait
+        """
+        with self._lock:
+            wait = FileWait(str(next(self._tags)))
+            if self._closed:
+                wait._finish("connection to %s closed" % self.remoteNode)
+                return wait
+            self._waits[wait.tag] = wait
+            try:
+                self._process.stdin.write("%s %s %s\n" % (wait.tag, kind, argument))
+                self._process.stdin.flush()
+            except OSError as e:
+                del self._waits[wait.tag]
+                wait._finish(str(e))
+        return wait
+
+    def close(self):
+        """End the remote waiter, and the waits still outstanding
+        """
+        with self._lock:
+            if not self._process.stdin.closed:
+                self._process.stdin.close()
+        self._reader.join()
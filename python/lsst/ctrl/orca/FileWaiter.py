@@ -22,6 +22,7 @@
 
 import os
 import lsst.log as log
+from lsst.ctrl.orca.FileWaitConnection import FileWaitConnection
 
 
 class FileWaiter:
@@ -37,12 +38,18 @@ class FileWaiter:
         name of the remote file list file
     logger: `Log`, optional
         lsst.log logging object
+    multiplex : `bool`, optional
+        wait through the shared `FileWaitConnection` to the remote node,
+        rather than a new gsissh session for each wait
+    shell : `list` of `str`, optional
+        the command the connection runs the remote file waiter with, if
+        multiplexed; see `FileWaitConnection`
 
     Notes
     -----
     Use of logger in this way should be deprecated in the future
     """
-    def __init__(self, remoteNode, remoteFileWaiter, fileListName, logger=None):
+    def __init__(self, remoteNode, remoteFileWaiter, fileListName, logger=None, multiplex=False, shell=None):
         log.debug("FileWaiter:__init__")
 
         self.remoteNode = remoteNode
@@ -51,11 +58,35 @@ class FileWaiter:
 
         self.remoteFileWaiter = remoteFileWaiter
 
+        self.multiplex = multiplex
+
+        self.shell = shell
+
+    def startWait(self, first=False):
+        """Start waiting for the files in the list, through the shared
+        connection to the remote node, without blocking
+
+        Parameters
+        ----------
+        first : `bool`, optional
+            wait only for the first file in the list
+
+        Returns
+        -------
+        wait : `FileWait`
+            the outstanding wait
+        """
+        connection = FileWaitConnection.get(self.remoteNode, self.remoteFileWaiter, self.shell)
+        return connection.submit("first" if first else "all", self.fileListName)
+
     def waitForFirstFile(self):
         """Waits for first file in the list to come into existence
         """
         log.debug("FileWaiter:waitForFirstFile")
         print("waiting for log file to be created to confirm launch.")
+        if self.multiplex:
+            self.startWait(first=True).wait()
+            return
         cmd = "gsissh %s %s -f %s" % (self.remoteNode, self.remoteFileWaiter, self.fileListName)
         pid = os.fork()
         if not pid:
@@ -68,6 +99,9 @@ class FileWaiter:
         log.debug("FileWaiter:waitForAllFiles")
 
         print("waiting for all log files to be created to confirm launch")
+        if self.multiplex:
+            self.startWait().wait()
+            return
         cmd = "gsissh %s %s -l %s" % (self.remoteNode, self.remoteFileWaiter, self.fileListName)
         pid = os.fork()
         if not pid:
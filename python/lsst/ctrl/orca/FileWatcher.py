@@ -0,0 +1,434 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+import lsst.log as log
+
+# inotify flags, from <sys/inotify.h>
+_IN_CREATE = 0x00000100
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# struct inotify_event: wd, mask, cookie and len, followed by len bytes of name
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """A minimal inotify instance, through ctypes
+
+    Parameters
+    ----------
+    libc : `ctypes.CDLL`
+        the C library
+
+    Notes
+    -----
+    Only file creation in the watched directories is reported.
+    """
+
+    def __init__(self, libc):
+        self._libc = libc
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    @classmethod
+    def create(cls):
+        """
+        Returns
+        -------
+        inotify : `_Inotify`
+            an inotify instance, or None if the platform doesn't have inotify
+        """
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            return cls(libc)
+        except (OSError, AttributeError) as e:
+            log.debug("FileWatcher: no inotify: %s" % e)
+            return None
+
+    def addWatch(self, directory):
+        """
+        Parameters
+        ----------
+        directory : `str`
+            the directory to watch for new files
+
+        Returns
+        -------
+        wd : `int`
+            the watch descriptor, or None if the directory can't be watched
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_CREATE | _IN_MOVED_TO)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error not in (errno.ENOENT, errno.ENOTDIR):
+                log.debug("FileWatcher: can't watch %s: %s" % (directory, os.strerror(error)))
+            return None
+        return wd
+
+    def removeWatch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self):
+        """Read the pending events
+
+        Returns
+        -------
+        events : `list` of (`int`, `str`)
+            the watch descriptor and file name of each file created; a
+            descriptor of None means events were lost
+        """
+        events = []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((None if mask & _IN_Q_OVERFLOW else wd, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Waits for files to be created
+
+    Parameters
+    ----------
+    paths : `list` of `str`, optional
+        the files to wait for
+    pollInterval : `float`, optional
+        seconds between scans of the directories of the files
+    useInotify : `bool`, optional
+        have the kernel report the files as they're created, where it can
+
+    Notes
+    -----
+    The files are grouped by directory, and each scan lists each directory
+    once, rather than looking for each file in turn.  With inotify the wait
+    for a file created on this host ends as soon as it's created; the
+    directories are still scanned every pollInterval, since inotify isn't
+    told of files created by other hosts on a shared filesystem.
+    """
+
+    def __init__(self, paths=(), pollInterval=1.0, useInotify=True):
+        self.pollInterval = pollInterval
+        # file names still to appear, by directory
+        self._pending = {}
+        self._inotify = _Inotify.create() if useInotify else None
+        # watched directories, by watch descriptor
+        self._watches = {}
+        self._watched = set()
+        self._rescan = False
+        self.add(paths)
+
+    def add(self, paths):
+        """Add files to wait for
+
+        Parameters
+        ----------
+        paths : `list` of `str`
+            the files
+        """
+        for path in paths:
+            directory, name = os.path.split(path)
+            self._pending.setdefault(directory or os.curdir, {})[name] = path
+
+    def pending(self):
+        """
+        Returns
+        -------
+        paths : `list` of `str`
+            the files which haven't appeared yet
+        """
+        return [path for names in self._pending.values() for path in names.values()]
+
+    def fileno(self):
+        """
+        Returns
+        -------
+        fd : `int`
+            the descriptor which becomes readable when a watched directory
+            has new files, for select(); None without inotify
+        """
+        return None if self._inotify is None else self._inotify.fd
+
+    def close(self):
+        """Stop watching the directories
+        """
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _found(self, directory, name):
+        names = self._pending.get(directory)
+        if names is None or name not in names:
+            return None
+        path = names.pop(name)
+        if not names:
+            del self._pending[directory]
+        return path
+
+    def _updateWatches(self):
+        if self._inotify is None:
+            return
+        for wd, directory in list(self._watches.items()):
+            if directory not in self._pending:
+                self._inotify.removeWatch(wd)
+                del self._watches[wd]
+                self._watched.discard(directory)
+        for directory in self._pending:
+            if directory not in self._watched:
+                wd = self._inotify.addWatch(directory)
+                if wd is not None:
+                    self._watches[wd] = directory
+                    self._watched.add(directory)
+
+    def scan(self):
+        """Look for the files which haven't appeared yet, once
+
+        Returns
+        -------
+        found : `list` of `str`
+            the files which have appeared
+        """
+        # watch before scanning, so no file can appear unnoticed in between
+        self._updateWatches()
+        self._rescan = False
+        found = []
+        for directory, names in list(self._pending.items()):
+            if len(names) == 1:
+                # no point listing a directory for one file
+                present = [name for name in names if os.path.exists(names[name])]
+            else:
+                try:
+                    with os.scandir(directory) as entries:
+                        present = [entry.name for entry in entries if entry.name in names]
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+            for name in present:
+                found.append(self._found(directory, name))
+        return found
+
+    def readEvents(self):
+        """Take the files the kernel reported as created, once the descriptor
+        is readable
+
+        Returns
+        -------
+        found : `list` of `str`
+            the files which have appeared
+        """
+        found = []
+        if self._inotify is None:
+            return found
+        for wd, name in self._inotify.read():
+            if wd is None:
+                # the kernel dropped events
+                self._rescan = True
+            elif wd in self._watches:
+                path = self._found(self._watches[wd], name)
+                if path is not None:
+                    found.append(path)
+        return found
+
+    def needsScan(self):
+        """
+        Returns
+        -------
+        rescan : `bool`
+            True if events were lost, and the directories should be scanned
+            without waiting for the poll interval
+        """
+        return self._rescan
+
+    def wait(self, timeout=None):
+        """Wait for all the files to appear
+
+        Parameters
+        ----------
+        timeout : `float`, optional
+            the most seconds to wait; no limit if None
+
+        Returns
+        -------
+        done : `bool`
+            True if all the files appeared, False if the wait timed out
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        try:
+            while True:
+                self.scan()
+                if not self._pending:
+                    return True
+                nextScan = time.time() + self.pollInterval
+                while self._pending and not self._rescan:
+                    now = time.time()
+                    if deadline is not None and now >= deadline:
+                        return False
+                    if now >= nextScan:
+                        break
+                    wakeup = nextScan if deadline is None else min(nextScan, deadline)
+                    if self._inotify is None:
+                        time.sleep(wakeup - now)
+                    elif select.select([self._inotify.fd], [], [], wakeup - now)[0]:
+                        self.readEvents()
+                if not self._pending:
+                    return True
+        finally:
+            self.close()
+
+
+class FileWaitServer:
+    """Serves requests to wait for files, read from a stream, answering on
+    another as the files appear
+
+    Parameters
+    ----------
+    inFile : file object
+        the stream the requests are read from; it must have a descriptor
+    outFile : file object
+        the stream the answers are written to
+    pollInterval : `float`, optional
+        seconds between scans of the directories of the files
+
+    Notes
+    -----
+    Each request is a line "<tag> <kind> <argument>", where the tag is chosen
+    by the client, and is one of
+
+    ``<tag> file <path>``
+        wait for the file
+    ``<tag> all <list file>``
+        wait for all the files named in the list file, one per line
+    ``<tag> first <list file>``
+        wait for the first file named in the list file
+
+    Each file of a request which appears is answered by a line
+    "<tag> appeared <path>", and then the request by "<tag> done", or by
+    "<tag> error <message>" if it can't be served.  Requests are served at
+    once, so many waits can be outstanding; the server ends at the end of
+    its input.  This is the remote end of a `FileWaitConnection`.
+    """
+
+    def __init__(self, inFile, outFile, pollInterval=1.0):
+        self.inFile = inFile
+        self.outFile = outFile
+        self.watcher = FileWatcher(pollInterval=pollInterval)
+        # files still to appear, by request tag
+        self._requests = {}
+        # tags of the requests waiting for each file
+        self._waiters = {}
+
+    def _answer(self, *fields):
+        print(" ".join(fields), file=self.outFile, flush=True)
+
+    def _request(self, line):
+        fields = line.split(" ", 2)
+        if len(fields) != 3:
+            self._answer(fields[0], "error", "malformed request")
+            return
+        tag, kind, argument = fields
+        if kind == "file":
+            paths = [argument]
+        elif kind in ("all", "first"):
+            try:
+                with open(argument, "r") as fileObj:
+                    paths = [path for path in fileObj.read().splitlines() if path]
+            except OSError as e:
+                self._answer(tag, "error", str(e))
+                return
+            if kind == "first":
+                paths = paths[:1]
+        else:
+            self._answer(tag, "error", "unknown request %s" % kind)
+            return
+        self._requests[tag] = set(paths)
+        for path in paths:
+            self._waiters.setdefault(path, set()).add(tag)
+        if not paths:
+            self._appeared([], [tag])
+        self.watcher.add(paths)
+
+    def _appeared(self, paths, tags=()):
+        done = list(tags)
+        for path in paths:
+            for tag in self._waiters.pop(path, ()):
+                self._answer(tag, "appeared", path)
+                remaining = self._requests[tag]
+                remaining.discard(path)
+                if not remaining:
+                    done.append(tag)
+        for tag in done:
+            del self._requests[tag]
+            self._answer(tag, "done")
+
+    def serve(self):
+        """Serve requests until the end of the input
+        """
+        inFd = self.inFile.fileno()
+        buffered = b""
+        nextScan = 0
+        try:
+            while True:
+                fds = [inFd]
+                if self.watcher.fileno() is not None:
+                    fds.append(self.watcher.fileno())
+                if time.time() >= nextScan or self.watcher.needsScan():
+                    self._appeared(self.watcher.scan())
+                    nextScan = time.time() + self.watcher.pollInterval
+                readable = select.select(fds, [], [], max(0, nextScan - time.time()))[0]
+                if self.watcher.fileno() in readable:
+                    self._appeared(self.watcher.readEvents())
+                if inFd in readable:
+                    data = os.read(inFd, 1 << 16)
+                    if not data:
+                        return
+                    lines = (buffered + data).split(b"\n")
+                    buffered = lines.pop()
+                    for line in lines:
+                        if line.strip():
+                            self._request(os.fsdecode(line.strip()))
+                    # look for the new files at once
+                    nextScan = 0
+        finally:
+            self.watcher.close()
@@ -0,0 +1,127 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import time
+
+import lsst.log as log
+
+
+class GlideinManager:
+    """Scales the glidein requests of a workflow to the jobs it has queued
+
+    Parameters
+    ----------
+    batch : object
+        the batch system glideins are requested from; it provides ``count()``,
+        the number of glidein requests, pending or active, ``submit(count)``,
+        which requests more, and ``retire(count)``, which cancels some,
+        pending ones first.  `CondorGlideinBatch` is the HTCondor one.
+    demand : callable
+        returns the number of "idle" and "running" jobs of the workflow, as a
+        `dict`, such as `CondorJobs.getDagJobCounts` does
+    glideinConfig : Config
+        glidein configuration: minGlideins and maxGlideins bound the number
+        of requests, slotsPerGlidein is the number of job slots a glidein
+        provides, and scaleDownDelay is the number of seconds demand has to
+        stay low before requests are retired.
+
+    Notes
+    -----
+    At each `step` the number of requests wanted is just enough to give every
+    idle and running job a slot, within the bounds.  More requests are
+    submitted as soon as they're wanted; requests are retired only once fewer
+    have been wanted for scaleDownDelay, so that a short lull in the workflow,
+    such as the gap while DAGMan runs a post script, doesn't drop glideins
+    that would have to be requested, and wait in the batch queue, again.
+    """
+
+    def __init__(self, batch, demand, glideinConfig):
+        self.batch = batch
+        self.demand = demand
+        self.minGlideins = glideinConfig.minGlideins
+        self.maxGlideins = glideinConfig.maxGlideins
+        self.slotsPerGlidein = max(1, glideinConfig.slotsPerGlidein)
+        self.scaleDownDelay = glideinConfig.scaleDownDelay
+
+        # when fewer requests than there are started being wanted
+        self._lowSince = None
+
+    def wanted(self, idle, running):
+        """The number of glidein requests wanted for a number of jobs
+
+        Parameters
+        ----------
+        idle : `int`
+            number of jobs waiting for a slot
+        running : `int`
+            number of jobs running
+
+        Returns
+        -------
+        count : `int`
+            the number of glidein requests wanted
+        """
+        needed = -(-(idle + running) // self.slotsPerGlidein)
+        return min(self.maxGlideins, max(self.minGlideins, needed))
+
+    def step(self, now=None):
+        """Submit or retire glidein requests to match the current demand
+
+        Parameters
+        ----------
+        now : `float`, optional
+            the current time; time.time() if None
+
+        Returns
+        -------
+        change : `int`
+            the number of requests submitted, or minus the number retired
+        """
+        if now is None:
+            now = time.time()
+        counts = self.demand()
+        target = self.wanted(counts["idle"], counts["running"])
+        current = self.batch.count()
+        change = 0
+        if target > current:
+            change = target - current
+            log.debug("GlideinManager: %d idle, %d running jobs: requesting %d more glideins" %
+                      (counts["idle"], counts["running"], change))
+            self.batch.submit(change)
+        if target >= current:
+            self._lowSince = None
+        elif self._lowSince is None:
+            self._lowSince = now
+        elif now - self._lowSince >= self.scaleDownDelay:
+            change = target - current
+            log.debug("GlideinManager: %d idle, %d running jobs: retiring %d glideins" %
+                      (counts["idle"], counts["running"], -change))
+            self.batch.retire(-change)
+            self._lowSince = None
+        return change
+
+    def shutdown(self):
+        """Retire all the glidein requests
+        """
+        count = self.batch.count()
+        if count:
+            self.batch.retire(count)
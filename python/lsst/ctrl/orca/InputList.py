@@ -0,0 +1,113 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+
+# decompressing openers, by file name suffix
+_openers = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def _openZstd(path, mode):
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("can't read %s: reading .zst input lists requires the zstandard module" % path)
+    return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+
+
+_openers[".zst"] = _openZstd
+
+
+def openInputList(path):
+    """Open an input list for reading as text, decompressing it if need be
+
+    Parameters
+    ----------
+    path : `str`
+        the input list; a name ending in .gz, .bz2, .xz or .zst (which needs
+        the zstandard module) is decompressed as it's read
+
+    Returns
+    -------
+    fileObj : file object
+        the input list, opened for reading text
+    """
+    opener = _openers.get(os.path.splitext(path)[1])
+    if opener is None:
+        return open(path, "r")
+    return opener(path, "rt")
+
+
+def readInputLines(path, chunkSize=1 << 16):
+    """Read the lines of an input list
+
+    Parameters
+    ----------
+    path : `str`
+        the input list, compressed or not (see `openInputList`)
+    chunkSize : `int`, optional
+        the number of bytes of an uncompressed list decoded at a time
+
+    Yields
+    ------
+    line : `str`
+        the next line, without its newline
+
+    Notes
+    -----
+    Compressed lists are streamed through the decompressor.  Uncompressed
+    lists are memory-mapped and decoded a chunk of whole lines at a time,
+    leaving the splitting of a chunk into lines to `str.split`, rather than
+    going through a file object's readline for every line.
+    """
+    if os.path.splitext(path)[1] in _openers:
+        with openInputList(path) as fileObj:
+            for line in fileObj:
+                yield line.rstrip("\n")
+        return
+    with open(path, "rb") as fileObj:
+        size = os.fstat(fileObj.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(fileObj.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = start + chunkSize
+                if end < size:
+                    # end the chunk after the last line that fits in it, or the
+                    # first line, if that doesn't fit
+                    newline = mm.rfind(b"\n", start, end)
+                    if newline < 0:
+                        newline = mm.find(b"\n", end)
+                    end = size if newline < 0 else newline + 1
+                else:
+                    end = size
+                lines = mm[start:end].decode().split("\n")
+                if lines[-1] == "":
+                    lines.pop()
+                yield from lines
+                start = end
@@ -0,0 +1,368 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import gzip
+import os
+import re
+import sqlite3
+
+from lsst.ctrl.orca.WorkerBatchRunner import splitBatch
+
+_VARS = re.compile(r'^VARS\s+(\S+)\s+(\w+)="(.*)"\s*$')
+_EVENT = re.compile(r'^(\d{3}) \((\d+)\.(\d+)\.(\d+)\)')
+_NODE = re.compile(r'^\s*DAG Node: (\S+)')
+_NORMAL = re.compile(r'Normal termination \(return value (-?\d+)\)')
+_ABNORMAL = re.compile(r'Abnormal termination \(signal (\d+)\)')
+
+
+def readDagVars(dagFile):
+    """Read the VARS of the nodes of a DAG
+
+    Parameters
+    ----------
+    dagFile : `str`
+        the DAG file
+
+    Returns
+    -------
+    nodeVars : `dict`
+        the variables (var1, var2, visit, ...) of each node, by node name
+    """
+    nodeVars = {}
+    with open(dagFile, "r") as fileObj:
+        for line in fileObj:
+            match = _VARS.match(line)
+            if match:
+                node, name, value = match.groups()
+                nodeVars.setdefault(node, {})[name] = value
+    return nodeVars
+
+
+def readNodeStatuses(nodesLog):
+    """Find out how the jobs of the nodes of a DAG ended, from its job event log
+
+    Parameters
+    ----------
+    nodesLog : `str`
+        the event log DAGMan has its node jobs write, <dag file>.nodes.log
+
+    Returns
+    -------
+    statuses : `dict`
+        the exit status of the last job of each node which has ended, by node
+        name: its return value, minus the signal which killed it, or None if
+        the job was removed from the queue
+    """
+    statuses = {}
+    if not os.path.exists(nodesLog):
+        return statuses
+    nodes = {}
+    event = None
+    job = None
+    with open(nodesLog, "r", errors="replace") as fileObj:
+        for line in fileObj:
+            match = _EVENT.match(line)
+            if match:
+                event = match.group(1)
+                job = match.group(2, 3)
+                if event == "009" and job in nodes:
+                    # job aborted
+                    statuses[nodes[job]] = None
+                continue
+            if line.startswith("..."):
+                event = None
+                continue
+            if event == "000":
+                match = _NODE.match(line)
+                if match:
+                    nodes[job] = match.group(1)
+            elif event == "005" and job in nodes:
+                match = _NORMAL.search(line)
+                if match:
+                    statuses[nodes[job]] = int(match.group(1))
+                match = _ABNORMAL.search(line)
+                if match:
+                    statuses[nodes[job]] = -int(match.group(1))
+    return statuses
+
+
+class LogIndex:
+    """The index of the worker logs packed by a LogAggregator
+
+    Parameters
+    ----------
+    path : `str`
+        the index database; it's created if it doesn't exist
+
+    Notes
+    -----
+    Each data id maps to the node which ran it, the archive its log was
+    packed into, the offset and length of its gzip member in the archive,
+    the exit status of the node and the last lines of its log.  The ids of
+    a node that ran a batch all map to the node's log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS logs (dataId TEXT PRIMARY KEY, node TEXT, "
+                         "archive TEXT, offset INTEGER, length INTEGER, status INTEGER, tail TEXT)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS logsByStatus ON logs (status)")
+
+    def close(self):
+        self._db.close()
+
+    def add(self, entries):
+        """Add entries to the index, replacing those of the same ids
+
+        Parameters
+        ----------
+        entries : `list` of `dict`
+            the dataId, node, archive, offset, length, status and tail of
+            each entry
+        """
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO logs VALUES (:dataId, :node, :archive, :offset, "
+                                 ":length, :status, :tail)", entries)
+
+    def _entries(self, cursor):
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def lookup(self, dataId):
+        """
+        Parameters
+        ----------
+        dataId : `str`
+            a data id
+
+        Returns
+        -------
+        entry : `dict`
+            the index entry of the data id, or None
+        """
+        entries = self._entries(self._db.execute("SELECT * FROM logs WHERE dataId = ?",
+                                                 (" ".join(dataId.split()),)))
+        return entries[0] if entries else None
+
+    def countFailures(self):
+        """
+        Returns
+        -------
+        count : `int`
+            the number of ids whose node failed or was removed
+        """
+        return self._db.execute("SELECT COUNT(*) FROM logs WHERE status IS NULL OR status != 0").fetchone()[0]
+
+    def failures(self, limit=None, offset=0):
+        """
+        Parameters
+        ----------
+        limit : `int`, optional
+            the most entries to return
+        offset : `int`, optional
+            the number of entries to skip
+
+        Returns
+        -------
+        entries : `list` of `dict`
+            the entries of the ids whose node failed or was removed
+        """
+        query = "SELECT * FROM logs WHERE status IS NULL OR status != 0 ORDER BY node, dataId"
+        if limit is not None:
+            query += " LIMIT %d" % int(limit)
+        elif offset:
+            query += " LIMIT -1"
+        if offset:
+            query += " OFFSET %d" % int(offset)
+        return self._entries(self._db.execute(query))
+
+    def read(self, entry):
+        """Read the whole packed log of an entry
+
+        Parameters
+        ----------
+        entry : `dict`
+            an index entry
+
+        Returns
+        -------
+        text : `str`
+            the log
+        """
+        archive = os.path.join(os.path.dirname(self.path), entry["archive"])
+        with open(archive, "rb") as fileObj:
+            fileObj.seek(entry["offset"])
+            return gzip.decompress(fileObj.read(entry["length"])).decode(errors="replace")
+
+
+class LogAggregator:
+    """Packs the logs of the finished worker jobs of a run into per visit archives
+
+    Parameters
+    ----------
+    stagingDir : `str`
+        the local staging directory of the run, which the DAGs were submitted from
+    tailLines : `int`, optional
+        the number of lines at the end of a log to keep in the index
+    dagFiles : `list` of `str`, optional
+        the DAGs whose nodes' logs to pack; all those in the staging
+        directory if None
+    splices : `list` of (`str`, `str`), optional
+        for a workflow of several tasks, the name of each splice of the DAGs
+        and the DAG file spliced in, as in `DagPlan.splices`
+
+    Notes
+    -----
+    The stdout and stderr of a worker job, logs/<visit>/worker-<var2>.out and
+    .err, are packed together, as one gzip member, into the archive
+    logs/<visit>.logs.gz, and then removed; the archive is a valid gzip file
+    of all its logs, and each log can be read on its own from its offset.
+    The index, logs/index.sqlite3, is a `LogIndex`.
+
+    The nodes of a splice run in the directory of its DAG file, so their
+    logs are found under that directory, and packed into
+    logs/<splice>/<visit>.logs.gz.  They're named <splice>+<node> in the
+    event log of the DAG they're spliced into, and in the index, which is
+    shared by all the splices.
+    """
+
+    # where the worker submit files put the logs, relative to the staging directory
+    logPattern = os.path.join("logs", "%(visit)s", "worker-%(var2)s")
+
+    def __init__(self, stagingDir, tailLines=10, dagFiles=None, splices=None):
+        self.stagingDir = stagingDir
+        self.tailLines = tailLines
+        self.dagFiles = dagFiles
+        self.splices = splices
+        self.logDir = os.path.join(stagingDir, "logs")
+
+    def getIndexPath(self):
+        """
+        Returns
+        -------
+        path : `str`
+            the index database of the run
+        """
+        return os.path.join(self.logDir, "index.sqlite3")
+
+    def findDagFiles(self):
+        """
+        Returns
+        -------
+        dagFiles : `list` of `str`
+            the DAG files in the staging directory
+        """
+        return sorted(os.path.join(self.stagingDir, name) for name in os.listdir(self.stagingDir)
+                      if name.endswith(".dag"))
+
+    def _tail(self, data):
+        lines = data.decode(errors="replace").splitlines()
+        return "\n".join(lines[-self.tailLines:])
+
+    def aggregate(self, dagFiles=None):
+        """Pack the logs of the worker jobs which have ended
+
+        Parameters
+        ----------
+        dagFiles : `list` of `str`, optional
+            the DAGs whose nodes' logs to pack; those the aggregator was
+            given if None
+
+        Returns
+        -------
+        count : `int`
+            the number of node logs packed
+        """
+        if dagFiles is None:
+            dagFiles = self.dagFiles
+        if dagFiles is None:
+            dagFiles = self.findDagFiles()
+        os.makedirs(self.logDir, exist_ok=True)
+        index = LogIndex(self.getIndexPath())
+        count = 0
+        try:
+            for dagFile in dagFiles:
+                count += self._aggregateDag(dagFile, index)
+        finally:
+            index.close()
+        return count
+
+    def _aggregateDag(self, dagFile, index):
+        statuses = readNodeStatuses(dagFile + ".nodes.log")
+        if not self.splices:
+            return self._pack(readDagVars(dagFile), statuses, self.stagingDir, "", index)
+        count = 0
+        for name, spliceFile in self.splices:
+            prefix = name + "+"
+            nodeVars = {prefix + node: variables for node, variables in readDagVars(spliceFile).items()}
+            count += self._pack(nodeVars, statuses, os.path.dirname(spliceFile), name, index)
+        return count
+
+    def _pack(self, nodeVars, statuses, stagingDir, archiveDir, index):
+        os.makedirs(os.path.join(self.logDir, archiveDir), exist_ok=True)
+        archives = {}
+        entries = []
+        packed = []
+        try:
+            for node, status in statuses.items():
+                variables = nodeVars.get(node)
+                if variables is None or "var1" not in variables:
+                    # not a worker node
+                    continue
+                base = os.path.join(stagingDir, self.logPattern % variables)
+                paths = [path for path in (base + ".out", base + ".err") if os.path.exists(path)]
+                if not paths:
+                    # packed already, or the job never started
+                    continue
+                out = b""
+                err = b""
+                if os.path.exists(base + ".out"):
+                    with open(base + ".out", "rb") as fileObj:
+                        out = fileObj.read()
+                if os.path.exists(base + ".err"):
+                    with open(base + ".err", "rb") as fileObj:
+                        err = fileObj.read()
+                archiveName = os.path.join(archiveDir, "%s.logs.gz" % variables.get("visit", "all"))
+                archive = archives.get(archiveName)
+                if archive is None:
+                    archive = open(os.path.join(self.logDir, archiveName), "ab")
+                    archives[archiveName] = archive
+                member = gzip.compress(b"==> stdout <==\n" + out + b"\n==> stderr <==\n" + err)
+                offset = archive.tell()
+                archive.write(member)
+                tail = self._tail(err if err.strip() else out)
+                for dataId in splitBatch(variables["var1"].split()):
+                    entries.append({"dataId": dataId, "node": node, "archive": archiveName,
+                                    "offset": offset, "length": len(member), "status": status,
+                                    "tail": tail})
+                packed.extend(paths)
+        finally:
+            for archive in archives.values():
+                archive.flush()
+                os.fsync(archive.fileno())
+                archive.close()
+        # the logs are only removed once the index has them
+        index.add(entries)
+        for path in packed:
+            os.remove(path)
+        return len(set(entry["node"] for entry in entries))
@@ -20,31 +20,133 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
+import importlib
+import inspect
+import threading
+
+import lsst.log as log
+
 
 class NamedClassFactory:
     """Create a new "name" class object
 
-    Parameters
-    ----------
-    name : `str`
-        the fully qualified nname of an object
+    Notes
+    -----
+    A name is either the alias of a plugin or the fully qualified name of a
+    class, such as "lsst.ctrl.orca.CondorWorkflowConfigurator.CondorWorkflowConfigurator".
+    The name of a module which defines a class of the same name, such as
+    "lsst.ctrl.orca.CondorWorkflowConfigurator", names that class too.
+
+    The aliases of the plugins that come with orca are in ``builtinPlugins``;
+    other packages add theirs as setuptools entry points in the
+    "lsst.ctrl.orca.plugins" group.  The entry points are only looked up the
+    first time an alias which isn't built in is asked for.
 
-    Returns
-    -------
-    classobj : `object`
-        an object of the specified name
+    Each class is resolved once per process, and shared by all the factories,
+    which may be used from several threads at once.
     """
 
+    # the entry point group of the plugins of other packages
+    entryPointGroup = "lsst.ctrl.orca.plugins"
+
+    # the aliases of the plugins that come with orca
+    builtinPlugins = {
+        "condor": "lsst.ctrl.orca.CondorWorkflowConfigurator.CondorWorkflowConfigurator",
+        "pegasus": "lsst.ctrl.orca.PegasusWorkflowConfigurator.PegasusWorkflowConfigurator",
+    }
+
+    _classes = {}
+    _entryPoints = None
+    _lock = threading.RLock()
+
     def createClass(self, name):
-        dot = name.rindex('.')
-        pack = name[0:dot]
-        modname = name[dot+1:]
-        # -1 is no longer accepted in python 3
-        # module = __import__(name, globals(), locals(), [modname], -1)
-        module = __import__(name, globals(), locals(), [modname], 0)
-        classobj = getattr(module, modname)
+        """Resolve a class by name
+
+        Parameters
+        ----------
+        name : `str`
+            the alias of a plugin, or the fully qualified name of a class
+
+        Returns
+        -------
+        classobj : `type`
+            the class of the specified name
+
+        Raises
+        ------
+        `RuntimeError`
+            if there's no class of that name
+        """
+        classobj = self._classes.get(name)
+        if classobj is not None:
+            return classobj
+        with self._lock:
+            classobj = self._classes.get(name)
+            if classobj is None:
+                classobj = self._resolve(name)
+                self._classes[name] = classobj
+        return classobj
+
+    @classmethod
+    def _resolve(cls, name):
+        if name in cls.builtinPlugins:
+            return cls._importClass(cls.builtinPlugins[name])
+        if "." in name:
+            return cls._importClass(name)
+
+        entryPoint = cls._getEntryPoints().get(name)
+        if entryPoint is None:
+            raise RuntimeError("Attempt to instantiate class \"" + name +
+                               "\" failed. There's no plugin of that name.")
+        log.debug("NamedClassFactory: loading plugin %s from %s" % (name, entryPoint.value))
+        try:
+            classobj = entryPoint.load()
+        except Exception as e:
+            raise RuntimeError("Attempt to instantiate class \"" + name +
+                               "\" failed. Could not load plugin %s: %s" % (entryPoint.value, e)) from e
+        if inspect.ismodule(classobj):
+            classobj = cls._classOfModule(classobj, name)
+        return classobj
+
+    @classmethod
+    def _importClass(cls, name):
+        moduleName, _, className = name.rpartition(".")
+        try:
+            classobj = getattr(importlib.import_module(moduleName), className, None)
+            # the package may have the module of that name as an attribute
+            if inspect.ismodule(classobj):
+                classobj = getattr(classobj, className, None)
+            if classobj is None:
+                classobj = cls._classOfModule(importlib.import_module(name), name)
+        except ImportError as e:
+            raise RuntimeError("Attempt to instantiate class \"" + name +
+                               "\" failed. Could not import it: %s" % e) from e
+        return classobj
+
+    @staticmethod
+    def _classOfModule(module, name):
+        classobj = getattr(module, module.__name__.rpartition(".")[2], None)
         if classobj is None:
             raise RuntimeError("Attempt to instantiate class \"" + name +
                                "\" failed. Could not find that class.")
-
         return classobj
+
+    @classmethod
+    def _getEntryPoints(cls):
+        with cls._lock:
+            if cls._entryPoints is None:
+                from importlib import metadata
+                entryPoints = metadata.entry_points()
+                if hasattr(entryPoints, "select"):
+                    group = entryPoints.select(group=cls.entryPointGroup)
+                else:
+                    group = entryPoints.get(cls.entryPointGroup, [])
+                plugins = {}
+                for entryPoint in group:
+                    if entryPoint.name in cls.builtinPlugins:
+                        log.warn("NamedClassFactory: ignoring plugin %s from %s: it's built in" %
+                                 (entryPoint.name, entryPoint.value))
+                        continue
+                    plugins.setdefault(entryPoint.name, entryPoint)
+                cls._entryPoints = plugins
+            return cls._entryPoints
@@ -35,13 +35,16 @@ class PegasusJobs(CondorJobs):
         log.debug("PegasusJobs:__init__")
         return
 
-    def pegasusSubmitDax(self, sitesFile, transformationFile, daxFile):
+    def pegasusSubmitDax(self, sitesFile, transformationFile, daxFile, cwd=None):
         """Submit a pegagus dax and return its cluster number
 
         Parameters
         ----------
         daxFile : `str`
             name of pegasus DAX file
+        cwd : `str`, optional
+            directory to plan the workflow in, which its output and submit
+            directories are created in; the current directory if not given
         """
         log.debug("PegasusJobs: pegasusSubmitDax %s", daxFile)
         """
@@ -92,7 +95,7 @@ class PegasusJobs(CondorJobs):
                % (sitesFile, transformationFile, daxFile))
         print(cmd)
         log.debug(cmd)
-        process = subprocess.Popen(cmd.split(), shell=False, stdout=subprocess.PIPE)
+        process = subprocess.Popen(cmd.split(), shell=False, stdout=subprocess.PIPE, cwd=cwd)
         output = []
         line = process.stdout.readline()
         line = line.decode()
@@ -20,17 +20,17 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-import sys
 import os
 import os.path
-from shutil import copy
+import subprocess
 
 import lsst.log as log
 
+import lsst.ctrl.orca as orca
 from lsst.ctrl.orca.EnvString import EnvString
+from lsst.ctrl.orca.exceptions import ConfigurationError
 from lsst.ctrl.orca.WorkflowConfigurator import WorkflowConfigurator
 from lsst.ctrl.orca.PegasusWorkflowLauncher import PegasusWorkflowLauncher
-from lsst.ctrl.orca.TemplateWriter import TemplateWriter
 
 ##
 #
@@ -97,6 +97,9 @@ class PegasusWorkflowConfigurator(WorkflowConfigurator):
         # default root for the production
         self.defaultRoot = wfConfig.platform.dir.defaultRoot
 
+        # cache the staged files are shared through
+        self.stagingCache = None
+
     def configure(self, provSetup, wfVerbosity):
         """Setup as much as possible in preparation to execute the workflow
            and return a WorkflowLauncher object that will launch the
@@ -121,10 +124,13 @@ class PegasusWorkflowConfigurator(WorkflowConfigurator):
     def _configureSpecialized(self, provSetup, wfConfig):
         log.debug("PegasusWorkflowConfigurator:configure")
 
+        if orca.rerun:
+            raise ConfigurationError("rerunning failed nodes is only supported for HTCondor DAG workflows")
+
         localConfig = wfConfig.configuration["pegasus"]
 
         # local scratch directory
-        self.localScratch = localConfig.condorData.localScratch
+        self.localScratch = self.getLocalScratch(localConfig.condorData.localScratch)
 
         # platformConfig = wfConfig.platform
         taskConfigs = wfConfig.task
@@ -132,16 +138,13 @@ class PegasusWorkflowConfigurator(WorkflowConfigurator):
         # local staging directory
         self.localStagingDir = os.path.join(self.localScratch, self.runid)
         os.makedirs(self.localStagingDir)
+        self.stagingCache = self.createStagingCache(localConfig.condorData)
 
         # write the glidein file
-        startDir = os.getcwd()
-        os.chdir(self.localStagingDir)
-
         if localConfig.glidein.template.inputFile is not None:
             self.writeGlideinFile(localConfig.glidein)
         else:
             log.debug("PegasusWorkflowConfigurator: not writing glidein file")
-        os.chdir(startDir)
 
         # TODO - fix this loop for multiple condor submits; still working
         # out what this might mean.
@@ -151,63 +154,42 @@ class PegasusWorkflowConfigurator(WorkflowConfigurator):
             # script directory
             self.scriptDir = task.scriptDir
 
-            # save initial directory we were called from so we can get back
-            # to it
-            startDir = os.getcwd()
-
-            # switch to staging directory
-            os.chdir(self.localStagingDir)
-
-            # switch to tasks directory in staging directory
+            # tasks directory in staging directory
             scriptDir = os.path.join(self.localStagingDir, task.scriptDir)
             os.makedirs(scriptDir)
-            os.chdir(scriptDir)
 
-            # set configuration
-            task.generator.name = "dax"
-            generatorConfig = task.generator.active
+            # the configs are frozen; pick the generator rather than selecting it
+            generatorConfig = task.generator["dax"]
 
             # generate sites file
 
             sitesTemplate = EnvString.resolve(generatorConfig.sites.inputFile)
             sitesOutputFile = EnvString.resolve(generatorConfig.sites.outputFile)
             keywords = generatorConfig.sites.keywords
-            self.writeSitesXML(sitesOutputFile, sitesTemplate, keywords)
             sitesXMLFile = os.path.join(scriptDir, sitesOutputFile)
+            self.writeSitesXML(sitesXMLFile, sitesTemplate, keywords)
 
             # copy transform file
             transform = EnvString.resolve(generatorConfig.transformFile)
-            copy(transform, scriptDir)
-            transformFile = os.path.join(scriptDir, transform)
+            transformFile = self.stageFile(transform, scriptDir)
 
             # generate dax
             daxScript = EnvString.resolve(generatorConfig.script)
-            copy(daxScript, scriptDir)
-            daxGenerator = os.path.join(scriptDir, os.path.basename(generatorConfig.script))
+            daxGenerator = self.stageFile(daxScript, scriptDir)
 
             log.debug("PegasusWorkflowConfigurator:configure: generate dax")
             daxGeneratorInput = EnvString.resolve(generatorConfig.inputFile)
 
-            # change into the local staging area to create the DAX file, and its output
-            os.chdir(self.localStagingDir)
+            # create the DAX file, and its output, in the local staging area
             daxCreatorCmd = [daxGenerator, "-i", daxGeneratorInput, "-o", "output.dax"]
 
-            pid = os.fork()
-            if not pid:
-                # turn off all output from this command
-                sys.stdin.close()
-                sys.stdout.close()
-                sys.stderr.close()
-                os.close(0)
-                os.close(1)
-                os.close(2)
-                os.execvp(daxCreatorCmd[0], daxCreatorCmd)
-            os.wait()[0]
+            # turn off all output from this command
+            subprocess.run(daxCreatorCmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, cwd=self.localStagingDir)
 
             # create dax log directories ?
 
-            # change back to initial directory
-            os.chdir(startDir)
+        self.cleanStagingCache(localConfig.condorData)
 
         # create the Launcher
 
@@ -237,8 +219,7 @@ class PegasusWorkflowConfigurator(WorkflowConfigurator):
             pairs[value] = val
         pairs["ORCA_RUNID"] = self.runid
         pairs["ORCA_DEFAULTROOT"] = self.defaultRoot
-        writer = TemplateWriter()
-        writer.rewrite(template, outputFile, pairs)
+        self.writeTemplate(template, outputFile, pairs)
 
     def getWorkflowName(self):
         """get the workflow name
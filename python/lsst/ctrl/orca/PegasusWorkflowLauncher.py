@@ -20,7 +20,6 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-import os
 import lsst.log as log
 from lsst.ctrl.orca.WorkflowLauncher import WorkflowLauncher
 from lsst.ctrl.orca.PegasusJobs import PegasusJobs
@@ -76,20 +75,16 @@ class PegasusWorkflowLauncher(WorkflowLauncher):
 
         # start the monitor
 
-        # Launch process
-        startDir = os.getcwd()
-        os.chdir(self.localStagingDir)
-
+        # Launch process, from the staging directory
         pj = PegasusJobs()
         condorDagId, statusInfo, removeInfo = pj.pegasusSubmitDax(self.sitesXMLFile, self.transformFile,
-                                                                  self.daxFile)
+                                                                  self.daxFile, cwd=self.localStagingDir)
         if statusInfo is not None:
             print("Pegasus workspace: %s" % statusInfo[0])
 
-        os.chdir(startDir)
-
         # workflow monitor for HTCondor jobs
-        self.workflowMonitor = CondorWorkflowMonitor(condorDagId, self.monitorConfig)
+        self.workflowMonitor = CondorWorkflowMonitor(condorDagId, self.monitorConfig,
+                                                     self.wfConfig.shortName)
 
         if statusListener is not None:
             self.workflowMonitor.addStatusListener(statusListener)
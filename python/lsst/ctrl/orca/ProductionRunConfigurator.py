@@ -20,10 +20,11 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
+from lsst.ctrl.orca.ConfigCache import ConfigCache
 from lsst.ctrl.orca.NamedClassFactory import NamedClassFactory
 from lsst.ctrl.orca.WorkflowManager import WorkflowManager
-from lsst.ctrl.orca.config.ProductionConfig import ProductionConfig
 from lsst.ctrl.orca.exceptions import MultiIssueConfigurationError
+import lsst.ctrl.orca as orca
 import lsst.log as log
 
 
@@ -42,6 +43,9 @@ class ProductionRunConfigurator:
         verbosity level of the workflow
     """
 
+    # the production config class, by name, so it's only imported if a config file has to be loaded
+    configClassName = "lsst.ctrl.orca.config.ProductionConfig.ProductionConfig"
+
     def __init__(self, runid, configFile, repository=None, workflowVerbosity=None):
 
         log.debug("ProductionRunConfigurator:__init__")
@@ -51,9 +55,8 @@ class ProductionRunConfigurator:
 
         self._prodConfigFile = configFile
 
-        # production configuration
-        self.prodConfig = ProductionConfig()
-        self.prodConfig.load(configFile)
+        # production configuration, shared with the production run manager
+        self.prodConfig = ConfigCache.load(self.configClassName, configFile)
 
         # location of the repository
         self.repository = repository
@@ -131,6 +134,9 @@ class ProductionRunConfigurator:
         # later.
         #
         databaseConfigs = self.prodConfig.database
+        if orca.dryrun:
+            log.info("dry run: not setting up the production databases")
+            databaseConfigs = {}
 
         for databaseName in databaseConfigs:
             databaseConfig = databaseConfigs[databaseName]
@@ -239,4 +245,4 @@ class ProductionRunConfigurator:
         names : [ 'wfName1', 'wfName2' ]
             list of strings with named workflows
         """
-        return self.prodConfig.workflowNames
+        return list(self.prodConfig.workflow)
@@ -22,30 +22,22 @@
 
 import os
 import os.path
-import socket
 import threading
 import time
-from lsst.ctrl.orca.config.ProductionConfig import ProductionConfig
+from lsst.ctrl.orca.ConfigCache import ConfigCache
 from lsst.ctrl.orca.NamedClassFactory import NamedClassFactory
 from lsst.ctrl.orca.StatusListener import StatusListener
+from lsst.ctrl.orca.StatusBroadcaster import StatusBroadcaster
+from lsst.ctrl.orca.RunJournal import RunJournal
+import lsst.ctrl.orca as orca
 import lsst.log as log
-from http.server import HTTPServer
-from socketserver import ThreadingMixIn
-from .ServiceHandler import ServiceHandler
 
 from .EnvString import EnvString
 from .exceptions import ConfigurationError
 from .exceptions import MultiIssueConfigurationError
 from .multithreading import SharedData
 from .ProductionRunConfigurator import ProductionRunConfigurator
-
-
-def MakeServiceHandlerClass(productionRunManager, runid):
-    class CustomHandler(ServiceHandler, object):
-        def __init__(self, *args, **kwargs):
-            self.setParent(productionRunManager, runid)
-            super(CustomHandler, self).__init__(*args, **kwargs)
-    return CustomHandler
+from .StartupProfile import phase
 
 
 class ProductionRunManager:
@@ -77,6 +69,9 @@ class ProductionRunManager:
         # a list of workflow Monitors
         self._workflowMonitors = []
 
+        # fans out status events from the workflow monitors to remote subscribers
+        self._statusBroadcaster = StatusBroadcaster()
+
         # the cached ProductionRunConfigurator instance
         self._productionRunConfigurator = None
 
@@ -87,10 +82,10 @@ class ProductionRunManager:
         else:
             self.fullConfigFilePath = os.path.join(os.path.realpath('.'), configFileName)
 
-        # create Production configuration
-        self.config = ProductionConfig()
-        # load the production config object
-        self.config.load(self.fullConfigFilePath)
+        # the production config, shared with the configurators
+        with phase("config load"):
+            self.config = ConfigCache.load(ProductionRunConfigurator.configClassName,
+                                           self.fullConfigFilePath)
 
         # the repository location
         self.repository = repository
@@ -201,14 +196,16 @@ class ProductionRunManager:
 
             # configure the production run (if it hasn't been already)
             if not self._productionRunConfigurator:
-                self.configure(workflowVerbosity)
+                with phase("configure"):
+                    self.configure(workflowVerbosity)
 
             # make sure the configuration was successful.
             if not self._workflowManagers:
                 raise ConfigurationError("Failed to obtain workflowManagers from configurator")
 
             if not skipConfigCheck:
-                self.checkConfiguration(checkCare)
+                with phase("config check"):
+                    self.checkConfiguration(checkCare)
 
             # TODO - Re-add when Provenance is complete
             # provSetup = self._productionRunConfigurator.getProvenanceSetup()
@@ -218,18 +215,141 @@ class ProductionRunManager:
             for workflow in self._workflowManagers["__order"]:
                 mgr = self._workflowManagers[workflow.getName()]
 
-                statusListener = StatusListener()
-                # this will block until the monitor is created.
-                monitor = mgr.runWorkflow(statusListener)
+                with phase("launch %s" % mgr.getName()):
+                    statusListener = StatusListener(self._statusBroadcaster)
+                    # this will block until the monitor is created.
+                    monitor = mgr.runWorkflow(statusListener)
+                    self._workflowMonitors.append(monitor)
+
+                    # journal the launch, so a later "orca.py --resume" can find this workflow again
+                    journal = RunJournal(mgr.getLocalStagingDir())
+                    journal.recordLaunch(mgr.getName(), monitor, mgr.getWorkflowLauncher())
+                    monitor.addStatusListener(journal)
+
+        finally:
+            self._locked.release()
+
+        with phase("control server"):
+            self._startServiceThread()
+
+        print("Production launched.")
+        print("Waiting for shutdown request.")
+
+    def planProduction(self, workflowVerbosity=None):
+        """Configure the production as a dry run, and describe what running it would do
+
+        Parameters
+        ----------
+        workflowVerbosity : `int`, optional
+            overrides the config-specified logger verbosity
+
+        Returns
+        -------
+        plans : `list` of (`str`, `list`)
+            the name of each workflow, and its plan: (item, description)
+            pairs, or None if the workflow can't be planned
+
+        Notes
+        -----
+        Nothing is submitted; lsst.ctrl.orca.dryrun must be set, so that the
+        workflows are staged in a temporary directory rather than their own,
+        and no databases are set up.
+        """
+        log.debug("Planning production: %s", self.runid)
+
+        if not orca.dryrun:
+            raise ConfigurationError("a production can only be planned in a dry run")
+        with phase("configure"):
+            self.configure(workflowVerbosity)
+        if not self._workflowManagers:
+            raise ConfigurationError("Failed to obtain workflowManagers from configurator")
+        with phase("plan"):
+            return [(wfm.getName(), wfm.planWorkflow()) for wfm in self._workflowManagers["__order"]]
+
+    def resumeProduction(self):
+        """Reattach to the workflows of this production after the orca process that launched them died
+
+        Returns
+        -------
+        resumed : `bool`
+            True if at least one workflow was still running and is now monitored again
+
+        Notes
+        -----
+        The launch records in each workflow's journal are used to reattach
+        monitors to the jobs that are already running, and the service
+        endpoint is restarted.  Nothing is configured or submitted.
+        """
+        log.debug("Resuming production: %s", self.runid)
+
+        if not self.isRunnable():
+            log.info("Production Run %s is already running or done" % self.runid)
+            return False
+
+        try:
+            self._locked.acquire()
+
+            configurator = self.createConfigurator(self.runid, self.fullConfigFilePath)
+            self._workflowManagers = {"__order": []}
+            for wfName in self.config.workflow:
+                wfConfig = self.config.workflow[wfName]
+                mgr = configurator.createWorkflowManager(self.config, wfName, wfConfig)
+
+                journal = RunJournal(mgr.getLocalStagingDir())
+                launch = journal.getResumableLaunch()
+                if launch is None:
+                    log.info("workflow %s: nothing to resume in %s" % (wfName, journal.path))
+                    continue
+
+                statusListener = StatusListener(self._statusBroadcaster)
+                monitor = mgr.resumeWorkflow(statusListener, launch)
+                monitor.addStatusListener(journal)
+                journal.append("resume", workflow=mgr.getName(), jobId=launch["jobId"])
+                print("Reattached workflow %s to job %s" % (wfName, launch["jobId"]))
+
                 self._workflowMonitors.append(monitor)
+                self._workflowManagers["__order"].append(mgr)
+                self._workflowManagers[mgr.getName()] = mgr
 
+            if not self._workflowMonitors:
+                return False
+            self._locked.running = True
         finally:
             self._locked.release()
 
         self._startServiceThread()
 
-        print("Production launched.")
+        print("Production resumed.")
         print("Waiting for shutdown request.")
+        return True
+
+    def getStatusBroadcaster(self):
+        """Accessor to the broadcaster of workflow status events for this production
+
+        Returns
+        -------
+        broadcaster : `StatusBroadcaster`
+            the broadcaster which all workflow status listeners publish to
+        """
+        return self._statusBroadcaster
+
+    def getLogIndexPaths(self):
+        """Accessor to the worker log indexes of the workflows of this production
+
+        Returns
+        -------
+        paths : `list` of `str`
+            the log index of each workflow which has one
+        """
+        from lsst.ctrl.orca.LogAggregator import LogAggregator
+
+        paths = []
+        if self._workflowManagers:
+            for workflow in self._workflowManagers["__order"]:
+                path = LogAggregator(workflow.getLocalStagingDir()).getIndexPath()
+                if os.path.exists(path):
+                    paths.append(path)
+        return paths
 
     def isRunning(self):
         """Determine whether production is currently running
@@ -417,12 +537,11 @@ class ProductionRunManager:
         passed by getWorkflowManager().   "Short" names are aliases to the workflows.
         """
         if self._workflowManagers:
-            return self._workflowManagers["__order"]
+            return [wfm.getName() for wfm in self._workflowManagers["__order"]]
         elif self._productionRunConfigurator:
             return self._productionRunConfigurator.getWorkflowNames()
         else:
-            cfg = self.createConfigurator(self.fullConfigFilePath)
-            return cfg.getWorkflowNames()
+            return list(self.config.workflow)
 
     def getWorkflowManager(self, name):
         """Accessor to return the named WorkflowManager
@@ -443,57 +562,36 @@ class ProductionRunManager:
             return None
         return self._workflowManagers[name]
 
-    class ThreadedServer(ThreadingMixIn, HTTPServer):
-        """ threaded server """
-        def server_bind(self):
-            HTTPServer.server_bind(self)
-
-        def setManager(self, manager):
-            self.manager = manager
-            self.socket.settimeout(1)
-
-        def serve(self):
-            while self.manager.isRunning():
-                self.handle_request()
-
     class _ServiceEndpoint(threading.Thread):
         """This thread deals with incoming requests, and if one is received during production, we
            shut everything down.
 
         Parameters
         ----------
-        parent : `Thread`
-            The parent Thread of this Thread.
+        parent : `ProductionRunManager`
+            The production this endpoint serves.
         runid : `str`
             run id
-        pollingIntv : `float`
-            the polling interval to sleep, in seconds.
-        listenTimeout : `int`
-            the interval, in seconds, to wait for an incoming request
 
         Notes
         -----
-        This is a private class.
+        This is a private class.  The thread ends as soon as the production is no longer running.
         """
-        def __init__(self, parent, runid, pollingIntv=1.0, listenTimeout=10):
+        def __init__(self, parent, runid):
             threading.Thread.__init__(self)
             self.setDaemon(True)
             self._runid = runid
             self._parent = parent
-            self._pollintv = pollingIntv
-            self._timeout = listenTimeout
 
-            handlerClass = MakeServiceHandlerClass(parent, runid)
-            self.server = parent.ThreadedServer(('0.0.0.0', 0), handlerClass)
-            self.server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            print('server socket listening at %d' % self.server.server_port)
+            # the HTTP stack is only loaded once there's a production to serve
+            from lsst.ctrl.orca.ControlServer import ControlServer
+            self.server = ControlServer(parent, runid)
+            print('server socket listening at %d' % self.server.port)
 
         def run(self):
-            """Set Manager and serve requests until complete.
+            """Serve requests until complete.
             """
-            self.server.setManager(self._parent)
-
-            self.server.serve()
+            self.server.run()
             log.debug("Everything shutdown - All finished")
 
     def _startServiceThread(self):
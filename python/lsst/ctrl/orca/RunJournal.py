@@ -0,0 +1,149 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import json
+import os
+import threading
+import time
+import lsst.log as log
+
+from lsst.ctrl.orca.StatusListener import StatusListener
+
+
+class RunJournal(StatusListener):
+    """Append-only record of the launch and status events of a workflow
+
+    Parameters
+    ----------
+    stagingDir : `str`
+        the workflow's local staging directory, where the journal is kept
+
+    Notes
+    -----
+    Each event is written as one JSON line and synced to disk before
+    append() returns, so the journal survives the orca process dying.  It is
+    read back by ProductionRunManager.resumeProduction() to reattach monitors
+    to workflows that are still running.
+
+    As a StatusListener, the journal records every workflow status change
+    except progress reports.
+    """
+
+    # name of the journal file within the staging directory
+    fileName = "orca.journal"
+
+    def __init__(self, stagingDir):
+        StatusListener.__init__(self)
+        self.path = os.path.join(stagingDir, self.fileName)
+        self._lock = threading.Lock()
+
+    def append(self, event, **data):
+        """Append an event to the journal
+
+        Parameters
+        ----------
+        event : `str`
+            the type of event
+        data : `dict`
+            additional items to record with the event
+        """
+        record = {"event": event, "time": time.time()}
+        record.update(data)
+        line = (json.dumps(record) + "\n").encode()
+        with self._lock:
+            with open(self.path, "ab+") as fileObj:
+                # start a fresh line if a crash left the last one unfinished
+                if fileObj.seek(0, os.SEEK_END) > 0:
+                    fileObj.seek(-1, os.SEEK_END)
+                    if fileObj.read(1) != b"\n":
+                        line = b"\n" + line
+                fileObj.write(line)
+                fileObj.flush()
+                os.fsync(fileObj.fileno())
+
+    def recordLaunch(self, name, monitor, launcher=None):
+        """Record that a workflow was launched
+
+        Parameters
+        ----------
+        name : `str`
+            name of the workflow
+        monitor : `WorkflowMonitor`
+            the monitor watching the launched workflow
+        launcher : `WorkflowLauncher`, optional
+            the launcher which launched it; what it needs to be rebuilt on
+            resuming is recorded too
+        """
+        monitorClass = type(monitor)
+        state = launcher.getResumeState() if launcher is not None else {}
+        self.append("launch", workflow=name,
+                    monitorClass="%s.%s" % (monitorClass.__module__, monitorClass.__qualname__),
+                    jobId=monitor.getJobId(), **state)
+
+    def _publish(self, event, name, **data):
+        self.append(event, workflow=name, **data)
+
+    def workflowProgress(self, name, progress):
+        """Progress reports aren't recorded in the journal
+        """
+        return
+
+    def load(self):
+        """Read the events recorded in the journal
+
+        Returns
+        -------
+        records : `list` of `dict`
+            the events, oldest first; empty if there is no journal
+
+        Notes
+        -----
+        A partially written last line, left by a crash in the middle of an
+        append, is ignored.
+        """
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r") as fileObj:
+            for line in fileObj:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    log.warn("RunJournal: ignoring unreadable entry in %s" % self.path)
+        return records
+
+    def getResumableLaunch(self):
+        """Find the launch to reattach to, if the workflow hasn't finished since
+
+        Returns
+        -------
+        launch : `dict`
+            the most recent launch record, or None if the workflow was never launched
+            or has shut down or failed since it was last launched
+        """
+        launch = None
+        for record in self.load():
+            if record["event"] == "launch":
+                launch = record
+            elif record["event"] in ("workflowShutdown", "workflowFailed"):
+                launch = None
+        return launch
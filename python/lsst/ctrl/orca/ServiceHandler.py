@@ -20,65 +20,229 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-from http.server import BaseHTTPRequestHandler
 import json
+import urllib.parse
 
+from lsst.ctrl.orca.LogAggregator import LogIndex
 
-class ServiceHandler(BaseHTTPRequestHandler):
+
+class ServiceResponse:
+    """A response to a request made to the production's control endpoint
+
+    Parameters
+    ----------
+    status : `int`
+        HTTP status code
+    body : `bytes`, optional
+        response payload
+    stream : `StatusBroadcaster`, optional
+        if given, the response is an open-ended stream of the events published
+        to this broadcaster, rather than a payload
+    action : callable, optional
+        a function to call after the response has been sent
+    work : callable, optional
+        if given, a blocking function that returns the ServiceResponse to send
+        in place of this one; the server calls it off its event loop
+    """
+
+    def __init__(self, status=200, body=b"", stream=None, action=None, work=None):
+        self.status = status
+        self.body = body
+        self.stream = stream
+        self.action = action
+        self.work = work
+        self.contentType = "text/event-stream" if stream is not None else "application/json"
+
+
+class ServiceHandler:
+    """Handles requests made to the control endpoint of a production
+
+    Parameters
+    ----------
+    parent: object
+        The parent object that will deal with requests from this handler
+    runid: `str`
+        The runid of the production
+
+    Notes
+    -----
+    This class knows nothing about the transport; the ControlServer parses
+    each request and writes back the ServiceResponse returned for it.
+    """
 
     version = "v1"
     production = "/api/%s/production" % version
+    events = "%s/events" % production
+    logs = "%s/logs" % production
+    failures = "%s/failures" % production
+
+    # seconds between keepalive comments on an idle event stream
+    keepaliveInterval = 15
+
+    # failures listed by default, and at most, in one reply
+    failuresLimit = 100
+    maxFailuresLimit = 1000
+
+    def __init__(self, parent, runid):
+        self.parent = parent
+        self.runid = runid
 
-    def setParent(self, parent, runid):
-        """Set the parent object and runid of this handler
+    def handleRequest(self, method, path, body):
+        """Dispatch a request to the method that handles it
 
         Parameters
         ----------
-        parent: object
-            The parent object that will deal with requests from this handler
-        runid: `str`
-            The runid of the production
+        method : `str`
+            HTTP method
+        path : `str`
+            request path
+        body : `bytes`
+            request payload
+
+        Returns
+        -------
+        response : `ServiceResponse`
+            the response to send back to the remote client
         """
-        self.parent = parent
-        self.runid = runid
+        handler = getattr(self, "do_%s" % method, None)
+        if handler is None:
+            return self.errorResponse(405, "Method Not Allowed", "Request method is unsupported")
+        return handler(path, body)
 
-    def do_DELETE(self):
+    def do_DELETE(self, path, body):
         """handle a HTTP DELETE request
         """
         # check to be sure that we handle this type of request
         # produce an error if we don't see what we expect to see
-        if self.path == self.production:
-            s = self.rfile.read(int(self.headers['Content-length']))
+        if path == self.production:
             # check for payload validity
             # produce an error if we don't see what we expect to see
             try:
-                data = json.loads(s)
+                data = json.loads(body)
                 level = data['level']
                 runid = data['runid']
                 if runid != self.runid:
                     raise ValueError("invalid runid received")
-                self.send_response(204)
-                self.end_headers()
-                self.parent.stopProduction(level)
             except Exception as error:  # noqa: F841
-                self.send_response(422)
-                self.end_headers()
-                self.writeError("Unprocessable entity", "Error in syntax of message")
-            return
-        self.send_response(400)
-        self.writeError("Bad Request", "Request is unsupported")
-        self.end_headers()
+                return self.errorResponse(422, "Unprocessable entity", "Error in syntax of message")
+            return ServiceResponse(204, action=lambda: self.parent.stopProduction(level))
+        return self.errorResponse(400, "Bad Request", "Request is unsupported")
 
-    def writeError(self, status, message):
-        """emit an error message as a response to remote client
+    def do_GET(self, path, body):
+        """handle a HTTP GET request
+        """
+        if path == self.events:
+            return ServiceResponse(200, stream=self.parent.getStatusBroadcaster())
+        url = urllib.parse.urlsplit(path)
+        query = urllib.parse.parse_qs(url.query)
+        # the log indexes are read from disk, so look them up off the event loop
+        if url.path == self.logs:
+            if "id" not in query:
+                return self.errorResponse(422, "Unprocessable entity", "No id given")
+            dataId = query["id"][0]
+            return ServiceResponse(work=lambda: self.lookupLog(dataId))
+        if url.path == self.failures:
+            try:
+                limit = int(query.get("limit", [self.failuresLimit])[0])
+                offset = int(query.get("offset", [0])[0])
+                if limit < 0 or offset < 0:
+                    raise ValueError("negative limit or offset")
+            except ValueError:
+                return self.errorResponse(422, "Unprocessable entity", "Invalid limit or offset")
+            limit = min(limit, self.maxFailuresLimit)
+            return ServiceResponse(work=lambda: self.listFailures(limit, offset))
+        return self.errorResponse(400, "Bad Request", "Request is unsupported")
+
+    def lookupLog(self, dataId):
+        """look up the packed worker log of a data id
 
         Parameters
         ----------
+        dataId : `str`
+            the data id
+
+        Returns
+        -------
+        response : `ServiceResponse`
+            the index entry of the id, with its whole log
+        """
+        for path in self.parent.getLogIndexPaths():
+            index = LogIndex(path)
+            try:
+                entry = index.lookup(dataId)
+                if entry is not None:
+                    entry["log"] = index.read(entry)
+                    return ServiceResponse(200, json.dumps(entry).encode())
+            finally:
+                index.close()
+        return self.errorResponse(404, "Not Found", "No log for %s" % dataId)
+
+    def listFailures(self, limit=None, offset=0):
+        """list the data ids whose worker jobs failed
+
+        Parameters
+        ----------
+        limit : `int`, optional
+            the most entries to return; defaults to failuresLimit
+        offset : `int`, optional
+            the number of entries to skip, to page through a long list
+
+        Returns
+        -------
+        response : `ServiceResponse`
+            the index entries of the failed ids
+        """
+        if limit is None:
+            limit = self.failuresLimit
+        entries = []
+        for path in self.parent.getLogIndexPaths():
+            if len(entries) >= limit:
+                break
+            index = LogIndex(path)
+            try:
+                count = index.countFailures()
+                if offset >= count:
+                    offset -= count
+                    continue
+                entries.extend(index.failures(limit - len(entries), offset))
+                offset = 0
+            finally:
+                index.close()
+        return ServiceResponse(200, json.dumps(entries).encode())
+
+    @staticmethod
+    def formatEvent(record):
+        """format an event record as a server-sent event
+
+        Parameters
+        ----------
+        record : `dict`
+            event record published by a StatusBroadcaster
+
+        Returns
+        -------
+        message : `bytes`
+            the encoded event
+        """
+        message = "id: %d\nevent: %s\ndata: %s\n\n" % (record["id"], record["event"], json.dumps(record))
+        return message.encode()
+
+    def errorResponse(self, code, status, message):
+        """create an error message as a response to remote client
+
+        Parameters
+        ----------
+        code : `int`
+            HTTP status code
         status : `str`
             type of error
         message : `str`
             explanation of error
+
+        Returns
+        -------
+        response : `ServiceResponse`
+            the response carrying the error message
         """
         err = {"status": status, "message": message}
-        message = json.dumps(err)
-        self.wfile.write(message)
+        return ServiceResponse(code, json.dumps(err).encode())
@@ -0,0 +1,232 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+import lsst.log as log
+
+# the errors of os.link which mean the file system won't link the file, rather than that it's missing
+_CANT_LINK = (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES)
+
+
+class StagingCache:
+    """A store of the files staged for runs, by content, shared by the runs
+
+    Parameters
+    ----------
+    cacheDir : `str`
+        the directory of the store, created if it doesn't exist
+
+    Notes
+    -----
+    A file is stored once under the SHA-256 hash of its content, and linked
+    into the staging directory of each run that stages it, so a run which
+    renders the same scripts as an earlier one writes nothing new.  When the
+    file system can't link the file there, it's copied.
+
+    The files of the store are read-only, since all their links share them;
+    an executable file is stored apart from a file of the same content that
+    isn't.  Staging a file marks it as used, and `clean` removes the files
+    least recently used first.  Removing a file from the store doesn't
+    affect the runs it was linked into.
+    """
+
+    def __init__(self, cacheDir):
+        self.cacheDir = cacheDir
+        os.makedirs(cacheDir, exist_ok=True)
+
+    def getEntry(self, digest, executable=False):
+        """Accessor to the path of a file of the store
+
+        Parameters
+        ----------
+        digest : `str`
+            the hex SHA-256 hash of the content of the file
+        executable : `bool`, optional
+            whether the file is executable
+
+        Returns
+        -------
+        path : `str`
+            the path of the file, which may not exist
+        """
+        name = digest[2:] + (".x" if executable else "")
+        return os.path.join(self.cacheDir, digest[:2], name)
+
+    def store(self, data, executable=False):
+        """Store content, unless it already is
+
+        Parameters
+        ----------
+        data : `bytes` or `str`
+            the content
+        executable : `bool`, optional
+            whether the file is executable
+
+        Returns
+        -------
+        entry : `str`
+            the file of the store with that content
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        entry = self.getEntry(hashlib.sha256(data).hexdigest(), executable)
+        try:
+            # mark it as recently used
+            os.utime(entry)
+            return entry
+        except FileNotFoundError:
+            pass
+
+        entryDir = os.path.dirname(entry)
+        os.makedirs(entryDir, exist_ok=True)
+        fd, tmpName = tempfile.mkstemp(dir=entryDir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fileObj:
+                fileObj.write(data)
+            mode = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+            if executable:
+                mode |= stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+            os.chmod(tmpName, mode)
+            # another run storing the same content at once stores the same file
+            os.replace(tmpName, entry)
+        except BaseException:
+            os.unlink(tmpName)
+            raise
+        return entry
+
+    def stage(self, data, outputFile, executable=False):
+        """Stage content as a file of a run
+
+        Parameters
+        ----------
+        data : `bytes` or `str`
+            the content
+        outputFile : `str`
+            the file of the run, replaced if it exists
+        executable : `bool`, optional
+            whether the file is executable
+
+        Returns
+        -------
+        linked : `bool`
+            True if the file was linked to the store, False if it was copied
+        """
+        outputDir, outputName = os.path.split(os.path.abspath(outputFile))
+        tmpName = os.path.join(outputDir, ".%s.tmp-%d-%d" % (outputName, os.getpid(), threading.get_ident()))
+        for attempt in range(2):
+            entry = self.store(data, executable)
+            try:
+                os.link(entry, tmpName)
+            except FileNotFoundError:
+                # cleaned from the store since it was stored
+                continue
+            except OSError as e:
+                if e.errno not in _CANT_LINK:
+                    raise
+                log.debug("StagingCache: can't link %s to %s; copying it" % (entry, outputFile))
+                shutil.copy(entry, tmpName)
+                os.chmod(tmpName, os.stat(tmpName).st_mode | stat.S_IWUSR)
+                os.replace(tmpName, outputFile)
+                return False
+            os.replace(tmpName, outputFile)
+            return True
+        raise FileNotFoundError(errno.ENOENT, "removed from the staging cache while it was staged", entry)
+
+    def stageFile(self, inputFile, outputFile):
+        """Stage a copy of a file as a file of a run
+
+        Parameters
+        ----------
+        inputFile : `str`
+            the file to copy
+        outputFile : `str`
+            the file of the run, replaced if it exists; if it's a directory,
+            the file of the same name in it
+
+        Returns
+        -------
+        outputFile : `str`
+            the file of the run
+        """
+        if os.path.isdir(outputFile):
+            outputFile = os.path.join(outputFile, os.path.basename(inputFile))
+        with open(inputFile, "rb") as fileObj:
+            data = fileObj.read()
+        executable = os.access(inputFile, os.X_OK)
+        self.stage(data, outputFile, executable)
+        return outputFile
+
+    def clean(self, maxAge=None, maxSize=None):
+        """Remove the files least recently used from the store
+
+        Parameters
+        ----------
+        maxAge : `float`, optional
+            the seconds a file is kept since it was last used
+        maxSize : `int`, optional
+            the bytes the files of the store may take
+
+        Returns
+        -------
+        removed : `int`
+            the number of files removed
+        """
+        now = time.time()
+        entries = []
+        for subDir in os.scandir(self.cacheDir):
+            if not subDir.is_dir():
+                continue
+            for entry in os.scandir(subDir.path):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                # a file being stored is only removed once it's been left behind long enough
+                if entry.name.startswith(".") and (maxAge is None or now - st.st_mtime <= maxAge):
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for mtime, size, path in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            tooOld = maxAge is not None and now - mtime > maxAge
+            tooBig = maxSize is not None and total > maxSize
+            if not tooOld and not tooBig:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        if removed:
+            log.debug("StagingCache: removed %d files from %s" % (removed, self.cacheDir))
+        return removed
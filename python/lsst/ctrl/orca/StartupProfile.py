@@ -0,0 +1,91 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import contextlib
+import sys
+import time
+
+import lsst.ctrl.orca as orca
+
+
+class StartupProfile:
+    """Times the imports and phases of starting a production
+
+    Notes
+    -----
+    orca.py makes one when it's given --profile-startup, and sets it as
+    ``lsst.ctrl.orca.startupProfile``; the code it runs times its phases
+    with `phase`, which does nothing when there's no profile.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # (name, seconds, modules imported) of each phase, in order
+        self.timings = []
+
+    @contextlib.contextmanager
+    def time(self, name):
+        """Time a phase
+
+        Parameters
+        ----------
+        name : `str`
+            the name of the phase
+        """
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, time.perf_counter() - start, len(sys.modules) - modules))
+
+    def report(self, out=None):
+        """Print the time of each phase
+
+        Parameters
+        ----------
+        out : file object, optional
+            where to print; stderr by default
+        """
+        out = sys.stderr if out is None else out
+        print("%-32s %9s %8s" % ("startup phase", "seconds", "modules"), file=out)
+        for name, seconds, modules in self.timings:
+            print("%-32s %9.3f %8d" % (name, seconds, modules), file=out)
+        print("%-32s %9.3f %8d" % ("total", time.perf_counter() - self.start, len(sys.modules)), file=out)
+
+
+def phase(name):
+    """Time a phase of startup, if startup is being profiled
+
+    Parameters
+    ----------
+    name : `str`
+        the name of the phase
+
+    Returns
+    -------
+    context : context manager
+        times the code it's entered around
+    """
+    if orca.startupProfile is None:
+        return contextlib.nullcontext()
+    return orca.startupProfile.time(name)
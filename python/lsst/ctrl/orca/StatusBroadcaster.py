@@ -0,0 +1,240 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import collections
+import queue
+import threading
+import time
+
+
+class StatusSubscription:
+    """A bounded queue of status events delivered to one subscriber
+
+    Parameters
+    ----------
+    maxQueued : `int`
+        maximum number of undelivered events to hold
+
+    Notes
+    -----
+    A subscriber that falls behind never blocks the publisher; instead, the
+    oldest undelivered events are discarded to make room for new ones, and
+    the number of discarded events is counted in ``dropped``.
+    """
+
+    def __init__(self, maxQueued):
+        self._queue = queue.Queue(maxQueued)
+
+        # number of events discarded because this subscriber fell behind
+        self.dropped = 0
+
+    def put(self, record):
+        """Queue an event record, discarding the oldest one if the queue is full
+
+        Parameters
+        ----------
+        record : `dict`
+            the event record
+        """
+        while True:
+            try:
+                self._queue.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Retrieve the next event record
+
+        Parameters
+        ----------
+        timeout : `float`, optional
+            seconds to wait for an event; wait forever if None
+
+        Returns
+        -------
+        record : `dict`
+            the next event record
+
+        Raises
+        ------
+        `queue.Empty`
+            if no event arrived within the timeout
+        """
+        return self._queue.get(timeout=timeout)
+
+
+class AsyncStatusSubscription:
+    """A bounded queue of status events delivered to a subscriber running on an asyncio event loop
+
+    Parameters
+    ----------
+    maxQueued : `int`
+        maximum number of undelivered events to hold
+    loop : `asyncio.AbstractEventLoop`
+        the event loop the subscriber runs on
+
+    Notes
+    -----
+    Events may be put from any thread; they are handed to the event loop, so
+    get() never blocks the loop.  As with StatusSubscription, the oldest
+    undelivered events are discarded when the subscriber falls behind.
+    """
+
+    def __init__(self, maxQueued, loop):
+        self._maxQueued = maxQueued
+        self._loop = loop
+        self._records = collections.deque()
+        self._waiter = None
+        self._closed = False
+
+        # number of events discarded because this subscriber fell behind
+        self.dropped = 0
+
+    def put(self, record):
+        """Queue an event record; this may be called from any thread
+
+        Parameters
+        ----------
+        record : `dict`
+            the event record
+        """
+        try:
+            self._loop.call_soon_threadsafe(self._append, record)
+        except RuntimeError:
+            # the event loop has already been closed
+            pass
+
+    def close(self):
+        """Mark the end of the events; once the queued events are consumed,
+           get() returns None.
+        """
+        self.put(None)
+
+    def _append(self, record):
+        if self._closed:
+            return
+        if record is None:
+            self._closed = True
+        elif len(self._records) >= self._maxQueued:
+            self._records.popleft()
+            self.dropped += 1
+        self._records.append(record)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self):
+        """Retrieve the next event record
+
+        Returns
+        -------
+        record : `dict`
+            the next event record, or None if the subscription has been closed
+        """
+        while not self._records:
+            self._waiter = self._loop.create_future()
+            await self._waiter
+        return self._records.popleft()
+
+
+class StatusBroadcaster:
+    """Fan out workflow status events to any number of subscribers
+
+    Parameters
+    ----------
+    maxQueued : `int`, optional
+        maximum number of undelivered events kept for each subscriber
+
+    Notes
+    -----
+    Every published event is stamped with a sequence number and a time, and is
+    delivered, in order, to each subscription that exists at the time it is
+    published.
+    """
+
+    def __init__(self, maxQueued=1000):
+        self._lock = threading.Lock()
+        self._maxQueued = maxQueued
+        self._subscriptions = []
+        self._sequence = 0
+
+    def subscribe(self, loop=None):
+        """Create a new subscription to this broadcaster
+
+        Parameters
+        ----------
+        loop : `asyncio.AbstractEventLoop`, optional
+            if given, create a subscription that is read from a coroutine on this loop
+
+        Returns
+        -------
+        subscription : `StatusSubscription` or `AsyncStatusSubscription`
+            the subscription which will receive all events published from now on
+        """
+        if loop is None:
+            subscription = StatusSubscription(self._maxQueued)
+        else:
+            subscription = AsyncStatusSubscription(self._maxQueued, loop)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop delivering events to a subscription
+
+        Parameters
+        ----------
+        subscription : `StatusSubscription`
+            a subscription returned by subscribe()
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def publish(self, event, workflow, **data):
+        """Publish an event to all subscribers
+
+        Parameters
+        ----------
+        event : `str`
+            the type of event, e.g. "workflowStarted"
+        workflow : `str`
+            name of the workflow the event applies to
+        data : `dict`
+            additional items to include in the event record
+
+        Returns
+        -------
+        record : `dict`
+            the record that was published
+        """
+        with self._lock:
+            self._sequence += 1
+            record = {"id": self._sequence, "event": event, "workflow": workflow, "time": time.time()}
+            record.update(data)
+            for subscription in self._subscriptions:
+                subscription.put(record)
+        return record
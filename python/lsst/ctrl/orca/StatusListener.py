@@ -25,11 +25,23 @@ import lsst.log as log
 
 class StatusListener:
     """Used receive messages about changes in a workflow
+
+    Parameters
+    ----------
+    broadcaster : `StatusBroadcaster`, optional
+        if given, every message received is published to this broadcaster
     """
 
     # initializer
-    def __init__(self):
+    def __init__(self, broadcaster=None):
         log.debug("StatusListener:__init__")
+        self._broadcaster = broadcaster
+
+    def _publish(self, event, name, **data):
+        """Publish a message to the broadcaster, if there is one
+        """
+        if self._broadcaster is not None:
+            self._broadcaster.publish(event, name, **data)
 
     def workflowFailed(self, name, errorName, errmsg, response, pipelineName):
         """Indicate that a workflow has experienced an as-yet unhandled
@@ -48,7 +60,7 @@ class StatusListener:
         pipelineName : `str`
             the name of the pipeline in which this error occurred.
         """
-        return
+        self._publish("workflowFailed", name, error=errorName, message=errmsg, pipeline=pipelineName)
 
     def workflowShutdown(self, name):
         """The workflow has successfully shutdown and ready to be cleaned up
@@ -58,7 +70,7 @@ class StatusListener:
         name : `str`
             name of the workflow
         """
-        return
+        self._publish("workflowShutdown", name)
 
     def workflowStarted(self, name):
         """Called when a workflow has started up correctly and is
@@ -74,7 +86,7 @@ class StatusListener:
         If a pipeline is waiting for an request, the listener should be
         notified via workflowWaiting
         """
-        return
+        self._publish("workflowStarted", name)
 
     def workflowWaiting(self, name):
         """Indicate that a workflow is waiting for an request to proceed.
@@ -84,4 +96,16 @@ class StatusListener:
         name : `str`
             name of the workflow
         """
-        return
+        self._publish("workflowWaiting", name)
+
+    def workflowProgress(self, name, progress):
+        """Report the current progress of a running workflow
+
+        Parameters
+        ----------
+        name : `str`
+            name of the workflow
+        progress : `dict`
+            counts of the workflow's jobs, keyed by state
+        """
+        self._publish("workflowProgress", name, progress=progress)
@@ -39,6 +39,33 @@ class TemplateWriter:
         self.orcaValues["ORCA_LOCAL_HOSTNAME"] = socket.gethostname()
         return
 
+    def render(self, inputFile, pairs):
+        """Given a input template, take the keys from the key/values in the config
+           object and substitute the values, and return the result.
+        Parameters
+        ----------
+        inputFile : `str`
+            template input file
+        pairs : `dict`
+            dictionary containing key/value pairs
+
+        Returns
+        -------
+        text : `str`
+            the template, with the values substituted
+        """
+        with open(inputFile, 'r') as fpInput:
+            text = fpInput.read()
+
+        # replace the "standard" orca names first
+        for name in self.orcaValues:
+            text = text.replace("$"+name, str(self.orcaValues[name]))
+
+        # replace the user defined names
+        for name in pairs:
+            text = text.replace("$"+name, str(pairs[name]))
+        return text
+
     def rewrite(self, inputFile, outputFile, pairs):
         """Given a input template, take the keys from the key/values in the config
            object and substitute the values, and write those to the output file.
@@ -51,25 +78,6 @@ class TemplateWriter:
         pairs : `dict`
             dictionary containing key/value pairs
         """
-        fpInput = open(inputFile, 'r')
-        fpOutput = open(outputFile, 'w')
-
-        while True:
-            line = fpInput.readline()
-            if len(line) == 0:
-                break
-
-            # replace the "standard" orca names first
-            for name in self.orcaValues:
-                key = "$"+name
-                val = str(self.orcaValues[name])
-                line = line.replace(key, val)
-
-            # replace the user defined names
-            for name in pairs:
-                key = "$"+name
-                val = str(pairs[name])
-                line = line.replace(key, val)
-            fpOutput.write(line)
-        fpInput.close()
-        fpOutput.close()
+        text = self.render(inputFile, pairs)
+        with open(outputFile, 'w') as fpOutput:
+            fpOutput.write(text)
@@ -0,0 +1,228 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+import concurrent.futures
+import os
+import subprocess
+import threading
+import time
+
+from lsst.ctrl.orca.DataIdIndex import hashDataId
+from lsst.ctrl.orca.DataIdParser import DataIdParser
+
+
+def splitBatch(args):
+    """Split the arguments a job was given into the data ids of its batch
+
+    Parameters
+    ----------
+    args : `list` of `str`
+        the job arguments, as the DAG gives them: key=value ids separated by
+        "--id", like ["visit=1", "raft=2,2", "--id", "visit=2", "raft=2,2"],
+        or plain ids, one per argument
+
+    Returns
+    -------
+    dataIds : `list` of `str`
+        the data ids
+    """
+    if "--id" not in args and not any("=" in arg for arg in args):
+        return list(args)
+    dataIds = []
+    fields = []
+    for arg in args:
+        if arg == "--id":
+            if fields:
+                dataIds.append(" ".join(fields))
+            fields = []
+        else:
+            fields.append(arg)
+    if fields:
+        dataIds.append(" ".join(fields))
+    return dataIds
+
+
+def defaultProcesses():
+    """The number of ids to run at once in this job slot
+
+    Returns
+    -------
+    processes : `int`
+        OMP_NUM_THREADS, which HTCondor sets to the cores of the slot, or
+        else the number of cores this process may run on
+    """
+    value = os.environ.get("OMP_NUM_THREADS", "")
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class WorkerBatchRunner:
+    """Runs a command once for each data id of a batch, several at a time
+
+    Parameters
+    ----------
+    command : `list` of `str`
+        the command to run for each id; an argument "{dataId}" is replaced by
+        the key=value fields of the id, and "{dataIdName}" in any argument by
+        the id in the form used in file names (var2)
+    resultsFile : `str`
+        file to append a line to as each id finishes
+    processes : `int`, optional
+        number of ids to run at once; `defaultProcesses()` if None
+    logDir : `str`, optional
+        directory for the output of each id, in <dataIdName>.log; the output
+        is discarded if None
+    ledger : `CompletionLedger`, optional
+        the completion ledger of the run; ids it records as complete are
+        skipped, and the outcome of each id run is recorded in it
+
+    Notes
+    -----
+    Each line of the results file is "<status> <exit code> <seconds> <id>",
+    where status is "ok", "failed" or "skipped", and the exit code of a command killed
+    by a signal is minus the signal number.  Lines are written, and flushed,
+    as the ids finish, so the file shows the progress of the job while it
+    runs, and what was done if the job is killed.
+    """
+
+    def __init__(self, command, resultsFile, processes=None, logDir=None, ledger=None):
+        self.command = command
+        self.resultsFile = resultsFile
+        self.processes = processes if processes is not None else defaultProcesses()
+        self.logDir = logDir
+        self.ledger = ledger
+        self._parser = DataIdParser()
+        self._lock = threading.Lock()
+
+    def commandFor(self, dataId):
+        """
+        Parameters
+        ----------
+        dataId : `str`
+            a data id
+
+        Returns
+        -------
+        command : `list` of `str`
+            the command to run for the id
+        """
+        dataIdName = self._parser.format(dataId)[1]
+        command = []
+        for arg in self.command:
+            if arg == "{dataId}":
+                command.extend(dataId.split())
+            else:
+                command.append(arg.replace("{dataIdName}", dataIdName))
+        return command
+
+    def _call(self, command, output):
+        try:
+            return subprocess.call(command, stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.STDOUT)
+        except OSError as e:
+            # the command couldn't be started, like a shell reports it
+            if output is not subprocess.DEVNULL:
+                output.write(("%s: %s\n" % (command[0], e)).encode())
+            return 127
+
+    def _runOne(self, dataId, results):
+        start = time.time()
+        command = self.commandFor(dataId)
+        if self.logDir is not None:
+            logFile = os.path.join(self.logDir, self._parser.format(dataId)[1] + ".log")
+            with open(logFile, "wb") as output:
+                returncode = self._call(command, output)
+        else:
+            returncode = self._call(command, subprocess.DEVNULL)
+        elapsed = time.time() - start
+        status = "ok" if returncode == 0 else "failed"
+        with self._lock:
+            results.write("%s %d %.1f %s\n" % (status, returncode, elapsed, dataId))
+            results.flush()
+            if self.ledger is not None:
+                self.ledger.record(dataId, returncode, elapsed)
+        return dataId, returncode, elapsed
+
+    def run(self, dataIds):
+        """Run the command for each of the ids
+
+        Parameters
+        ----------
+        dataIds : `list` of `str`
+            the data ids
+
+        Returns
+        -------
+        outcomes : `list` of (`str`, `int`, `float`)
+            the id, exit code and seconds taken of each id, in the order given;
+            a command that couldn't be started has exit code 127, and an id
+            the ledger has as complete exit code 0 and 0 seconds
+        """
+        if self.logDir is not None:
+            os.makedirs(self.logDir, exist_ok=True)
+        completed = self.ledger.completed() if self.ledger is not None else ()
+        try:
+            with open(self.resultsFile, "a") as results:
+                with concurrent.futures.ThreadPoolExecutor(max(1, self.processes)) as executor:
+                    futures = []
+                    for dataId in dataIds:
+                        if hashDataId(dataId) in completed:
+                            results.write("skipped 0 0.0 %s\n" % dataId)
+                            futures.append(None)
+                        else:
+                            futures.append(executor.submit(self._runOne, dataId, results))
+                    results.flush()
+                    return [(dataId, 0, 0.0) if future is None else future.result()
+                            for dataId, future in zip(dataIds, futures)]
+        finally:
+            if self.ledger is not None:
+                self.ledger.close()
+
+    @staticmethod
+    def summarize(outcomes):
+        """Describe the ids that failed
+
+        Parameters
+        ----------
+        outcomes : `list` of (`str`, `int`, `float`)
+            the outcomes `run` returned
+
+        Returns
+        -------
+        lines : `list` of `str`
+            a line for each id that failed, giving its exit code or signal,
+            then a line counting the ids which failed; empty if none did
+        """
+        lines = []
+        for dataId, returncode, elapsed in outcomes:
+            if returncode == 0:
+                continue
+            if returncode < 0:
+                how = "killed by signal %d" % -returncode
+            else:
+                how = "exit code %d" % returncode
+            lines.append("FAILED %s: %s after %.1fs" % (dataId, how, elapsed))
+        if lines:
+            lines.append("%d of %d ids failed" % (len(lines), len(outcomes)))
+        return lines
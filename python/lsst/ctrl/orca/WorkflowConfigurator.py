@@ -20,9 +20,17 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
+import os
+import shutil
+import stat
+import tempfile
+
 import lsst.log as log
+import lsst.ctrl.orca as orca
 
 from lsst.ctrl.orca.NamedClassFactory import NamedClassFactory
+from lsst.ctrl.orca.StagingCache import StagingCache
+from lsst.ctrl.orca.TemplateWriter import TemplateWriter
 
 ##
 # @brief an abstract class for configuring a workflow
@@ -171,6 +179,10 @@ class WorkflowConfigurator:
         """
         log.debug("WorkflowConfigurator:_configureDatabases")
 
+        if orca.dryrun:
+            log.info("dry run: not setting up the workflow databases")
+            return
+
         #
         # setup the database for each database listed in workflow config
         #
@@ -183,6 +195,108 @@ class WorkflowConfigurator:
                 databaseConfigurator.setup(provSetup)
         return
 
+    def getLocalScratch(self, localScratch):
+        """Accessor to the local scratch directory to stage the workflow in
+
+        Parameters
+        ----------
+        localScratch : `str`
+            the local scratch directory of the workflow config
+
+        Returns
+        -------
+        localScratch : `str`
+            that directory, or for a dry run a temporary directory, shared by
+            all the workflows of the production
+        """
+        if not orca.dryrun:
+            return localScratch
+        if orca.dryrunScratch is None:
+            orca.dryrunScratch = tempfile.mkdtemp(prefix="orca-dryrun-")
+        return orca.dryrunScratch
+
+    def createStagingCache(self, condorData):
+        """Create the cache the files staged for the workflow are shared through
+
+        Parameters
+        ----------
+        condorData : `Config`
+            the condor data config of the workflow
+
+        Returns
+        -------
+        stagingCache : `StagingCache`
+            the cache in the local scratch directory, or None if the workflow
+            doesn't use one
+        """
+        if not condorData.stagingCache:
+            return None
+        return StagingCache(os.path.join(self.localScratch, ".stagingCache"))
+
+    def cleanStagingCache(self, condorData):
+        """Remove the files least recently used from the staging cache, to keep it in its bounds
+
+        Parameters
+        ----------
+        condorData : `Config`
+            the condor data config of the workflow
+        """
+        if self.stagingCache is None:
+            return
+        maxSize = None
+        if condorData.stagingCacheMaxSize is not None:
+            maxSize = condorData.stagingCacheMaxSize*1024*1024
+        maxAge = None
+        if condorData.stagingCacheMaxAge is not None:
+            maxAge = condorData.stagingCacheMaxAge*24*3600
+        self.stagingCache.clean(maxAge, maxSize)
+
+    def writeTemplate(self, template, outputFile, pairs, executable=False):
+        """Write a file of the workflow from a template
+
+        Parameters
+        ----------
+        template : `str`
+            the template
+        outputFile : `str`
+            the file to write
+        pairs : `dict`
+            the values to substitute for the keys of the template
+        executable : `bool`, optional
+            whether to make the file executable
+
+        Notes
+        -----
+        With a staging cache the file is linked to the cached file of the
+        same content; that is shared, so the file mustn't be changed after.
+        """
+        writer = TemplateWriter()
+        if self.stagingCache is not None:
+            self.stagingCache.stage(writer.render(template, pairs), outputFile, executable)
+            return
+        writer.rewrite(template, outputFile, pairs)
+        if executable:
+            os.chmod(outputFile, stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
+
+    def stageFile(self, inputFile, outputDir):
+        """Copy a file into a directory of the workflow
+
+        Parameters
+        ----------
+        inputFile : `str`
+            the file to copy
+        outputDir : `str`
+            the directory to copy it to
+
+        Returns
+        -------
+        outputFile : `str`
+            the copy
+        """
+        if self.stagingCache is not None:
+            return self.stagingCache.stageFile(inputFile, outputDir)
+        return shutil.copy(inputFile, outputDir)
+
     def _configureSpecialized(self, wfConfig):
         """Complete non-database setup, including deploying the workfow and it's pipelines
 
@@ -198,6 +312,23 @@ class WorkflowConfigurator:
         workflowLauncher = self._createWorkflowLauncher()
         return workflowLauncher
 
+    def createResumeLauncher(self, launch):
+        """Rebuild the launcher of a workflow that was launched by another orca process
+
+        Parameters
+        ----------
+        launch : `dict`
+            the launch record in the run journal, with the items of the
+            launcher's getResumeState()
+
+        Returns
+        -------
+        launcher : `WorkflowLauncher`
+            the launcher, or None if this kind of workflow can't be rebuilt;
+            nothing is staged or submitted
+        """
+        return None
+
     def _createWorkflowLauncher(self):
         """Create the workflow launcher
 
@@ -54,6 +54,16 @@ class WorkflowLauncher:
     def cleanUp(self):
         log.debug("WorkflowLauncher:cleanUp")
 
+    ##
+    # @brief describe what launching this workflow would run, without launching it
+    #
+    # @return a list of (item, description) pairs, or None if this kind of
+    #         workflow can't be planned
+    #
+    def plan(self):
+        log.debug("WorkflowLauncher:plan")
+        return None
+
     ##
     # @brief launch this workflow
     #
@@ -67,3 +77,20 @@ class WorkflowLauncher:
 
         # returns WorkflowMonitor
         return self.workflowMonitor
+
+    ##
+    # @brief the items to record in the run journal when this workflow is
+    #        launched, so that a launcher can be rebuilt to resume it
+    #
+    def getResumeState(self):
+        return {}
+
+    ##
+    # @brief reattach a monitor, with all its helpers, to this workflow after
+    #        it was launched by another orca process
+    #
+    # @return the started monitor, or None if this kind of workflow can't be resumed this way
+    #
+    def resume(self, statusListener, jobId):
+        log.debug("WorkflowLauncher:resume")
+        return None
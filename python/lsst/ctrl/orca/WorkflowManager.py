@@ -20,6 +20,8 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
+import os
+
 from lsst.ctrl.orca.NamedClassFactory import NamedClassFactory
 from lsst.ctrl.orca.multithreading import SharedData
 from lsst.ctrl.orca.exceptions import MultiIssueConfigurationError
@@ -72,6 +74,8 @@ class WorkflowManager:
 
         self._workflowConfigurator = None
 
+        self._workflowLauncher = None
+
         log.debug("WorkflowManager:__init__")
 
         # the urgency level of how fast to stop the workflow
@@ -112,6 +116,76 @@ class WorkflowManager:
             self._locked.release()
         return self._monitor
 
+    def resumeWorkflow(self, statusListener, launch):
+        """Reattach a monitor to this workflow after it was launched by another orca process
+
+        Parameters
+        ----------
+        statusListener : `StatusListener`
+            listener to add to the new monitor
+        launch : `dict`
+            the launch record of the workflow in its RunJournal
+
+        Returns
+        -------
+        monitor : `WorkflowMonitor`
+            the started monitor
+
+        Notes
+        -----
+        Nothing is staged or submitted.  The workflow's launcher is rebuilt
+        from the launch record, so the monitor gets the same helpers, such as
+        glidein scaling and log packing, as the one which was lost.  If the
+        launcher can't be rebuilt, as for a journal written by an older orca,
+        the class named in the record is created bare, with (jobId,
+        monitorConfig, name) as constructor arguments, and its workflow goes
+        on without those helpers.
+        """
+        log.debug("WorkflowManager:resumeWorkflow")
+
+        try:
+            self._locked.acquire()
+            self._workflowConfigurator = self.createConfigurator(
+                self.runid, self.repository, self.name, self.wfConfig, self.prodConfig)
+            self._workflowLauncher = self._workflowConfigurator.createResumeLauncher(launch)
+            if self._workflowLauncher is not None:
+                self._monitor = self._workflowLauncher.resume(statusListener, launch["jobId"])
+            else:
+                self._monitor = None
+            if self._monitor is None:
+                log.warn("workflow %s: its launcher can't be rebuilt, so it's resumed without glidein "
+                         "scaling or log packing" % self.name)
+                classFactory = NamedClassFactory()
+                monitorClass = classFactory.createClass(launch["monitorClass"])
+                self._monitor = monitorClass(launch["jobId"], self.wfConfig.monitor, self.name)
+                if statusListener is not None:
+                    self._monitor.addStatusListener(statusListener)
+                self._monitor.startMonitorThread()
+        finally:
+            self._locked.release()
+        return self._monitor
+
+    def getWorkflowLauncher(self):
+        """Accessor to the launcher of this workflow
+
+        Returns
+        -------
+        launcher : `WorkflowLauncher`
+            the launcher, or None if the workflow hasn't been configured
+        """
+        return self._workflowLauncher
+
+    def getLocalStagingDir(self):
+        """Accessor to the local directory where this workflow is staged
+
+        Returns
+        -------
+        stagingDir : `str`
+            the local staging directory
+        """
+        localConfig = self.wfConfig.configuration[self.wfConfig.configurationType]
+        return os.path.join(localConfig.condorData.localScratch, self.runid)
+
     def stopWorkflow(self, urgency):
         """Stop the workflow
 
@@ -166,6 +240,20 @@ class WorkflowManager:
         # calling ProvenanceSetup.getWorkflowCommands()
         return self._workflowLauncher
 
+    def planWorkflow(self):
+        """Describe what running the configured workflow would do, without running it
+
+        Returns
+        -------
+        plan : `list` of (`str`, `str`)
+            each item of the plan, and its description, or None if this kind
+            of workflow can't be planned
+        """
+        log.debug("WorkflowManager:planWorkflow")
+        if self._workflowLauncher is None:
+            return None
+        return self._workflowLauncher.plan()
+
     def createConfigurator(self, runid, repository, wfName, wfConfig, prodConfig):
         """Create a Workflow configurator for this workflow.
 
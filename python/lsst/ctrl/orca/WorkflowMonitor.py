@@ -47,6 +47,29 @@ class WorkflowMonitor:
         log.debug("WorkflowMonitor:addStatusListener")
         self._statusListeners.append(statusListener)
 
+    def notifyStatusListeners(self, methodName, *args):
+        """Call a method on every status listener of this monitor
+
+        Parameters
+        ----------
+        methodName : `str`
+            name of the StatusListener method to call, e.g. "workflowStarted"
+        args : `list`
+            arguments to pass to that method
+        """
+        for statusListener in list(self._statusListeners):
+            getattr(statusListener, methodName)(*args)
+
+    def getJobId(self):
+        """Accessor to the id of the job being monitored
+
+        Returns
+        -------
+        jobId : `str`
+            the id of the job running the workflow, or None if there isn't one
+        """
+        return None
+
     def handleRequest(self, request):
         """Act on a request
 
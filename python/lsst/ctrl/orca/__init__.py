@@ -25,3 +25,6 @@ verbosity = 0
 repository = None
 envscript = None
 skipglidein = False
+rerun = False
+startupProfile = None
+dryrunScratch = None
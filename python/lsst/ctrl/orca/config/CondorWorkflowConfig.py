@@ -6,6 +6,15 @@ import lsst.pex.config as pexConfig
 class CondorDataConfig(pexConfig.Config):
     # local scratch space
     localScratch = pexConfig.Field("temp data area", str)
+    # rendered scripts and copied files are kept once, by content, under localScratch, and linked into
+    # the staging directory of each run; off by default, since the links are read-only
+    stagingCache = pexConfig.Field("share the files staged for each run through a cache in localScratch; "
+                                   "staged files are then read-only hard links into the cache, which "
+                                   "can't be edited in place", bool, default=False)
+    # bounds on the cache; the least recently staged files are removed first
+    stagingCacheMaxAge = pexConfig.Field("days a file is kept in the staging cache since it was last "
+                                         "staged", float, default=7.0)
+    stagingCacheMaxSize = pexConfig.Field("MB the files of the staging cache may take", int, default=1024)
 
 # template information
 
@@ -24,6 +33,17 @@ class TemplateConfig(pexConfig.Config):
 class GlideinConfig(pexConfig.Config):
     # condor glide-in template
     template = pexConfig.ConfigField("condor template", TemplateConfig)
+    # submit the glide-in file as many times as the queued jobs need, while the workflow runs
+    autoscale = pexConfig.Field("request glideins as the jobs of the workflow need them", bool,
+                                default=False)
+    # bounds on the number of glide-in requests
+    minGlideins = pexConfig.Field("fewest glidein requests to keep", int, default=0)
+    maxGlideins = pexConfig.Field("most glidein requests to make", int, default=1)
+    # job slots one glide-in request provides: its MACHINE_COUNT times its CPU_COUNT
+    slotsPerGlidein = pexConfig.Field("job slots provided by one glidein request", int, default=1)
+    # seconds the demand has to stay low before glide-in requests are retired
+    scaleDownDelay = pexConfig.Field("seconds fewer glideins have to be needed before any are retired",
+                                     int, default=300)
 
 # condor workflow configuration
 
@@ -6,3 +6,6 @@ import lsst.pex.config as pexConfig
 class MonitorConfig(pexConfig.Config):
     # number of seconds to wait between status checks
     statusCheckInterval = pexConfig.Field("interval to wait for condor_q status checks", int, default=5)
+    # number of seconds between packings of the logs of the finished worker jobs
+    logPackInterval = pexConfig.Field("interval to pack finished worker logs into per visit archives; "
+                                      "0 leaves them as they are", int, default=0)
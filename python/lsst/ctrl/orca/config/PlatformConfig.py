@@ -11,10 +11,10 @@ class HwConfig(pexConfig.Config):
     minCoresPerNode = pexConfig.Field("minimum cores per node", int)
     # maximum number of cores per node
     maxCoresPerNode = pexConfig.Field("maximum cores per node", int)
-    # minimum ram used per node
-    minRamPerNode = pexConfig.Field("minimum RAM per node", float)
-    # maximum ram used node
-    maxRamPerNode = pexConfig.Field("maximum RAM per node", float)
+    # minimum ram used per node, in GB; a worker job asks for its cores' share of it
+    minRamPerNode = pexConfig.Field("minimum RAM per node, in GB", float)
+    # maximum ram used node, in GB
+    maxRamPerNode = pexConfig.Field("maximum RAM per node, in GB", float)
 
 # deployment configuration
 
@@ -38,6 +38,19 @@ class DagGeneratorConfig(pexConfig.Config):
     inputFile = pexConfig.Field("input", str)
     # number of ids per job given to execute
     idsPerJob = pexConfig.Field("the number of ids that will be handled per job", int)
+    # key of the data ids that groups the job logs, e.g. "visit" or "run"
+    groupKey = pexConfig.Field("key of the data ids whose value names the log directory of a job; "
+                               "the first key if not set", str, default=None, optional=True)
+    # keys of the data ids that jobs are ordered and batched by, e.g. ["visit", "raft"]
+    localityKeys = pexConfig.ListField("keys of the data ids to order the jobs by, most significant first, "
+                                       "so that jobs reading the same inputs run together; the ids of a "
+                                       "job share the values of these keys", str, default=[])
+    # completion ledger the workers record finished ids in
+    ledger = pexConfig.Field("completion ledger directory of the run; ids it records as complete are left "
+                             "out of the DAG", str, default=None, optional=True)
+    # schedule only the ids added to the input since the last DAG of this run
+    incremental = pexConfig.Field("keep an index of the ids already scheduled, and top up an existing "
+                                  "run with a DAG of just the new ids", bool, default=False)
 
 
 class SitesConfig(pexConfig.Config):
@@ -65,6 +78,30 @@ typemap = {"dag": DagGeneratorConfig,
            "dax": DaxGeneratorConfig}
 
 
+# DAGMan throttling and node priorities
+
+
+class DagThrottleConfig(pexConfig.Config):
+    # limits on the jobs of the DAG in the queue, as condor_submit_dag -maxjobs and -maxidle
+    maxJobs = pexConfig.Field("most jobs of the DAG in the queue at once; no limit if not set", int,
+                              default=None, optional=True)
+    maxIdle = pexConfig.Field("most idle jobs of the DAG in the queue at once; no limit if not set", int,
+                              default=None, optional=True)
+    # worker jobs are in the category "worker", unless their group is given another one.  In a
+    # workflow of several tasks, each task's categories are its own; those named "+..." are shared
+    groupCategories = pexConfig.DictField("node category of the worker jobs of a group, by the value of "
+                                          "the group key (e.g. the visit); others are in category 'worker'",
+                                          keytype=str, itemtype=str, default=dict())
+    categoryMaxJobs = pexConfig.DictField("most jobs of a node category running at once", keytype=str,
+                                          itemtype=int, default=dict())
+    # DAGMan runs the ready nodes with the highest priority first
+    categoryPriorities = pexConfig.DictField("node priority of the worker jobs of a category", keytype=str,
+                                             itemtype=int, default=dict())
+    groupPriorities = pexConfig.DictField("node priority of the worker jobs of a group, by the value of the "
+                                          "group key; overrides that of their category", keytype=str,
+                                          itemtype=int, default=dict())
+
+
 # task
 class TaskConfig(pexConfig.Config):
     # script directory
@@ -79,3 +116,16 @@ class TaskConfig(pexConfig.Config):
     workerJob = pexConfig.ConfigField("worker job", JobTemplateConfig)
     # DAG generator script to use to create DAG submission file
     generator = pexConfig.ConfigChoiceField("generator", typemap)
+    # cores each worker job asks for; the ids of a job are run in parallel on its cores
+    coresPerJob = pexConfig.Field("number of cores requested by each worker job", int, default=1)
+    # memory each worker job asks for
+    memoryPerJob = pexConfig.Field("MB of memory requested by each worker job; if not set, the job's "
+                                   "share of the RAM of a node of the platform", int,
+                                   default=None, optional=True)
+    # throttling and node priorities of the DAG
+    throttle = pexConfig.ConfigField("DAGMan throttling and node priorities", DagThrottleConfig)
+    # tasks of the same workflow whose DAGs have to be done before this task's DAG starts
+    after = pexConfig.ListField("names of the tasks of the workflow this task runs after", str, default=[])
+    # seconds a worker job is expected to run
+    expectedJobTime = pexConfig.Field("seconds a worker job is expected to run, to estimate the wall time "
+                                      "of the run in a dry run", float, default=None, optional=True)
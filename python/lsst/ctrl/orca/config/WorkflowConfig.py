@@ -23,8 +23,8 @@ class WorkflowConfig(pexConfig.Config):
     # plugin type
     configurationType = pexConfig.Field("plugin type", str)
 
-    # plugin class name
-    configurationClass = pexConfig.Field("orca plugin class", str)
+    # plugin class name, or the alias of a plugin, such as "condor"
+    configurationClass = pexConfig.Field("orca plugin class, or its alias", str)
 
     # configuration
     configuration = pexConfig.ConfigChoiceField("configuration", typemap)
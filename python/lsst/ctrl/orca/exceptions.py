@@ -92,3 +92,16 @@ class MultiIssueConfigurationError(ConfigurationError):
     # overrides __repr__ for custom message
     def __repr__(self):
         return "MultiIssueConfigurationError: " + str(self)
+
+
+class DataIdError(ValueError):
+    """An exception that indicates that a line of an input list isn't a valid data id.
+    """
+    pass
+
+
+class CondorQueryError(RuntimeError):
+    """An exception that indicates that HTCondor couldn't be queried, as
+       opposed to the job queried having left the queue.
+    """
+    pass
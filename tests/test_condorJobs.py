@@ -0,0 +1,171 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the CondorJobs queries, how the CondorWorkflowMonitor decides how a DAG ended, and how
+a resumed run takes over its glidein requests, with stand-ins for the HTCondor commands
+"""
+import os
+import stat
+import tempfile
+import types
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.CondorGlideinBatch import CondorGlideinBatch
+from lsst.ctrl.orca.CondorJobs import CondorJobs
+from lsst.ctrl.orca.CondorWorkflowMonitor import CondorWorkflowMonitor
+from lsst.ctrl.orca.GlideinManager import GlideinManager
+from lsst.ctrl.orca.exceptions import CondorQueryError
+
+# replies in turn with <bin dir>/<command>.<n>: the exit status on its first line, the output after;
+# the last reply is repeated
+FAKE_COMMAND = """#!/bin/sh
+d=$(dirname "$0")
+c=$(basename "$0")
+n=$(cat "$d/$c.calls" 2>/dev/null || echo 0)
+echo $((n+1)) > "$d/$c.calls"
+echo "$@" > "$d/$c.args"
+[ -f "$d/$c.$n" ] || n=$(ls "$d" | grep -c "^$c\\.[0-9]*$" | awk '{print $1-1}')
+tail -n +2 "$d/$c.$n"
+exit $(head -1 "$d/$c.$n")
+"""
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class CondorJobsTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.binDir = os.path.join(self.tmpDir.name, "bin")
+        os.makedirs(self.binDir)
+        for command in ["condor_q", "condor_history", "condor_submit", "condor_rm"]:
+            path = os.path.join(self.binDir, command)
+            with open(path, "w") as fileObj:
+                fileObj.write(FAKE_COMMAND)
+            os.chmod(path, stat.S_IRWXU)
+        self.path = os.environ["PATH"]
+        os.environ["PATH"] = self.binDir + os.pathsep + self.path
+
+    def tearDown(self):
+        os.environ["PATH"] = self.path
+        self.tmpDir.cleanup()
+
+    def reply(self, command, *replies):
+        for n, (status, output) in enumerate(replies):
+            with open(os.path.join(self.binDir, "%s.%d" % (command, n)), "w") as fileObj:
+                fileObj.write("%d\n%s" % (status, output))
+
+    def testNodeCounts(self):
+        self.reply("condor_q", (0, "10 4 1 2 0 1 undefined 2\n"), (0, ""), (1, ""), (0, "10 4\n"))
+        cj = CondorJobs()
+        counts = cj.getDagNodeCounts("101")
+        self.assertEqual(counts, {"total": 10, "done": 4, "failed": 1, "queued": 2, "ready": 0, "pre": 1,
+                                  "post": 0, "unready": 2})
+        with open(os.path.join(self.binDir, "condor_q.args")) as fileObj:
+            args = fileObj.read().split()
+        self.assertIn("DAG_NodesPrerun", args)
+        self.assertIn("DAG_NodesPostrun", args)
+        # left the queue
+        self.assertIsNone(cj.getDagNodeCounts("101"))
+        # the query failed, or its reply is garbled
+        with self.assertRaises(CondorQueryError):
+            cj.getDagNodeCounts("101")
+        with self.assertRaises(CondorQueryError):
+            cj.getDagNodeCounts("101")
+
+    def testExitStatus(self):
+        dagFile = os.path.join(self.tmpDir.name, "test.dag")
+        self.reply("condor_history", (0, "2\n"))
+        cj = CondorJobs()
+        # from the history, without the DAGMan log
+        self.assertEqual(cj.getDagExitStatus("101", dagFile), 2)
+        # the last status in the DAGMan log, from a resubmission
+        with open(dagFile + ".dagman.out", "w") as fileObj:
+            fileObj.write("... (condor_DAGMAN) pid 1 EXITING WITH STATUS 1\n"
+                          "... (condor_DAGMAN) pid 2 EXITING WITH STATUS 0\n")
+        self.assertEqual(cj.getDagExitStatus("101", dagFile), 0)
+        self.reply("condor_history", (0, ""))
+        self.assertIsNone(cj.getDagExitStatus("101"))
+
+    def testResumedGlideins(self):
+        glideinFile = os.path.join(self.tmpDir.name, "glidein.condor")
+        self.reply("condor_q", (0, ""), (0, "201\n202\n"), (0, "201 1\n202 2\n"))
+        self.reply("condor_submit", (0, "Submitting job(s).\n1 job(s) submitted to cluster 201.\n"),
+                   (0, "Submitting job(s).\n1 job(s) submitted to cluster 202.\n"))
+        self.reply("condor_rm", (0, ""))
+        batch = CondorGlideinBatch(glideinFile)
+        batch.submit(2)
+        with open(os.path.join(self.binDir, "condor_submit.args")) as fileObj:
+            self.assertIn('+%s = "%s"' % (CondorGlideinBatch.tagAttribute, glideinFile), fileObj.read())
+        # the process is restarted, and the run resumed: its manager retires the requests made before
+        config = types.SimpleNamespace(minGlideins=0, maxGlideins=10, slotsPerGlidein=1, scaleDownDelay=0)
+        manager = GlideinManager(CondorGlideinBatch(glideinFile), lambda: {"idle": 0, "running": 0}, config)
+        self.assertEqual(manager.step(now=0), 0)
+        self.assertEqual(manager.step(now=10), -2)
+        with open(os.path.join(self.binDir, "condor_rm.calls")) as fileObj:
+            self.assertEqual(int(fileObj.read()), 2)
+
+    def runMonitor(self, dagFile=None):
+        events = []
+        listener = types.SimpleNamespace(
+            workflowStarted=lambda name: events.append("started"),
+            workflowProgress=lambda name, counts: events.append("progress"),
+            workflowShutdown=lambda name: events.append("shutdown"),
+            workflowFailed=lambda name, *args: events.append(("failed", args[1])))
+        monitorConfig = types.SimpleNamespace(statusCheckInterval=0, logPackInterval=0)
+        monitor = CondorWorkflowMonitor("101", monitorConfig, "test", dagFile=dagFile)
+        monitor.addStatusListener(listener)
+        monitor.startMonitorThread()
+        # the listeners are told how the DAG ended last
+        monitor._wfMonitorThread.join(10)
+        self.assertTrue(monitor.isDone())
+        return events
+
+    def testMonitorFailedBeforePolled(self):
+        # a failed query isn't taken for the end of the DAG; the DAG then leaves the queue having
+        # failed before it was ever polled
+        dagFile = os.path.join(self.tmpDir.name, "test.dag")
+        with open(dagFile + ".dagman.out", "w") as fileObj:
+            fileObj.write("... (condor_DAGMAN) pid 1 EXITING WITH STATUS 1\n")
+        self.reply("condor_q", (1, ""), (0, ""))
+        events = self.runMonitor(dagFile)
+        self.assertEqual(events, ["started", ("failed", "DAGMan exited with status 1")])
+
+    def testMonitorSucceeded(self):
+        # a node failed, and was retried: DAGMan's exit status decides, not the last poll
+        self.reply("condor_q", (0, "2 1 1 0 0 0 0 0\n"), (0, ""))
+        self.reply("condor_history", (0, "0\n"))
+        events = self.runMonitor()
+        self.assertEqual(events, ["started", "progress", "shutdown"])
+
+
+class MemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,167 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of how the CondorWorkflowConfigurator stages a workflow of several tasks, as splices of one DAG
+"""
+import os
+import tempfile
+import types
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import lsst.utils.tests
+
+from lsst.ctrl.orca.CondorWorkflowConfigurator import CondorWorkflowConfigurator
+from lsst.ctrl.orca.config.PlatformConfig import PlatformConfig
+from lsst.ctrl.orca.config.TaskConfig import TaskConfig
+from lsst.ctrl.orca.DagPlan import DagPlan
+from lsst.ctrl.orca.exceptions import ConfigurationError
+
+ETC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "etc", "condor")
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+def makeTask(after=(), maxJobs=None, maxIdle=None):
+    """Create the config of a task which runs helloworld.sh on the ids of short.input
+    """
+    task = TaskConfig()
+    task.scriptDir = "workers"
+    templates = os.path.join(ETC_DIR, "templates")
+    for job, name in ((task.preJob, "preJob"), (task.postJob, "postJob"), (task.workerJob, "helloworld")):
+        job.script.inputFile = os.path.join(templates, "%s.sh.template" % name)
+        job.script.outputFile = "%s.sh" % name
+    task.preJob.condor.inputFile = os.path.join(templates, "preJob.condor.template")
+    task.preJob.condor.outputFile = "W.pre"
+    task.postJob.condor.inputFile = os.path.join(templates, "postJob.condor.template")
+    task.postJob.condor.outputFile = "W.post"
+    task.workerJob.condor.inputFile = os.path.join(templates, "workerJob.condor.template")
+    task.workerJob.condor.outputFile = "W-template.condor"
+    task.generator.name = "dag"
+    generator = task.generator["dag"]
+    generator.dagName = "W"
+    generator.script = os.path.join(ETC_DIR, "scripts", "generateDag.py")
+    generator.inputFile = os.path.join(ETC_DIR, "input", "short.input")
+    generator.idsPerJob = 1
+    task.after = list(after)
+    task.throttle.maxJobs = maxJobs
+    task.throttle.maxIdle = maxIdle
+    return task
+
+
+class CondorWorkflowConfiguratorTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        wfConfig = types.SimpleNamespace(platform=PlatformConfig())
+        self.configurator = CondorWorkflowConfigurator("run1", None, None, wfConfig, "wf")
+        self.configurator.localStagingDir = self.tmpDir.name
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testOrderTasks(self):
+        tasks = {"coadd": makeTask(after=["calib", "isr"]), "isr": makeTask(),
+                 "calib": makeTask(after=["isr"]), "other": makeTask()}
+        self.assertEqual(self.configurator.orderTasks(tasks), ["isr", "other", "calib", "coadd"])
+
+        tasks["isr"].after = ["sky"]
+        with self.assertRaisesRegex(ConfigurationError, "isr runs after sky"):
+            self.configurator.orderTasks(tasks)
+
+        tasks["isr"].after = ["coadd"]
+        with self.assertRaisesRegex(ConfigurationError, "coadd, isr, calib .*cycle"):
+            self.configurator.orderTasks(tasks)
+
+    def testCheckSpliceNames(self):
+        self.configurator.checkSpliceNames(["isr", "calib_2", "coadd.deep-1"])
+        for name in ("is r", "isr+", "+isr", "isr/calib", "-isr", ""):
+            with self.assertRaises(ConfigurationError):
+                self.configurator.checkSpliceNames(["isr", name])
+
+    def testWriteSpliceDag(self):
+        tasks = {"isr": makeTask(), "calib": makeTask(after=["isr"]),
+                 "coadd": makeTask(after=["isr", "calib"])}
+        taskNames = ["isr", "calib", "coadd"]
+        dagFile = self.configurator.writeSpliceDag(tasks, taskNames, ["W.diamond.dag"] * 3)
+        self.assertEqual(dagFile, "wf.dag")
+        with open(os.path.join(self.tmpDir.name, dagFile)) as fileObj:
+            self.assertEqual(fileObj.read(),
+                             "SPLICE isr W.diamond.dag DIR isr\n"
+                             "SPLICE calib W.diamond.dag DIR calib\n"
+                             "SPLICE coadd W.diamond.dag DIR coadd\n"
+                             "PARENT isr CHILD calib\n"
+                             "PARENT isr calib CHILD coadd\n")
+        self.assertEqual(DagPlan(os.path.join(self.tmpDir.name, dagFile)).splices,
+                         [(name, os.path.join(self.tmpDir.name, name, "W.diamond.dag"))
+                          for name in taskNames])
+
+    def testSpliceSubmitOptions(self):
+        tasks = [makeTask(maxJobs=10, maxIdle=2), makeTask(maxJobs=5)]
+        # a limit is only set if every task sets its own
+        self.assertEqual(self.configurator.getSpliceSubmitOptions(tasks), ["-maxjobs", "15"])
+        tasks[1].throttle.maxIdle = 3
+        self.assertEqual(self.configurator.getSpliceSubmitOptions(tasks),
+                         ["-maxjobs", "15", "-maxidle", "5"])
+        tasks[0].throttle.maxJobs = None
+        self.assertEqual(self.configurator.getSpliceSubmitOptions(tasks), ["-maxidle", "5"])
+
+    def testStageTasksConcurrently(self):
+        taskNames = ["isr", "calib", "coadd"]
+        tasks = {}
+        for taskName in taskNames:
+            tasks[taskName] = makeTask()
+            tasks[taskName].throttle.categoryMaxJobs = {"worker": 2, "+io": 1}
+        cwd = os.getcwd()
+
+        def stageTask(taskName):
+            return self.configurator.stageTask(tasks[taskName], os.path.join(self.tmpDir.name, taskName),
+                                               categoryPrefix=self.configurator.getCategoryPrefix(taskName))
+        with ThreadPoolExecutor(max_workers=len(taskNames)) as executor:
+            dagFiles = list(executor.map(stageTask, taskNames))
+
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual(dagFiles, ["W.diamond.dag"] * 3)
+        for taskName in taskNames:
+            taskDir = os.path.join(self.tmpDir.name, taskName)
+            self.assertEqual(sorted(os.listdir(os.path.join(taskDir, "workers"))),
+                             ["W-template.condor", "W.post", "W.pre", "helloworld.sh", "postJob.sh",
+                              "preJob.sh"])
+            self.assertTrue(os.path.isdir(os.path.join(taskDir, "logs")))
+            with open(os.path.join(taskDir, "W.diamond.dag")) as fileObj:
+                lines = fileObj.read().splitlines()
+            # each task throttles its own workers; "+io" is shared by all of them
+            self.assertIn("MAXJOBS %s_worker 2" % taskName, lines)
+            self.assertIn("MAXJOBS +io 1", lines)
+            self.assertIn("CATEGORY A1 %s_worker" % taskName, lines)
+
+
+class CondorWorkflowConfiguratorMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
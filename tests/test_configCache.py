@@ -0,0 +1,104 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of the ConfigCache class
+"""
+import os
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.ConfigCache import ConfigCache
+
+
+class CountingConfig:
+    """Stands in for a config, counting how often files are loaded
+    """
+    loads = 0
+
+    def __init__(self):
+        self.value = None
+        self.frozen = False
+
+    def load(self, path):
+        CountingConfig.loads += 1
+        with open(path) as fileObj:
+            self.value = fileObj.read().strip()
+
+    def freeze(self):
+        self.frozen = True
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class ConfigCacheTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        ConfigCache.clear()
+        CountingConfig.loads = 0
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpDir.name, "prod.py")
+        with open(self.path, "w") as fileObj:
+            fileObj.write("one\n")
+
+    def tearDown(self):
+        ConfigCache.clear()
+        self.tmpDir.cleanup()
+
+    def testShared(self):
+        config = ConfigCache.load(CountingConfig, self.path)
+        self.assertTrue(config.frozen)
+        self.assertEqual(config.value, "one")
+        relative = os.path.relpath(self.path)
+        self.assertIs(ConfigCache.load(CountingConfig, relative), config)
+        self.assertEqual(CountingConfig.loads, 1)
+
+    def testOverrides(self):
+        config = ConfigCache.load(CountingConfig, self.path)
+        overridden = ConfigCache.load(CountingConfig, self.path, {"value": "two"})
+        self.assertEqual(overridden.value, "two")
+        self.assertIsNot(overridden, config)
+        self.assertIs(ConfigCache.load(CountingConfig, self.path, {"value": "two"}), overridden)
+        self.assertEqual(CountingConfig.loads, 2)
+
+    def testChangedFile(self):
+        config = ConfigCache.load(CountingConfig, self.path)
+        with open(self.path, "w") as fileObj:
+            fileObj.write("three\n")
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        reloaded = ConfigCache.load(CountingConfig, self.path)
+        self.assertIsNot(reloaded, config)
+        self.assertEqual(reloaded.value, "three")
+
+
+class ConfigCacheMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
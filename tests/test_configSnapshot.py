@@ -0,0 +1,124 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of the ConfigSnapshot class
+"""
+import os
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.ConfigCache import ConfigCache
+from lsst.ctrl.orca.ConfigSnapshot import ConfigSnapshot, ConfigView
+from lsst.ctrl.orca.config.ProductionConfig import ProductionConfig
+from lsst.ctrl.orca.exceptions import ConfigurationError
+
+CONFIG = """
+config.production.shortName = "DataRelease"
+config.production.repositoryDirectory = "/tmp/repository"
+config.workflow["workflow1"].shortName = "wf1"
+config.workflow["workflow1"].configurationType = "condor"
+config.workflow["workflow1"].platform.deploy.nodes = ["node1", "node2"]
+config.workflow["workflow1"].configuration["condor"].condorData.localScratch = "/tmp/scratch"
+config.workflow["workflow1"].task["task1"].scriptDir = "workers"
+config.workflow["workflow1"].task["task1"].workerJob.script.keywords["A"] = "B"
+config.workflow["workflow1"].task["task1"].generator["dag"].idsPerJob = 4
+config.workflow["workflow1"].task["task1"].generator["dag"].localityKeys = ["visit"]
+"""
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class ConfigSnapshotTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        ConfigCache.clear()
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpDir.name, "production.py")
+        with open(self.source, "w") as fileObj:
+            fileObj.write(CONFIG)
+        self.snapshot = os.path.join(self.tmpDir.name, "production.json")
+        ConfigSnapshot.compile(ProductionConfig, self.source, self.snapshot)
+
+    def tearDown(self):
+        ConfigCache.clear()
+        self.tmpDir.cleanup()
+
+    def testRead(self):
+        self.assertTrue(ConfigSnapshot.isSnapshot(self.snapshot))
+        self.assertFalse(ConfigSnapshot.isSnapshot(self.source))
+        config = ConfigSnapshot.read(self.snapshot, ProductionConfig).config
+        loaded = ProductionConfig()
+        loaded.load(self.source)
+        self.assertEqual(config.toDict(), loaded.toDict())
+
+        self.assertEqual(list(config.workflow), ["workflow1"])
+        workflow = config.workflow["workflow1"]
+        self.assertEqual(workflow.platform.deploy.nodes, ("node1", "node2"))
+        self.assertEqual(workflow.configuration[workflow.configurationType].condorData.localScratch,
+                         "/tmp/scratch")
+        task = workflow.task["task1"]
+        self.assertEqual(dict(task.workerJob.script.keywords), {"A": "B"})
+        self.assertEqual(task.generator["dag"].idsPerJob, 4)
+        self.assertIsNone(task.generator["dag"].groupKey)
+        with self.assertRaises(AttributeError):
+            task.scriptDir = "other"
+        with self.assertRaises(TypeError):
+            task.workerJob.script.keywords["A"] = "C"
+        self.assertIsInstance(task, ConfigView)
+
+    def testCorrupt(self):
+        with open(self.snapshot) as fileObj:
+            text = fileObj.read()
+        with open(self.snapshot, "w") as fileObj:
+            fileObj.write(text.replace('"workers"', '"elsewhere"'))
+        with self.assertRaises(ConfigurationError):
+            ConfigSnapshot.read(self.snapshot)
+
+    def testStale(self):
+        config = ConfigCache.load(ProductionConfig, self.snapshot)
+        self.assertIsInstance(config, ConfigView)
+        self.assertIs(ConfigCache.load(ProductionConfig, self.snapshot), config)
+
+        # touching the config file doesn't make the snapshot stale, changing it does
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertFalse(ConfigSnapshot.read(self.snapshot).isStale())
+        with open(self.source, "a") as fileObj:
+            fileObj.write('config.production.shortName = "Changed"\n')
+        self.assertTrue(ConfigSnapshot.read(self.snapshot).isStale())
+        config = ConfigCache.load(ProductionConfig, self.snapshot)
+        self.assertNotIsInstance(config, ConfigView)
+        self.assertEqual(config.production.shortName, "Changed")
+
+
+class ConfigSnapshotMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
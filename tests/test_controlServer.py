@@ -0,0 +1,262 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of the ControlServer, over real connections to it on an ephemeral port
+"""
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.ControlServer import ControlServer
+from lsst.ctrl.orca.LogAggregator import LogIndex
+from lsst.ctrl.orca.ServiceHandler import ServiceHandler
+from lsst.ctrl.orca.StatusBroadcaster import StatusBroadcaster
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class FakeProduction:
+    """Stands in for the ProductionRunManager the server controls
+    """
+
+    def __init__(self):
+        self.broadcaster = StatusBroadcaster()
+        self.running = True
+        self.indexPaths = []
+        self.levels = []
+        self.responded = threading.Event()
+        self.stopped = threading.Event()
+        self.stoppedAfterResponse = None
+
+    def getStatusBroadcaster(self):
+        return self.broadcaster
+
+    def isRunning(self):
+        return self.running
+
+    def getLogIndexPaths(self):
+        return self.indexPaths
+
+    def stopProduction(self, level):
+        # the test sets responded once it has read the reply to its DELETE
+        self.stoppedAfterResponse = self.responded.wait(5)
+        self.levels.append(level)
+        self.stopped.set()
+
+
+class ControlServerTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.production = FakeProduction()
+        self.server = ControlServer(self.production, "run1", host="127.0.0.1")
+        self.thread = threading.Thread(target=self.server.run)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+
+    def connect(self):
+        return http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+
+    def openSocket(self):
+        sock = socket.create_connection(("127.0.0.1", self.server.port), timeout=5)
+        self.addCleanup(sock.close)
+        return sock
+
+    def readUntil(self, sock, marker):
+        """Read from a socket until marker has been received, or the server closes it
+        """
+        data = b""
+        while marker not in data:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def openStream(self):
+        sock = self.openSocket()
+        sock.sendall(("GET %s HTTP/1.1\r\nHost: localhost\r\n\r\n" % ServiceHandler.events).encode())
+        head = self.readUntil(sock, b"\r\n\r\n")
+        self.assertTrue(head.startswith(b"HTTP/1.1 200 OK\r\n"))
+        self.assertIn(b"Content-Type: text/event-stream\r\n", head)
+        return sock
+
+    def testKeepAlive(self):
+        conn = self.connect()
+        conn.request("GET", ServiceHandler.failures)
+        response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.read()), [])
+        self.assertEqual(response.getheader("Connection"), "keep-alive")
+        sock = conn.sock
+
+        conn.request("GET", "/unknown")
+        response = conn.getresponse()
+        self.assertEqual(response.status, 400)
+        self.assertEqual(json.loads(response.read())["status"], "Bad Request")
+        # both requests were served on the same connection
+        self.assertIs(conn.sock, sock)
+
+        conn.request("GET", ServiceHandler.failures, headers={"Connection": "close"})
+        response = conn.getresponse()
+        self.assertEqual(response.getheader("Connection"), "close")
+        response.read()
+        conn.close()
+
+    def testMalformedRequest(self):
+        sock = self.openSocket()
+        sock.sendall(b"GARBAGE\r\n\r\n")
+        # the server drops a connection it can't parse, without replying
+        self.assertEqual(self.readUntil(sock, b"\r\n\r\n"), b"")
+
+        # and keeps serving others
+        sock = self.openSocket()
+        sock.sendall(("POST %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n" %
+                      (ServiceHandler.production, ControlServer.maxContentLength + 1)).encode())
+        self.assertTrue(self.readUntil(sock, b"\r\n\r\n").startswith(b"HTTP/1.1 413 "))
+
+    def testErrorReplies(self):
+        conn = self.connect()
+        conn.request("PUT", ServiceHandler.production, body=b"{}")
+        response = conn.getresponse()
+        self.assertEqual(response.status, 405)
+        response.read()
+
+        conn.request("DELETE", "/api/v1/other", body=b"{}")
+        response = conn.getresponse()
+        self.assertEqual(response.status, 400)
+        response.read()
+
+        for body in (b"not json", json.dumps({"level": 1}), json.dumps({"level": 1, "runid": "run2"})):
+            conn.request("DELETE", ServiceHandler.production, body=body)
+            response = conn.getresponse()
+            self.assertEqual(response.status, 422)
+            self.assertEqual(json.loads(response.read())["status"], "Unprocessable entity")
+
+        for query in ("", "?limit=x", "?offset=-1"):
+            path = (ServiceHandler.logs if not query else ServiceHandler.failures) + query
+            conn.request("GET", path)
+            response = conn.getresponse()
+            self.assertEqual(response.status, 422)
+            response.read()
+        conn.close()
+        self.assertEqual(self.production.levels, [])
+
+    def testDeleteActionRunsAfterResponse(self):
+        conn = self.connect()
+        conn.request("DELETE", ServiceHandler.production, body=json.dumps({"level": 2, "runid": "run1"}))
+        response = conn.getresponse()
+        self.assertEqual(response.status, 204)
+        self.assertEqual(response.read(), b"")
+        self.production.responded.set()
+        conn.close()
+
+        self.assertTrue(self.production.stopped.wait(5))
+        self.assertTrue(self.production.stoppedAfterResponse)
+        self.assertEqual(self.production.levels, [2])
+
+    def testFailuresPaging(self):
+        tmpDir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpDir.cleanup)
+        for name, nodes in (("a", ["A1", "A2", "A3"]), ("b", ["B1", "B2"])):
+            path = os.path.join(tmpDir.name, "%s.db" % name)
+            index = LogIndex(path)
+            index.add([{"dataId": "id=%s" % node, "node": node, "archive": "x", "offset": 0, "length": 0,
+                        "status": 1, "tail": ""} for node in nodes])
+            index.close()
+            self.production.indexPaths.append(path)
+
+        conn = self.connect()
+        pages = []
+        for offset in (0, 2, 4, 6):
+            conn.request("GET", "%s?limit=2&offset=%d" % (ServiceHandler.failures, offset))
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            pages.append([entry["node"] for entry in json.loads(response.read())])
+        conn.close()
+        self.assertEqual(pages, [["A1", "A2"], ["A3", "B1"], ["B2"], []])
+
+    def testEventStream(self):
+        sock = self.openStream()
+        # the stream subscribes once its headers are written
+        self.production.broadcaster.publish("workflowStarted", "wf1")
+        data = self.readUntil(sock, b"\n\n")
+        self.assertIn(b"event: workflowStarted\n", data)
+        record = json.loads(data.split(b"data: ", 1)[1].split(b"\n", 1)[0])
+        self.assertEqual(record["workflow"], "wf1")
+
+    def testStreamKeepalive(self):
+        self.server._handler.keepaliveInterval = 0.1
+        sock = self.openStream()
+        self.assertIn(b": keepalive\n\n", self.readUntil(sock, b": keepalive\n\n"))
+
+    def testShutdownWithOpenStreams(self):
+        socks = [self.openStream() for i in range(2)]
+        idle = self.connect()
+        idle.request("GET", ServiceHandler.failures)
+        idle.getresponse().read()
+
+        # the production finishing shuts the server down
+        self.production.running = False
+        self.production.broadcaster.publish("workflowShutdown", "wf1")
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+
+        # the streams are sent the last event, then closed, as is the idle connection
+        for sock in socks:
+            data = self.readUntil(sock, b"never sent")
+            self.assertIn(b"event: workflowShutdown\n", data)
+        self.assertEqual(idle.sock.recv(1), b"")
+        idle.close()
+        with self.assertRaises(OSError):
+            socket.create_connection(("127.0.0.1", self.server.port), timeout=1).close()
+
+    def testStop(self):
+        sock = self.openStream()
+        start = time.time()
+        self.server.stop()
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(self.readUntil(sock, b"never sent"), b"")
+        self.assertLess(time.time() - start, 5)
+
+
+class ControlServerMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,105 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the DagPlan class
+"""
+import os
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.DagPlan import DagPlan
+
+DAG = """JOB A workers/pre.condor
+JOB B workers/post.condor
+JOB A1 workers/worker.condor
+VARS A1 var1="visit=1 sensor=0 --id visit=1 sensor=1"
+VARS A1 visit="1"
+JOB A2 workers/worker.condor
+VARS A2 var1="visit=2 sensor=0"
+VARS A2 visit="2"
+JOB A3 workers/worker.condor
+VARS A3 var1="visit=2 sensor=1"
+VARS A3 visit="2"
+PARENT A CHILD A1 A2 A3
+PARENT A1 A2 A3 CHILD B
+"""
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class DagPlanTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.dagFile = os.path.join(self.tmpDir.name, "test.dag")
+        with open(self.dagFile, "w") as fileObj:
+            fileObj.write(DAG)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testCounts(self):
+        plan = DagPlan(self.dagFile)
+        self.assertEqual(plan.size, len(DAG))
+        self.assertEqual(plan.nodes, 5)
+        self.assertEqual(plan.workerNodes, 3)
+        self.assertEqual(plan.dataIds, 4)
+        self.assertEqual(plan.groups, 2)
+
+    def testEstimate(self):
+        plan = DagPlan(self.dagFile)
+        estimate = plan.estimate(2, jobTime=60.0, pollInterval=10.0)
+        self.assertEqual(estimate["concurrency"], 2)
+        self.assertEqual(estimate["waves"], 2)
+        self.assertEqual(estimate["queued"], 3)
+        # two waves of workers, and the pre and post jobs
+        self.assertEqual(estimate["wallTime"], 240.0)
+        self.assertEqual(estimate["polls"], 24)
+        self.assertEqual(estimate["scheddLoad"], 72)
+
+        estimate = plan.estimate(None, maxJobs=1)
+        self.assertEqual(estimate["concurrency"], 1)
+        self.assertEqual(estimate["waves"], 3)
+        self.assertIsNone(estimate["wallTime"])
+        self.assertIsNone(estimate["scheddLoad"])
+
+    def testSplices(self):
+        spliceFile = os.path.join(self.tmpDir.name, "wf.dag")
+        with open(spliceFile, "w") as fileObj:
+            fileObj.write("SPLICE isr test.dag DIR isr\nSPLICE calib calib.dag\nPARENT isr CHILD calib\n")
+        plan = DagPlan(spliceFile)
+        self.assertEqual(plan.nodes, 0)
+        self.assertEqual(plan.splices, [("isr", os.path.join(self.tmpDir.name, "isr", "test.dag")),
+                                        ("calib", os.path.join(self.tmpDir.name, "calib.dag"))])
+
+
+class MemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
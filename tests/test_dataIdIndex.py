@@ -0,0 +1,79 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the DataIdIndex class
+"""
+import os
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.DataIdIndex import DataIdIndex, hashDataId
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class DataIdIndexTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.ids = ["visit=885335881 raft=2,2 sensor=0,%d" % i for i in range(3)]
+        self.index = DataIdIndex(hashDataId(dataId) for dataId in self.ids)
+
+    def tearDown(self):
+        pass
+
+    def testHash(self):
+        self.assertEqual(hashDataId("visit=1 raft=2,2"), hashDataId(" visit=1  raft=2,2\n"))
+        self.assertNotEqual(hashDataId("visit=1 raft=2,2"), hashDataId("visit=1 raft=2,3"))
+
+    def testContains(self):
+        for dataId in self.ids:
+            self.assertIn(hashDataId(dataId), self.index)
+        self.assertNotIn(hashDataId("visit=1"), self.index)
+
+    def testUpdate(self):
+        self.index.update([hashDataId(self.ids[0]), hashDataId("visit=1"), hashDataId("visit=1")])
+        self.assertEqual(len(self.index), 4)
+        self.assertIn(hashDataId("visit=1"), self.index)
+
+    def testSaveLoad(self):
+        with tempfile.TemporaryDirectory() as tmpDir:
+            path = os.path.join(tmpDir, "ids.index")
+            self.assertEqual(len(DataIdIndex.load(path)), 0)
+            self.index.save(path)
+            self.assertEqual(os.path.getsize(path), 8*len(self.ids))
+            loaded = DataIdIndex.load(path)
+            self.assertEqual(len(loaded), len(self.ids))
+            for dataId in self.ids:
+                self.assertIn(hashDataId(dataId), loaded)
+
+
+class DataIdIndexMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,117 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the DataIdTable class
+"""
+import io
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.DataIdIndex import DataIdIndex, hashDataId
+from lsst.ctrl.orca.DataIdParser import DataIdParser, parseDataId
+from lsst.ctrl.orca.DataIdTable import DataIdTable
+from lsst.ctrl.orca.exceptions import DataIdError
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class DataIdTableTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def testParse(self):
+        self.assertEqual(parseDataId("visit=1  raft=2,2"), (("visit", "raft"), ("1", "2,2")))
+        self.assertEqual(parseDataId("12345"), ((None,), ("12345",)))
+        for text in ["", "visit=", "visit=1 raft", "visit=1 visit=2", "visit==1", 'visit="1"']:
+            with self.assertRaises(DataIdError):
+                parseDataId(text)
+
+    def testFormat(self):
+        parser = DataIdParser()
+        self.assertEqual(parser.format("visit=887136081 raft=2,2  sensor=0,1"),
+                         ("visit=887136081 raft=2,2 sensor=0,1", "visit-887136081:raft-2_2:sensor-0_1",
+                          "887136081"))
+        self.assertEqual(parser.format("12345"), ("12345", "12345", "12345"))
+        parser = DataIdParser("run")
+        self.assertEqual(parser.format("filter=i run=3325 camcol=4 field=56"),
+                         ("filter=i run=3325 camcol=4 field=56", "filter-i:run-3325:camcol-4:field-56",
+                          "3325"))
+        with self.assertRaises(DataIdError):
+            parser.format("filter=i rerun=3325")
+        dataIds = ["run=3325 filter=i", "filter=g run=3326", "filter=g rerun=1 run=3327"]
+        self.assertEqual(parser.formatMany(dataIds),
+                         (dataIds, ["run-3325:filter-i", "filter-g:run-3326", "filter-g:rerun-1:run-3327"],
+                          ["3325", "3326", "3327"]))
+        self.assertEqual(DataIdParser().formatMany(["1", "a=2"]), (["1", "a=2"], ["1", "a-2"], ["1", "2"]))
+        self.assertEqual(parser.formatMany([]), ([], [], []))
+        with self.assertRaises(DataIdError):
+            parser.formatMany(["run=1", "rerun=2"])
+
+    def testFromFile(self):
+        lines = ["visit=1 raft=2,2", "", "# comment", "visit=1  raft=2,2", "visit=2 raft=2,2",
+                 "visit=3", "visit=007 raft=1,0"]
+        table, errors, errorCount = DataIdTable.fromFile(io.StringIO("\n".join(lines)))
+        self.assertEqual(list(table), ["visit=1 raft=2,2", "visit=2 raft=2,2", "visit=007 raft=1,0"])
+        self.assertEqual(table.duplicates, 1)
+        self.assertEqual(errorCount, 1)
+        self.assertEqual(errors[0][0], 6)
+        self.assertFalse(table.column("visit").isInteger())
+        self.assertEqual(table.column("visit").distinct(), {"1", "2", "007"})
+
+    def testManyIds(self):
+        table = DataIdTable(exclude=DataIdIndex([hashDataId("visit=0 sensor=0")]))
+        for i in range(5000):
+            for sensor in range(3):
+                table.append("visit=%d sensor=%d" % (i, sensor))
+        table.append("visit=1 sensor=1")
+        self.assertEqual(len(table), 14999)
+        self.assertEqual((table.excluded, table.duplicates), (1, 1))
+        self.assertTrue(table.column("sensor").isInteger())
+        self.assertEqual(table[0], "visit=0 sensor=1")
+        self.assertEqual(sorted(table.hashes()), sorted(hashDataId(dataId) for dataId in table))
+
+    def testBatches(self):
+        table = DataIdTable()
+        for dataId in ["visit=30 raft=1,1", "visit=4 raft=2,2", "visit=30 raft=0,1", "visit=4 raft=1,1",
+                       "visit=30 raft=2,2", "visit=100 raft=2,2"]:
+            table.append(dataId)
+        order = table.order(["visit"])
+        self.assertEqual(list(order), [1, 3, 0, 2, 4, 5])
+        self.assertEqual(list(table.batches(2, ["visit"], order)), [[1, 3], [0, 2], [4], [5]])
+        self.assertEqual(list(table.order(["raft", "visit"])), [2, 3, 0, 1, 4, 5])
+        self.assertEqual(list(table.batches(4)), [[0, 1, 2, 3], [4, 5]])
+
+
+class DataIdTableMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,107 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of the FileWaitConnection class, with a local shell standing in for the
+remote one
+"""
+import os
+import sys
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.FileWaitConnection import FileWaitConnection
+from lsst.ctrl.orca.FileWaiter import FileWaiter
+
+# runs the command it's given here, ignoring the node
+LOCAL_SHELL = ["sh", "-c", 'shift; exec "$@"', "sh"]
+
+FILE_WAITER = "%s %s" % (sys.executable,
+                         os.path.join(os.path.dirname(__file__), os.pardir, "bin.src", "filewaiter.py"))
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class FileWaitConnectionTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmpDir.name, "%d.log" % i) for i in range(3)]
+        self.listFile = os.path.join(self.tmpDir.name, "files.txt")
+        with open(self.listFile, "w") as fileObj:
+            fileObj.write("\n".join(self.paths) + "\n")
+        self.connection = FileWaitConnection("node1", FILE_WAITER + " -i 0.1", LOCAL_SHELL)
+
+    def tearDown(self):
+        self.connection.close()
+        self.tmpDir.cleanup()
+
+    def create(self, path):
+        with open(path, "w"):
+            pass
+
+    def testConcurrentWaits(self):
+        waitAll = self.connection.submit("all", self.listFile)
+        waitFirst = self.connection.submit("first", self.listFile)
+        waitLast = self.connection.submit("file", self.paths[2])
+        self.create(self.paths[0])
+        self.assertTrue(waitFirst.wait(10))
+        self.assertEqual(waitFirst.appeared, self.paths[:1])
+        self.assertFalse(waitAll.wait(0.3))
+        self.create(self.paths[2])
+        self.assertTrue(waitLast.wait(10))
+        self.assertFalse(waitAll.isDone())
+        self.create(self.paths[1])
+        self.assertTrue(waitAll.wait(10))
+        self.assertEqual(sorted(waitAll.appeared), self.paths)
+
+    def testErrors(self):
+        wait = self.connection.submit("all", os.path.join(self.tmpDir.name, "missing.txt"))
+        with self.assertRaises(RuntimeError):
+            wait.wait(10)
+        pending = self.connection.submit("file", os.path.join(self.tmpDir.name, "never"))
+        self.connection.close()
+        self.assertTrue(self.connection.isClosed())
+        with self.assertRaises(RuntimeError):
+            pending.wait(10)
+
+    def testFileWaiter(self):
+        for path in self.paths:
+            self.create(path)
+        waiter = FileWaiter("node1", FILE_WAITER, self.listFile, multiplex=True, shell=LOCAL_SHELL)
+        waiter.waitForAllFiles()
+        connection = FileWaitConnection.get("node1", FILE_WAITER)
+        self.assertIs(FileWaitConnection.get("node1", FILE_WAITER), connection)
+        connection.close()
+
+
+class FileWaitConnectionMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,89 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of the FileWatcher class
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.FileWatcher import FileWatcher
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class FileWatcherTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmpDir.name, "a", "%d.log" % i) for i in range(3)]
+        self.paths.append(os.path.join(self.tmpDir.name, "b", "0.log"))
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def create(self, paths):
+        for path in paths:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w"):
+                pass
+
+    def testScan(self):
+        watcher = FileWatcher(self.paths)
+        self.assertEqual(watcher.scan(), [])
+        self.create(self.paths[1:])
+        self.assertEqual(sorted(watcher.scan()), sorted(self.paths[1:]))
+        self.assertEqual(watcher.pending(), self.paths[:1])
+        self.assertFalse(watcher.wait(timeout=0.1))
+
+    def checkWait(self, useInotify):
+        watcher = FileWatcher(self.paths, pollInterval=0.2, useInotify=useInotify)
+        # the directories don't exist until the files are created
+        creator = threading.Timer(0.3, self.create, [self.paths])
+        creator.start()
+        start = time.time()
+        self.assertTrue(watcher.wait(timeout=10))
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(watcher.pending(), [])
+        creator.join()
+
+    def testWait(self):
+        self.checkWait(useInotify=False)
+
+    def testWaitInotify(self):
+        self.checkWait(useInotify=True)
+
+
+class FileWatcherMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,108 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the GlideinManager class, against a fake batch system
+"""
+import types
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.GlideinManager import GlideinManager
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class FakeBatch:
+    """A batch system which grants glidein requests at once"""
+
+    def __init__(self):
+        self.requests = 0
+        self.submitted = 0
+        self.retired = 0
+
+    def count(self):
+        return self.requests
+
+    def submit(self, count):
+        self.requests += count
+        self.submitted += count
+
+    def retire(self, count):
+        count = min(count, self.requests)
+        self.requests -= count
+        self.retired += count
+
+
+class GlideinManagerTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.batch = FakeBatch()
+        self.jobs = {"idle": 0, "running": 0}
+        config = types.SimpleNamespace(minGlideins=1, maxGlideins=10, slotsPerGlidein=8, scaleDownDelay=60)
+        self.manager = GlideinManager(self.batch, lambda: dict(self.jobs), config)
+
+    def tearDown(self):
+        pass
+
+    def testScaleUp(self):
+        self.assertEqual(self.manager.step(now=0), 1)
+        self.jobs["idle"] = 20
+        self.assertEqual(self.manager.step(now=10), 2)
+        self.assertEqual(self.batch.requests, 3)
+        # pending requests aren't requested again
+        self.assertEqual(self.manager.step(now=20), 0)
+        self.jobs["idle"] = 1000
+        self.manager.step(now=30)
+        self.assertEqual(self.batch.requests, 10)
+
+    def testScaleDown(self):
+        self.jobs["running"] = 80
+        self.manager.step(now=0)
+        self.assertEqual(self.batch.requests, 10)
+        self.jobs["running"] = 20
+        self.assertEqual(self.manager.step(now=10), 0)
+        # a lull shorter than the delay retires nothing
+        self.jobs["running"] = 80
+        self.manager.step(now=20)
+        self.jobs["running"] = 20
+        self.manager.step(now=30)
+        self.assertEqual(self.manager.step(now=60), 0)
+        self.assertEqual(self.manager.step(now=90), -7)
+        self.assertEqual(self.batch.requests, 3)
+        self.jobs["running"] = 0
+        self.manager.step(now=100)
+        self.manager.step(now=200)
+        self.assertEqual(self.batch.requests, 1)
+        self.manager.shutdown()
+        self.assertEqual(self.batch.requests, 0)
+
+
+class GlideinManagerMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
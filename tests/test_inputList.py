@@ -0,0 +1,80 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of reading input lists
+"""
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.InputList import openInputList, readInputLines
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class InputListTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.lines = ["visit=%d raft=2,2 sensor=0,%d" % (885335881 + i, i % 3) for i in range(1000)]
+        self.lines.insert(10, "")
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def write(self, name, text, opener=open):
+        path = os.path.join(self.tmpDir.name, name)
+        with opener(path, "wt") as fileObj:
+            fileObj.write(text)
+        return path
+
+    def testPlain(self):
+        path = self.write("ids.input", "\n".join(self.lines) + "\n")
+        for chunkSize in [1, 7, 100, 1 << 16]:
+            self.assertEqual(list(readInputLines(path, chunkSize)), self.lines)
+        path = self.write("noNewline.input", "a\nb")
+        self.assertEqual(list(readInputLines(path, 1)), ["a", "b"])
+        path = self.write("empty.input", "")
+        self.assertEqual(list(readInputLines(path)), [])
+
+    def testCompressed(self):
+        for suffix, opener in [(".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)]:
+            path = self.write("ids.input" + suffix, "\n".join(self.lines) + "\n", opener)
+            self.assertEqual(list(readInputLines(path)), self.lines)
+            with openInputList(path) as fileObj:
+                self.assertEqual(fileObj.readline(), self.lines[0] + "\n")
+
+
+class InputListMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,171 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of the LogAggregator class
+"""
+import gzip
+import os
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.LogAggregator import LogAggregator, LogIndex, readNodeStatuses
+
+DAG = """JOB A1 preJob.condor
+JOB A2 workerJob.condor
+VARS A2 var1="visit=1 sensor=0 --id visit=1 sensor=1"
+VARS A2 var2="visit-1:sensor-0+1"
+VARS A2 visit="1"
+JOB A3 workerJob.condor
+VARS A3 var1="visit=2 sensor=0"
+VARS A3 var2="visit-2:sensor-0"
+VARS A3 visit="2"
+JOB A4 workerJob.condor
+VARS A4 var1="visit=2 sensor=1"
+VARS A4 var2="visit-2:sensor-1"
+VARS A4 visit="2"
+"""
+
+NODES_LOG = """000 (101.000.000) 10/19 12:00:00 Job submitted from host: <127.0.0.1:9618>
+    DAG Node: A1
+...
+005 (101.000.000) 10/19 12:00:01 Job terminated.
+\t(1) Normal termination (return value 0)
+...
+000 (102.000.000) 10/19 12:00:02 Job submitted from host: <127.0.0.1:9618>
+    DAG Node: A2
+...
+000 (103.000.000) 10/19 12:00:02 Job submitted from host: <127.0.0.1:9618>
+    DAG Node: A3
+...
+005 (102.000.000) 10/19 12:01:00 Job terminated.
+\t(1) Normal termination (return value 0)
+...
+005 (103.000.000) 10/19 12:01:00 Job terminated.
+\t(0) Abnormal termination (signal 9)
+...
+000 (104.000.000) 10/19 12:00:02 Job submitted from host: <127.0.0.1:9618>
+    DAG Node: A4
+...
+"""
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class LogAggregatorTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.stagingDir = self.tmpDir.name
+        self.dagFile = os.path.join(self.stagingDir, "test.dag")
+        with open(self.dagFile, "w") as fileObj:
+            fileObj.write(DAG)
+        with open(self.dagFile + ".nodes.log", "w") as fileObj:
+            fileObj.write(NODES_LOG)
+        logs = [("1", "visit-1:sensor-0+1"), ("2", "visit-2:sensor-0"), ("2", "visit-2:sensor-1")]
+        for visit, var2 in logs:
+            logDir = os.path.join(self.stagingDir, "logs", visit)
+            os.makedirs(logDir, exist_ok=True)
+            base = os.path.join(logDir, "worker-%s" % var2)
+            with open(base + ".out", "w") as fileObj:
+                fileObj.write("".join("%s line %d\n" % (var2, i) for i in range(20)))
+            with open(base + ".err", "w") as fileObj:
+                fileObj.write("killed\n" if var2 == "visit-2:sensor-0" else "")
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testNodeStatuses(self):
+        self.assertEqual(readNodeStatuses(self.dagFile + ".nodes.log"), {"A1": 0, "A2": 0, "A3": -9})
+
+    def testAggregate(self):
+        aggregator = LogAggregator(self.stagingDir, tailLines=2)
+        self.assertEqual(aggregator.aggregate(), 2)
+        # the running job's logs are left alone, the others are packed
+        logDir = os.path.join(self.stagingDir, "logs")
+        self.assertEqual(sorted(os.listdir(os.path.join(logDir, "2"))),
+                         ["worker-visit-2:sensor-1.err", "worker-visit-2:sensor-1.out"])
+        self.assertEqual(os.listdir(os.path.join(logDir, "1")), [])
+        self.assertEqual(aggregator.aggregate(), 0)
+
+        index = LogIndex(aggregator.getIndexPath())
+        try:
+            entry = index.lookup("visit=1  sensor=1")
+            self.assertEqual(entry["node"], "A2")
+            self.assertEqual(entry["status"], 0)
+            self.assertEqual(entry["tail"], "visit-1:sensor-0+1 line 18\nvisit-1:sensor-0+1 line 19")
+            self.assertIn("visit-1:sensor-0+1 line 0\n", index.read(entry))
+            self.assertIsNone(index.lookup("visit=2 sensor=1"))
+
+            failures = index.failures()
+            self.assertEqual([(entry["dataId"], entry["status"], entry["tail"]) for entry in failures],
+                             [("visit=2 sensor=0", -9, "killed")])
+            self.assertEqual(index.countFailures(), 1)
+            self.assertEqual(len(index.failures(limit=1)), 1)
+            self.assertEqual(index.failures(offset=1), [])
+        finally:
+            index.close()
+
+        # the archive is an ordinary gzip file of all its logs
+        with gzip.open(os.path.join(logDir, "1.logs.gz"), "rt") as fileObj:
+            self.assertEqual(fileObj.read().count("==> stdout <=="), 1)
+
+    def testAggregateSplices(self):
+        # a workflow of one task "isr", whose DAG and logs are in its own directory
+        taskDir = os.path.join(self.stagingDir, "isr")
+        os.makedirs(taskDir)
+        os.rename(os.path.join(self.stagingDir, "logs"), os.path.join(taskDir, "logs"))
+        os.rename(self.dagFile, os.path.join(taskDir, "test.dag"))
+        os.remove(self.dagFile + ".nodes.log")
+        dagFile = os.path.join(self.stagingDir, "wf.dag")
+        with open(dagFile, "w") as fileObj:
+            fileObj.write("SPLICE isr test.dag DIR isr\n")
+        with open(dagFile + ".nodes.log", "w") as fileObj:
+            fileObj.write(NODES_LOG.replace("DAG Node: ", "DAG Node: isr+"))
+
+        aggregator = LogAggregator(self.stagingDir, dagFiles=[dagFile],
+                                   splices=[("isr", os.path.join(taskDir, "test.dag"))])
+        self.assertEqual(aggregator.aggregate(), 2)
+        self.assertEqual(os.listdir(os.path.join(taskDir, "logs", "1")), [])
+        self.assertTrue(os.path.exists(os.path.join(self.stagingDir, "logs", "isr", "1.logs.gz")))
+
+        index = LogIndex(aggregator.getIndexPath())
+        try:
+            entry = index.lookup("visit=1 sensor=1")
+            self.assertEqual(entry["node"], "isr+A2")
+            self.assertIn("visit-1:sensor-0+1 line 0\n", index.read(entry))
+            self.assertEqual([entry["node"] for entry in index.failures()], ["isr+A3"])
+        finally:
+            index.close()
+
+
+class LogAggregatorMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
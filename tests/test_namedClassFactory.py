@@ -0,0 +1,75 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the NamedClassFactory class
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import lsst.utils.tests
+
+from lsst.ctrl.orca.NamedClassFactory import NamedClassFactory
+from lsst.ctrl.orca.LogAggregator import LogAggregator, LogIndex
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class NamedClassFactoryTestCase(lsst.utils.tests.TestCase):
+
+    def testClassName(self):
+        factory = NamedClassFactory()
+        self.assertIs(factory.createClass("lsst.ctrl.orca.LogAggregator.LogIndex"), LogIndex)
+        self.assertIs(factory.createClass("lsst.ctrl.orca.LogAggregator.LogAggregator"), LogAggregator)
+
+    def testModuleName(self):
+        # the class of the same name as the module
+        factory = NamedClassFactory()
+        self.assertIs(factory.createClass("lsst.ctrl.orca.LogAggregator"), LogAggregator)
+
+    def testAlias(self):
+        factory = NamedClassFactory()
+        for alias, name in NamedClassFactory.builtinPlugins.items():
+            self.assertEqual(factory.createClass(alias).__name__, name.rpartition(".")[2])
+
+    def testUnknown(self):
+        factory = NamedClassFactory()
+        for name in ["lsst.ctrl.orca.NoSuchModule", "lsst.ctrl.orca.LogAggregator.NoSuchClass",
+                     "noSuchPlugin"]:
+            with self.assertRaises(RuntimeError):
+                factory.createClass(name)
+
+    def testThreads(self):
+        name = "lsst.ctrl.orca.LogAggregator.LogIndex"
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            classes = list(executor.map(lambda i: NamedClassFactory().createClass(name), range(64)))
+        self.assertTrue(all(classobj is LogIndex for classobj in classes))
+
+
+class MemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,177 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+"""
+Tests of the RunJournal, and of resuming a production from it
+"""
+import json
+import os
+import stat
+import tempfile
+import unittest
+import unittest.mock
+import lsst.utils.tests
+
+from lsst.ctrl.orca.CondorWorkflowMonitor import CondorWorkflowMonitor
+from lsst.ctrl.orca.LogAggregator import LogAggregator
+from lsst.ctrl.orca.ProductionRunManager import ProductionRunManager
+from lsst.ctrl.orca.RunJournal import RunJournal
+
+# the DAG has left the queue by the first poll, and succeeded
+FAKE_CONDOR_Q = "#!/bin/sh\nexit 0\n"
+FAKE_CONDOR_HISTORY = "#!/bin/sh\necho 0\n"
+
+CONFIG = """
+config.production.shortName = "DataRelease"
+config.workflow["workflow1"].shortName = "wf"
+config.workflow["workflow1"].configurationType = "condor"
+config.workflow["workflow1"].configurationClass = "condor"
+config.workflow["workflow1"].configuration["condor"].condorData.localScratch = %r
+config.workflow["workflow1"].monitor.statusCheckInterval = 0
+config.workflow["workflow1"].monitor.logPackInterval = 60
+"""
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class RunJournalTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.journal = RunJournal(self.tmpDir.name)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testAppend(self):
+        with unittest.mock.patch("os.fsync") as fsync:
+            self.journal.append("launch", workflow="wf", jobId="12.0")
+            self.journal.workflowProgress("wf", {"done": 1})
+            self.journal.append("workflowShutdown", workflow="wf")
+        # each record is on disk before append() returns
+        self.assertEqual(fsync.call_count, 2)
+        records = self.journal.load()
+        self.assertEqual([(record["event"], record["workflow"]) for record in records],
+                         [("launch", "wf"), ("workflowShutdown", "wf")])
+        self.assertEqual(records[0]["jobId"], "12.0")
+        self.assertIsNone(self.journal.getResumableLaunch())
+
+    def testTruncatedLastLine(self):
+        self.journal.append("launch", workflow="wf", jobId="12.0")
+        # a crash in the middle of an append
+        with open(self.journal.path, "a") as fileObj:
+            fileObj.write('{"event": "workflowShut')
+        self.assertEqual([record["event"] for record in self.journal.load()], ["launch"])
+        self.assertEqual(self.journal.getResumableLaunch()["jobId"], "12.0")
+
+        # the next record starts on a line of its own
+        self.journal.append("launch", workflow="wf", jobId="13.0")
+        self.assertEqual([record["jobId"] for record in self.journal.load()], ["12.0", "13.0"])
+
+    def testRecordLaunch(self):
+        monitor = CondorWorkflowMonitor("12.0", None, "wf")
+        launcher = unittest.mock.Mock()
+        launcher.getResumeState.return_value = {"dagFile": "W.dag"}
+        self.journal.recordLaunch("wf", monitor, launcher)
+        launch = self.journal.getResumableLaunch()
+        self.assertEqual(launch["monitorClass"], "lsst.ctrl.orca.CondorWorkflowMonitor.CondorWorkflowMonitor")
+        self.assertEqual(launch["jobId"], "12.0")
+        self.assertEqual(launch["dagFile"], "W.dag")
+
+
+class ResumeProductionTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        binDir = os.path.join(self.tmpDir.name, "bin")
+        os.makedirs(binDir)
+        for command, script in (("condor_q", FAKE_CONDOR_Q), ("condor_history", FAKE_CONDOR_HISTORY)):
+            path = os.path.join(binDir, command)
+            with open(path, "w") as fileObj:
+                fileObj.write(script)
+            os.chmod(path, stat.S_IRWXU)
+        self.path = os.environ["PATH"]
+        os.environ["PATH"] = binDir + os.pathsep + self.path
+
+        scratch = os.path.join(self.tmpDir.name, "scratch")
+        self.stagingDir = os.path.join(scratch, "run1")
+        os.makedirs(self.stagingDir)
+        self.configFile = os.path.join(self.tmpDir.name, "prod.config")
+        with open(self.configFile, "w") as fileObj:
+            fileObj.write(CONFIG % scratch)
+        self.journal = RunJournal(self.stagingDir)
+
+    def tearDown(self):
+        os.environ["PATH"] = self.path
+        self.tmpDir.cleanup()
+
+    def resume(self):
+        manager = ProductionRunManager("run1", self.configFile)
+        self.assertTrue(manager.resumeProduction())
+        monitor, = manager._workflowMonitors
+        monitor._wfMonitorThread.join(10)
+        manager.joinShutdownThread()
+        self.assertFalse(manager.isRunning())
+        return monitor
+
+    def testResume(self):
+        self.journal.append("launch", workflow="wf", jobId="12.0", dagFile="W.dag",
+                            monitorClass="lsst.ctrl.orca.CondorWorkflowMonitor.CondorWorkflowMonitor")
+        monitor = self.resume()
+        # the launcher was rebuilt, so the logs are packed as they would have been
+        self.assertIsInstance(monitor, CondorWorkflowMonitor)
+        self.assertEqual(monitor.getJobId(), "12.0")
+        self.assertEqual(monitor.dagFile, os.path.join(self.stagingDir, "W.dag"))
+        self.assertIsInstance(monitor.logAggregator, LogAggregator)
+        self.assertIsNone(monitor.glideinManager)
+        events = [record["event"] for record in self.journal.load()]
+        self.assertEqual(events[:2], ["launch", "resume"])
+        self.assertEqual(events[-1], "workflowShutdown")
+        self.assertIsNone(self.journal.getResumableLaunch())
+
+    def testResumeOldJournal(self):
+        # a journal written before launchers recorded their DAG, naming only the monitor's module
+        self.journal.append("launch", workflow="wf", jobId="12.0",
+                            monitorClass="lsst.ctrl.orca.CondorWorkflowMonitor")
+        monitor = self.resume()
+        self.assertEqual(monitor.getJobId(), "12.0")
+        self.assertIsNone(monitor.logAggregator)
+
+    def testNothingToResume(self):
+        self.journal.append("launch", workflow="wf", jobId="12.0", dagFile="W.dag",
+                            monitorClass="lsst.ctrl.orca.CondorWorkflowMonitor.CondorWorkflowMonitor")
+        self.journal.append("workflowShutdown", workflow="wf")
+        manager = ProductionRunManager("run1", self.configFile)
+        self.assertFalse(manager.resumeProduction())
+        self.assertEqual(json.loads(open(self.journal.path).readlines()[-1])["event"], "workflowShutdown")
+
+
+class RunJournalMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,126 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the StagingCache class
+"""
+import os
+import tempfile
+import time
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.StagingCache import StagingCache
+from lsst.ctrl.orca.TemplateWriter import TemplateWriter
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class StagingCacheTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cache = StagingCache(os.path.join(self.tmpDir.name, "cache"))
+        self.runDirs = []
+        for runid in ["run1", "run2"]:
+            runDir = os.path.join(self.tmpDir.name, runid)
+            os.makedirs(runDir)
+            self.runDirs.append(runDir)
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testStage(self):
+        outputs = [os.path.join(runDir, "job.sh") for runDir in self.runDirs]
+        for outputFile in outputs:
+            self.assertTrue(self.cache.stage("echo hello\n", outputFile, executable=True))
+        # both runs share the one file of the store
+        st1, st2 = [os.stat(outputFile) for outputFile in outputs]
+        self.assertEqual((st1.st_dev, st1.st_ino), (st2.st_dev, st2.st_ino))
+        self.assertEqual(st1.st_nlink, 3)
+        self.assertTrue(os.access(outputs[0], os.X_OK))
+        with open(outputs[1]) as fileObj:
+            self.assertEqual(fileObj.read(), "echo hello\n")
+
+        # the same content, not executable, is another file
+        outputFile = os.path.join(self.runDirs[0], "job.txt")
+        self.cache.stage("echo hello\n", outputFile)
+        self.assertNotEqual(os.stat(outputFile).st_ino, st1.st_ino)
+        self.assertFalse(os.access(outputFile, os.X_OK))
+
+        # staging other content over a file replaces it, not the file of the store
+        self.cache.stage("echo bye\n", outputs[0], executable=True)
+        with open(outputs[1]) as fileObj:
+            self.assertEqual(fileObj.read(), "echo hello\n")
+
+    def testStageFile(self):
+        inputFile = os.path.join(self.tmpDir.name, "transformation.txt")
+        with open(inputFile, "w") as fileObj:
+            fileObj.write("tr hello\n")
+        outputFile = self.cache.stageFile(inputFile, self.runDirs[0])
+        self.assertEqual(outputFile, os.path.join(self.runDirs[0], "transformation.txt"))
+        with open(outputFile) as fileObj:
+            self.assertEqual(fileObj.read(), "tr hello\n")
+
+    def testClean(self):
+        old = self.cache.store("old")
+        recent = self.cache.store("recent")
+        newest = self.cache.store("newest")
+        now = time.time()
+        os.utime(old, (now - 3600, now - 3600))
+        os.utime(recent, (now - 60, now - 60))
+
+        self.assertEqual(self.cache.clean(maxAge=600), 1)
+        self.assertFalse(os.path.exists(old))
+        # the least recently used go first, until the rest fit
+        self.assertEqual(self.cache.clean(maxSize=len("newest")), 1)
+        self.assertFalse(os.path.exists(recent))
+        self.assertTrue(os.path.exists(newest))
+
+        # storing content again marks it as used
+        os.utime(newest, (now - 3600, now - 3600))
+        self.assertEqual(self.cache.store("newest"), newest)
+        self.assertEqual(self.cache.clean(maxAge=600), 0)
+
+    def testRender(self):
+        template = os.path.join(self.tmpDir.name, "job.template")
+        with open(template, "w") as fileObj:
+            fileObj.write("run $ORCA_RUNID\nroot $ORCA_DEFAULTROOT/$ORCA_RUNID\n")
+        pairs = {"ORCA_RUNID": "run1", "ORCA_DEFAULTROOT": "/tmp"}
+        writer = TemplateWriter()
+        text = writer.render(template, pairs)
+        self.assertEqual(text, "run run1\nroot /tmp/run1\n")
+        outputFile = os.path.join(self.runDirs[0], "job.sh")
+        writer.rewrite(template, outputFile, pairs)
+        with open(outputFile) as fileObj:
+            self.assertEqual(fileObj.read(), text)
+
+
+class MemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
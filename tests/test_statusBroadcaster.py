@@ -0,0 +1,105 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the StatusBroadcaster class
+"""
+import asyncio
+import queue
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.StatusBroadcaster import StatusBroadcaster
+from lsst.ctrl.orca.StatusListener import StatusListener
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class StatusBroadcasterTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.broadcaster = StatusBroadcaster(maxQueued=3)
+
+    def tearDown(self):
+        pass
+
+    def testFanOut(self):
+        sub1 = self.broadcaster.subscribe()
+        sub2 = self.broadcaster.subscribe()
+        self.broadcaster.publish("workflowStarted", "wf1")
+        for sub in (sub1, sub2):
+            record = sub.get(timeout=0)
+            self.assertEqual(record["event"], "workflowStarted")
+            self.assertEqual(record["workflow"], "wf1")
+            self.assertEqual(record["id"], 1)
+
+    def testUnsubscribe(self):
+        sub = self.broadcaster.subscribe()
+        self.broadcaster.unsubscribe(sub)
+        self.broadcaster.publish("workflowStarted", "wf1")
+        with self.assertRaises(queue.Empty):
+            sub.get(timeout=0)
+
+    def testDropOldest(self):
+        sub = self.broadcaster.subscribe()
+        for i in range(5):
+            self.broadcaster.publish("workflowProgress", "wf1", progress={"done": i})
+        self.assertEqual(sub.dropped, 2)
+        ids = [sub.get(timeout=0)["id"] for i in range(3)]
+        self.assertEqual(ids, [3, 4, 5])
+
+    def testAsyncSubscription(self):
+        async def consume():
+            sub = self.broadcaster.subscribe(asyncio.get_running_loop())
+            for i in range(5):
+                self.broadcaster.publish("workflowProgress", "wf1", progress={"done": i})
+            sub.close()
+            records = []
+            record = await sub.get()
+            while record is not None:
+                records.append(record["id"])
+                record = await sub.get()
+            self.broadcaster.unsubscribe(sub)
+            return sub.dropped, records
+        dropped, records = asyncio.run(consume())
+        self.assertEqual(dropped, 2)
+        self.assertEqual(records, [3, 4, 5])
+
+    def testListener(self):
+        sub = self.broadcaster.subscribe()
+        listener = StatusListener(self.broadcaster)
+        listener.workflowStarted("wf1")
+        listener.workflowProgress("wf1", {"done": 1})
+        listener.workflowShutdown("wf1")
+        events = [sub.get(timeout=0)["event"] for i in range(3)]
+        self.assertEqual(events, ["workflowStarted", "workflowProgress", "workflowShutdown"])
+
+
+class StatusBroadcasterMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
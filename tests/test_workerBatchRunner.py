@@ -0,0 +1,110 @@
+#
+# LSST Data Management System
+# Copyright 2008, 2009, 2010 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+"""
+Tests of the WorkerBatchRunner class
+"""
+import os
+import tempfile
+import unittest
+import lsst.utils.tests
+
+from lsst.ctrl.orca.CompletionLedger import CompletionLedger
+from lsst.ctrl.orca.DataIdIndex import hashDataId
+from lsst.ctrl.orca.WorkerBatchRunner import WorkerBatchRunner, splitBatch
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+class WorkerBatchRunnerTestCase(lsst.utils.tests.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def testSplitBatch(self):
+        self.assertEqual(splitBatch(["visit=1", "raft=2,2", "--id", "visit=2", "raft=2,2"]),
+                         ["visit=1 raft=2,2", "visit=2 raft=2,2"])
+        self.assertEqual(splitBatch(["visit=1", "raft=2,2"]), ["visit=1 raft=2,2"])
+        self.assertEqual(splitBatch(["100", "101"]), ["100", "101"])
+
+    def testRun(self):
+        resultsFile = os.path.join(self.tmpDir.name, "batch.results")
+        logDir = os.path.join(self.tmpDir.name, "logs")
+        # fails for sensor 1
+        command = ["sh", "-c", 'echo "$*"; case "$*" in *sensor=1) exit 3;; esac', "sh", "{dataId}"]
+        runner = WorkerBatchRunner(command, resultsFile, processes=2, logDir=logDir)
+        dataIds = ["visit=1 sensor=%d" % i for i in range(4)]
+        outcomes = runner.run(dataIds)
+        self.assertEqual([(dataId, returncode) for dataId, returncode, elapsed in outcomes],
+                         [(dataId, 3 if dataId.endswith("=1") else 0) for dataId in dataIds])
+        with open(resultsFile) as fileObj:
+            results = sorted((line.split(" ", 3)[::3] for line in fileObj.read().splitlines()),
+                             key=lambda result: result[1])
+        self.assertEqual(results, [["failed" if i == 1 else "ok", "visit=1 sensor=%d" % i] for i in range(4)])
+        with open(os.path.join(logDir, "visit-1:sensor-2.log")) as fileObj:
+            self.assertEqual(fileObj.read(), "visit=1 sensor=2\n")
+        summary = runner.summarize(outcomes)
+        self.assertEqual(len(summary), 2)
+        self.assertTrue(summary[0].startswith("FAILED visit=1 sensor=1: exit code 3"))
+
+    def testLedger(self):
+        ledgerDir = os.path.join(self.tmpDir.name, "ledger")
+        with CompletionLedger(ledgerDir, syncEvery=2) as ledger:
+            ledger.record("visit=1", 0, 10.0)
+            ledger.record("visit=2", 1, 10.0)
+            ledger.record("visit=3", 0, 10.0)
+        with CompletionLedger(ledgerDir) as ledger:
+            ledger.record("visit=2", 0, 5.0)
+            # the clock stepped back
+            ledger.record("visit=3", 0, -2.0)
+        # a writer which died part way through a record
+        with open(os.path.join(ledgerDir, "dead.ledger"), "wb") as fileObj:
+            fileObj.write(b"\xff" * 20)
+        completed = CompletionLedger(ledgerDir).completed()
+        self.assertEqual(len(completed), 3)
+        for dataId in ["visit=1", "visit=2", "visit=3"]:
+            self.assertIn(hashDataId(dataId), completed)
+
+        # a retry of the batch only runs the ids which didn't complete
+        resultsFile = os.path.join(self.tmpDir.name, "batch.results")
+        runner = WorkerBatchRunner(["sh", "-c", "exit 0"], resultsFile, processes=2,
+                                   ledger=CompletionLedger(ledgerDir))
+        runner.run(["visit=%d" % i for i in range(1, 6)])
+        with open(resultsFile) as fileObj:
+            statuses = sorted(line.split(" ", 3)[::3] for line in fileObj.read().splitlines())
+        self.assertEqual(statuses, [["ok", "visit=4"], ["ok", "visit=5"], ["skipped", "visit=1"],
+                                    ["skipped", "visit=2"], ["skipped", "visit=3"]])
+        self.assertEqual(len(CompletionLedger(ledgerDir).completed()), 5)
+
+
+class WorkerBatchRunnerMemoryTester(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()